@@ -4,18 +4,42 @@ GOOSE桥接服务性能测试工具
 用于压力测试和性能评估
 """
 
+import os
+import sys
 import time
 import threading
 import socket
 import struct
 import statistics
 import argparse
+import queue
+import multiprocessing
+import tracemalloc
+import gc
 from datetime import datetime
 
+# 数据面模块：安装后与本脚本同在/usr/local/bin，源码树中位于../src
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+DEFAULT_BRIDGE_PID_FILE = '/var/run/goose-bridge.pid'
+
+
+def read_bridge_pid(pid_file=DEFAULT_BRIDGE_PID_FILE):
+    """从PID文件读取桥接进程PID，不存在时返回None"""
+    try:
+        with open(pid_file) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
 class GOOSEBridgeBenchmark:
     """GOOSE桥接性能测试器"""
     
-    def __init__(self):
+    def __init__(self, bridge_pid=None):
+        # 桥接进程PID：测试前后采样其CPU时间，与延迟分位数一起报告
+        self.bridge_pid = bridge_pid
+        self.cpu_sample = None
         self.results = {
             'sent_packets': 0,
             'received_packets': 0,
@@ -27,6 +51,29 @@ class GOOSEBridgeBenchmark:
         }
         self.running = False
     
+    def start_cpu_sampling(self):
+        """记录桥接进程的CPU时间起点"""
+        self.cpu_sample = None
+        if not self.bridge_pid:
+            return
+        from queue_workers import process_cpu_seconds
+        cpu_seconds = process_cpu_seconds(self.bridge_pid)
+        if cpu_seconds is None:
+            print(f"⚠️  无法读取桥接进程 {self.bridge_pid} 的CPU时间")
+            return
+        self.cpu_sample = (time.time(), cpu_seconds)
+    
+    def stop_cpu_sampling(self):
+        """计算测试期间桥接进程的CPU占用（百分比，单核为100%）"""
+        if not self.cpu_sample:
+            return
+        from queue_workers import process_cpu_seconds
+        cpu_seconds = process_cpu_seconds(self.bridge_pid)
+        start_time, start_cpu = self.cpu_sample
+        elapsed = time.time() - start_time
+        if cpu_seconds is not None and elapsed > 0:
+            self.results['bridge_cpu_percent'] = (cpu_seconds - start_cpu) / elapsed * 100
+    
     def generate_test_goose_packet(self, seq_num):
         """生成测试GOOSE数据包"""
         # 模拟libiec61850的GOOSE数据包格式
@@ -89,6 +136,10 @@ class GOOSEBridgeBenchmark:
     
     def receiver_thread(self, listen_port, duration):
         """接收线程"""
+        from frame_buffers import ENCAP_EXPAND, EncapCodec, generate_bridge_id
+        
+        # 解码v1/v2/v3封装头（独立的桥接实例ID，不会把桥接发出的数据报当作回环）
+        codec = EncapCodec(generate_bridge_id())
         try:
             sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -106,20 +157,25 @@ class GOOSEBridgeBenchmark:
                     data, addr = sock.recvfrom(2048)
                     receive_time = time.time()
                     
-                    # 解析时间戳计算延迟
-                    if len(data) >= 14:
-                        try:
-                            send_timestamp = struct.unpack('!Q', data[6:14])[0]
-                            send_time = send_timestamp / 1000000.0
-                            latency = (receive_time - send_time) * 1000  # 毫秒
-                            
-                            if 0 <= latency <= 10000:  # 合理的延迟范围
-                                self.results['latencies'].append(latency)
-                            
-                        except:
-                            pass
-                    
-                    self.results['received_packets'] += 1
+                    # 解析封装头中的时间戳计算延迟（聚合包和压缩数据报逐帧展开）
+                    header = codec.decode(data)
+                    if header is ENCAP_EXPAND:
+                        headers = [record_header for _, record_header in codec.expand(data)]
+                    else:
+                        headers = [header]
+                    for header in headers:
+                        if header is not None:
+                            try:
+                                send_time = header[3] / 1000000.0
+                                latency = (receive_time - send_time) * 1000  # 毫秒
+                                
+                                if 0 <= latency <= 10000:  # 合理的延迟范围
+                                    self.results['latencies'].append(latency)
+                                
+                            except:
+                                pass
+                        
+                        self.results['received_packets'] += 1
                     
                 except socket.timeout:
                     continue
@@ -155,6 +211,7 @@ class GOOSEBridgeBenchmark:
         }
         
         self.running = True
+        self.start_cpu_sampling()
         
         # 启动线程
         sender = threading.Thread(target=self.sender_thread, 
@@ -191,6 +248,7 @@ class GOOSEBridgeBenchmark:
         
         self.results['end_time'] = time.time()
         self.running = False
+        self.stop_cpu_sampling()
         
         print("\n" + "-" * 50)
         self.print_results()
@@ -219,6 +277,7 @@ class GOOSEBridgeBenchmark:
         }
         
         self.running = True
+        self.start_cpu_sampling()
         
         # 启动接收线程
         receiver = threading.Thread(target=self.receiver_thread, 
@@ -260,10 +319,271 @@ class GOOSEBridgeBenchmark:
         
         self.results['end_time'] = time.time()
         self.running = False
+        self.stop_cpu_sampling()
         
         print("-" * 50)
         self.print_results()
     
+    def run_allocation_test(self, frames=20000, payload_size=200, batch=32, warmup=2000, large_payload_size=1400):
+        """内存分配测试：逐帧统计传统路径与零拷贝路径（v3封装）的内存分配
+
+        净分配：关闭GC后用sys.getallocatedblocks()统计稳态循环前后的内存块差值；
+        临时分配：tracemalloc逐帧重置峰值，统计处理单帧期间新增的峰值字节（包括处理完即释放的对象），
+        在两种载荷长度下测量，零拷贝路径不复制帧和MAC，临时分配只剩整数等定长对象，不随载荷增长
+        """
+        from batch_io import BatchSender
+        from frame_buffers import EncapCodec, FrameBufferPool
+        
+        print(f"🧪 开始内存分配测试")
+        print(f"   帧数: {frames} (预热 {warmup}), 载荷: {payload_size}/{large_payload_size}字节, 每批: {batch}")
+        print("-" * 50)
+        
+        goose_mac = bytes.fromhex('010CCD010001')
+        
+        def build_frame(size):
+            return (goose_mac + bytes([0x02, 0x00, 0x00, 0x00, 0x00, 0x01]) +
+                    struct.pack('!HHH', 0x8100, (4 << 13) | 100, 0x88B8) + b'\x61' * size)
+        
+        def legacy_process(tap_fd, sender, codec):
+            # 传统路径：os.read + 切片 + 字典 + codec.encode()拼接
+            frame_data = os.read(tap_fd, 2048)
+            parsed = {
+                'dst_mac': frame_data[0:6],
+                'src_mac': frame_data[6:12],
+                'has_vlan': True,
+                'tci': struct.unpack('!H', frame_data[14:16])[0],
+                'ethertype': struct.unpack('!H', frame_data[16:18])[0],
+                'payload': frame_data[18:]
+            }
+            sender.add(codec.encode(parsed['dst_mac'], parsed['src_mac'], time.time_ns() // 1000,
+                                    parsed['tci'], parsed['payload']))
+        
+        frame_pool = FrameBufferPool(batch, 2048)
+        
+        def zero_copy_process(tap_fd, sender, codec):
+            # 零拷贝路径：readv读入缓冲池 + 固定偏移解析 + 直接写入发送槽位
+            view = frame_pool.read(tap_fd)
+            if view.parse():
+                sender.commit(view.encapsulate_into(sender.reserve(), time.time_ns() // 1000, codec))
+        
+        def calibrate(count):
+            # 测量本身（reset_peak/get_traced_memory）的峰值开销，从逐帧结果中扣除
+            overhead = []
+            for _ in range(count):
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                overhead.append(tracemalloc.get_traced_memory()[1] - before)
+            return statistics.median_low(overhead)
+        
+        def measure(process, frame):
+            tap_local, tap_remote = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sink.bind(('127.0.0.1', 0))
+            tx_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            tx_sock.connect(sink.getsockname())
+            sender = BatchSender(tx_sock, batch_size=batch, max_hold_us=1000000)
+            # 与桥接服务相同的默认v3封装
+            codec = EncapCodec(0x12345678)
+            tap_fd = tap_local.fileno()
+            
+            def run(count, trace):
+                transient = []
+                for index in range(count):
+                    tap_remote.send(frame)
+                    if trace:
+                        tracemalloc.reset_peak()
+                        before = tracemalloc.get_traced_memory()[0]
+                    process(tap_fd, sender, codec)
+                    if trace:
+                        transient.append(tracemalloc.get_traced_memory()[1] - before)
+                    if index % batch == batch - 1:
+                        sender.flush_batch_end()
+                        # 丢弃接收端数据，避免套接字缓冲区写满
+                        try:
+                            while True:
+                                sink.recv(4096, socket.MSG_DONTWAIT)
+                        except BlockingIOError:
+                            pass
+                return transient
+            
+            gc_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                run(warmup, False)
+                blocks_before = sys.getallocatedblocks()
+                run(frames, False)
+                net_blocks = (sys.getallocatedblocks() - blocks_before) / frames
+                
+                tracemalloc.start()
+                run(warmup, True)
+                overhead = calibrate(1000)
+                transient = [max(0, value - overhead) for value in run(frames, True)]
+                tracemalloc.stop()
+            finally:
+                if gc_enabled:
+                    gc.enable()
+                for sock in (tap_local, tap_remote, sink, tx_sock):
+                    sock.close()
+            return {
+                'net_blocks': net_blocks,
+                'transient_bytes': statistics.median_low(transient),
+                'max_transient_bytes': max(transient)
+            }
+        
+        def measure_header(frame):
+            # 封装头单独测量：MAC从帧缓冲区的固定视图直接写入槽位，序号和时间戳写入预分配槽位，不应有临时分配
+            tap_local, tap_remote = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+            tap_remote.send(frame)
+            view = frame_pool.read(tap_local.fileno())
+            view.parse()
+            tap_local.close()
+            tap_remote.close()
+            codec = EncapCodec(0x12345678)
+            slot = memoryview(bytearray(2048))
+            timestamp_us = time.time_ns() // 1000
+            transient = []
+            tracemalloc.start()
+            overhead = calibrate(1000)
+            for _ in range(warmup + frames):
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                codec.pack_header_into(slot, view.dst_mac, view.src_mac, timestamp_us, view.tci)
+                transient.append(max(0, tracemalloc.get_traced_memory()[1] - before - overhead))
+            tracemalloc.stop()
+            return statistics.median_low(transient[warmup:])
+        
+        results = {}
+        for name, process in (('传统路径', legacy_process), ('零拷贝路径', zero_copy_process)):
+            results[name] = {size: measure(process, build_frame(size)) for size in (payload_size, large_payload_size)}
+        header_transient = measure_header(build_frame(payload_size))
+        
+        print(f"📊 每帧内存分配 (GC关闭, v3封装):")
+        for name, by_size in results.items():
+            for size, result in by_size.items():
+                print(f"   {name} 载荷{size}字节: 净分配 {result['net_blocks']:.3f}块, "
+                      f"临时分配 {result['transient_bytes']:.0f}字节 (最大 {result['max_transient_bytes']})")
+        
+        zero_copy = results['零拷贝路径']
+        net_zero = all(abs(result['net_blocks']) < 0.01 for result in zero_copy.values())
+        # 临时分配不随载荷增长说明没有复制帧、载荷或MAC；帧长超过256后readv返回值等不再是缓存的小整数，
+        # 允许相差两个整数对象
+        no_copy = (zero_copy[large_payload_size]['transient_bytes'] -
+                   zero_copy[payload_size]['transient_bytes']) <= 64
+        print(f"   零拷贝封装头写入: 临时分配 {header_transient}字节")
+        print(f"\n🎯 零拷贝稳态目标 (每帧0次净分配): {'🟢 达成' if net_zero else '🔴 未达成'}")
+        print(f"🎯 封装头目标 (每帧0次临时分配): {'🟢 达成' if header_transient == 0 else '🔴 未达成'}")
+        print(f"🎯 零拷贝临时分配目标 (不复制帧/载荷/MAC): {'🟢 达成' if no_copy else '🔴 未达成'}")
+        return results
+    
+    def run_ring_test(self, frames=200000, payload_size=200, slots=1024):
+        """阶段间交接微基准：SPSC环形缓冲区对比queue.Queue（线程）和multiprocessing.Queue（进程）"""
+        from spsc_ring import SPSCRing
+        
+        print(f"🔁 开始阶段间交接测试")
+        print(f"   帧数: {frames}, 载荷: {payload_size}字节, 队列容量: {slots}")
+        print("-" * 50)
+        
+        frame = b'\x61' * payload_size
+        
+        def ring_producer(ring):
+            sent = 0
+            while sent < frames:
+                if ring.try_push(frame):
+                    sent += 1
+                else:
+                    time.sleep(0)
+        
+        def ring_consumer(ring):
+            received = 0
+            while received < frames:
+                if not ring.drain(len, 256):
+                    ring.wait(1.0, spin_us=0)
+                    continue
+                received = ring.stats['popped']
+        
+        def queue_producer(handoff):
+            for _ in range(frames):
+                handoff.put(frame)
+        
+        def queue_consumer(handoff):
+            for _ in range(frames):
+                handoff.get()
+        
+        def run_threads(producer, consumer, handoff):
+            start = time.perf_counter()
+            thread = threading.Thread(target=producer, args=(handoff,))
+            thread.start()
+            consumer(handoff)
+            thread.join()
+            return time.perf_counter() - start
+        
+        def run_processes(producer, consumer, handoff):
+            # fork上下文：子进程作为生产者继承共享内存/队列
+            start = time.perf_counter()
+            process = multiprocessing.get_context('fork').Process(target=producer, args=(handoff,))
+            process.start()
+            consumer(handoff)
+            process.join()
+            return time.perf_counter() - start
+        
+        results = {}
+        ring = SPSCRing(slots, payload_size)
+        results['SPSC环形缓冲区 (线程)'] = run_threads(ring_producer, ring_consumer, ring)
+        ring.close()
+        # 消费者阻塞在eventfd上而不是短睡眠轮询
+        ring = SPSCRing(slots, payload_size, notify=True)
+        results['SPSC环形缓冲区 (线程, eventfd唤醒)'] = run_threads(ring_producer, ring_consumer, ring)
+        ring.close()
+        results['queue.Queue (线程)'] = run_threads(queue_producer, queue_consumer, queue.Queue(maxsize=slots))
+        ring = SPSCRing(slots, payload_size, shared=True)
+        results['SPSC环形缓冲区 (进程, 共享内存)'] = run_processes(ring_producer, ring_consumer, ring)
+        ring.close()
+        ring = SPSCRing(slots, payload_size, shared=True, notify=True)
+        results['SPSC环形缓冲区 (进程, 共享内存, eventfd唤醒)'] = run_processes(ring_producer, ring_consumer, ring)
+        ring.close()
+        mp_queue = multiprocessing.get_context('fork').Queue(maxsize=slots)
+        results['multiprocessing.Queue (进程)'] = run_processes(queue_producer, queue_consumer, mp_queue)
+        
+        def wake_test(ring, count=200, interval=0.002):
+            # 稀疏流量：每interval秒一帧，消费者每次都进入睡眠，测量唤醒延迟和进程CPU时间
+            def producer(ring):
+                for _ in range(count):
+                    time.sleep(interval)
+                    ring.try_push(struct.pack('=Q', time.perf_counter_ns()))
+            
+            delays = []
+            
+            def record(data):
+                delays.append((time.perf_counter_ns() - struct.unpack_from('=Q', data)[0]) / 1000)
+            
+            cpu_start = time.process_time()
+            start = time.perf_counter()
+            thread = threading.Thread(target=producer, args=(ring,))
+            thread.start()
+            while len(delays) < count:
+                if not ring.drain(record, 256):
+                    ring.wait(1.0, spin_us=0)
+            thread.join()
+            cpu = (time.process_time() - cpu_start) / (time.perf_counter() - start) * 100
+            return statistics.median(delays), cpu
+        
+        wake_results = {}
+        for name, notify in (('短睡眠轮询', False), ('eventfd唤醒', True)):
+            ring = SPSCRing(slots, 16, notify=notify)
+            wake_results[name] = wake_test(ring)
+            ring.close()
+        
+        print(f"📊 交接性能:")
+        for name, elapsed in results.items():
+            print(f"   {name}: {frames / elapsed:,.0f} 帧/秒 ({elapsed / frames * 1e6:.2f} µs/帧)")
+        print(f"📊 稀疏流量唤醒 (每2ms一帧):")
+        for name, (delay, cpu) in wake_results.items():
+            print(f"   {name}: 唤醒延迟中位数 {delay:.1f} µs, 进程CPU {cpu:.1f}%")
+        
+        speedup = results['queue.Queue (线程)'] / results['SPSC环形缓冲区 (线程)']
+        print(f"\n🎯 线程间交接: SPSC环形缓冲区为queue.Queue的 {speedup:.1f} 倍")
+        return results
+    
     def print_results(self):
         """打印测试结果"""
         duration = self.results['end_time'] - self.results['start_time']
@@ -301,10 +621,17 @@ class GOOSEBridgeBenchmark:
                 print(f"   延迟标准差: {statistics.stdev(latencies):.3f} ms")
             
             # 延迟分布
-            p95 = sorted(latencies)[int(len(latencies) * 0.95)]
-            p99 = sorted(latencies)[int(len(latencies) * 0.99)]
+            ordered = sorted(latencies)
+            p95 = ordered[int(len(ordered) * 0.95)]
+            p99 = ordered[int(len(ordered) * 0.99)]
+            p999 = ordered[min(int(len(ordered) * 0.999), len(ordered) - 1)]
             print(f"   95%延迟: {p95:.3f} ms")
             print(f"   99%延迟: {p99:.3f} ms")
+            print(f"   99.9%延迟: {p999:.3f} ms")
+        
+        # 桥接进程CPU占用（与延迟分位数对照评估忙轮询模式的代价）
+        if 'bridge_cpu_percent' in self.results:
+            print(f"   桥接进程CPU占用: {self.results['bridge_cpu_percent']:.1f}% (PID {self.bridge_pid})")
         
         # 性能评估
         print(f"\n🎯 性能评估:")
@@ -335,6 +662,8 @@ def main():
     throughput_parser.add_argument('--target-ip', default='224.0.1.100', help='目标IP')
     throughput_parser.add_argument('--target-port', type=int, default=61850, help='目标端口')
     throughput_parser.add_argument('--listen-port', type=int, default=61851, help='监听端口')
+    throughput_parser.add_argument('--bridge-pid', type=int, default=None,
+                                   help=f'采样CPU占用的桥接进程PID（默认读取{DEFAULT_BRIDGE_PID_FILE}）')
     throughput_parser.add_argument('--rate', type=int, default=100, help='发送速率(pps)')
     throughput_parser.add_argument('--duration', type=int, default=30, help='测试时长(秒)')
     throughput_parser.add_argument('--packet-size', type=int, default=200, help='数据包大小')
@@ -344,16 +673,31 @@ def main():
     latency_parser.add_argument('--target-ip', default='224.0.1.100', help='目标IP')
     latency_parser.add_argument('--target-port', type=int, default=61850, help='目标端口')
     latency_parser.add_argument('--listen-port', type=int, default=61851, help='监听端口')
+    latency_parser.add_argument('--bridge-pid', type=int, default=None,
+                                help=f'采样CPU占用的桥接进程PID（默认读取{DEFAULT_BRIDGE_PID_FILE}）')
     latency_parser.add_argument('--count', type=int, default=1000, help='数据包数量')
     latency_parser.add_argument('--interval', type=float, default=0.01, help='发送间隔(秒)')
     
+    # 内存分配测试（不需要运行中的桥接服务）
+    alloc_parser = subparsers.add_parser('alloc', help='每帧内存分配测试')
+    alloc_parser.add_argument('--frames', type=int, default=20000, help='测量帧数')
+    alloc_parser.add_argument('--payload-size', type=int, default=200, help='GOOSE载荷大小')
+    alloc_parser.add_argument('--batch', type=int, default=32, help='每批帧数')
+    
+    # 阶段间交接微基准（不需要运行中的桥接服务）
+    ring_parser = subparsers.add_parser('ring', help='SPSC环形缓冲区与queue.Queue交接性能对比')
+    ring_parser.add_argument('--frames', type=int, default=200000, help='交接帧数')
+    ring_parser.add_argument('--payload-size', type=int, default=200, help='帧大小')
+    ring_parser.add_argument('--slots', type=int, default=1024, help='队列容量（2的幂）')
+    
     args = parser.parse_args()
     
     if not args.test_type:
         parser.print_help()
         return
     
-    benchmark = GOOSEBridgeBenchmark()
+    bridge_pid = getattr(args, 'bridge_pid', None) or read_bridge_pid()
+    benchmark = GOOSEBridgeBenchmark(bridge_pid)
     
     if args.test_type == 'throughput':
         benchmark.run_throughput_test(
@@ -372,6 +716,18 @@ def main():
             count=args.count,
             interval=args.interval
         )
+    elif args.test_type == 'alloc':
+        benchmark.run_allocation_test(
+            frames=args.frames,
+            payload_size=args.payload_size,
+            batch=args.batch
+        )
+    elif args.test_type == 'ring':
+        benchmark.run_ring_test(
+            frames=args.frames,
+            payload_size=args.payload_size,
+            slots=args.slots
+        )
 
 if __name__ == "__main__":
     main()
@@ -213,6 +213,18 @@ install_program_files() {
     # 复制依赖模块
     cp "$project_root/src/dual_igmp_keepalive.py" /usr/local/bin/
     cp "$project_root/src/dual_path_processor.py" /usr/local/bin/
+    cp "$project_root/src/batch_io.py" /usr/local/bin/
+    cp "$project_root/src/event_reactor.py" /usr/local/bin/
+    cp "$project_root/src/async_engine.py" /usr/local/bin/
+    cp "$project_root/src/queue_workers.py" /usr/local/bin/
+    cp "$project_root/src/frame_buffers.py" /usr/local/bin/
+    cp "$project_root/src/cpu_policy.py" /usr/local/bin/
+    cp "$project_root/src/batch_classifier.py" /usr/local/bin/
+    cp "$project_root/src/goose_pdu.py" /usr/local/bin/
+    cp "$project_root/src/frame_aggregator.py" /usr/local/bin/
+    cp "$project_root/src/frame_compressor.py" /usr/local/bin/
+    cp "$project_root/src/frame_delta.py" /usr/local/bin/
+    cp "$project_root/src/frame_suppressor.py" /usr/local/bin/
     
     # 复制配置文件
     cp "$project_root/config/goose-bridge-dual.conf" /etc/goose-bridge/
@@ -92,6 +92,22 @@ echo "📁 脚本目录: $SCRIPT_DIR"
 echo "🔍 检查必需文件..."
 REQUIRED_FILES=(
     "../src/goose-bridge.py"
+    "../src/batch_io.py"
+    "../src/event_reactor.py"
+    "../src/async_engine.py"
+    "../src/queue_workers.py"
+    "../src/frame_buffers.py"
+    "../src/frame_pipeline.py"
+    "../src/spsc_ring.py"
+    "../src/cpu_policy.py"
+    "../src/batch_classifier.py"
+    "../src/packet_ring.py"
+    "../src/kernel_offload.py"
+    "../src/goose_pdu.py"
+    "../src/frame_aggregator.py"
+    "../src/frame_compressor.py"
+    "../src/frame_delta.py"
+    "../src/frame_suppressor.py"
     "../config/goose-bridge.conf"
     "../config/goose-bridge.service"
     "goose-bridge-monitor.py"
@@ -119,6 +135,25 @@ cp "$SCRIPT_DIR/../src/goose-bridge.py" /usr/local/bin/goose-bridge
 chmod +x /usr/local/bin/goose-bridge
 echo "   ✅ 主程序: /usr/local/bin/goose-bridge"
 
+# 复制数据面模块
+cp "$SCRIPT_DIR/../src/batch_io.py" /usr/local/bin/
+cp "$SCRIPT_DIR/../src/event_reactor.py" /usr/local/bin/
+cp "$SCRIPT_DIR/../src/async_engine.py" /usr/local/bin/
+cp "$SCRIPT_DIR/../src/queue_workers.py" /usr/local/bin/
+cp "$SCRIPT_DIR/../src/frame_buffers.py" /usr/local/bin/
+cp "$SCRIPT_DIR/../src/frame_pipeline.py" /usr/local/bin/
+cp "$SCRIPT_DIR/../src/spsc_ring.py" /usr/local/bin/
+cp "$SCRIPT_DIR/../src/cpu_policy.py" /usr/local/bin/
+cp "$SCRIPT_DIR/../src/batch_classifier.py" /usr/local/bin/
+cp "$SCRIPT_DIR/../src/packet_ring.py" /usr/local/bin/
+cp "$SCRIPT_DIR/../src/kernel_offload.py" /usr/local/bin/
+cp "$SCRIPT_DIR/../src/goose_pdu.py" /usr/local/bin/
+cp "$SCRIPT_DIR/../src/frame_aggregator.py" /usr/local/bin/
+cp "$SCRIPT_DIR/../src/frame_compressor.py" /usr/local/bin/
+cp "$SCRIPT_DIR/../src/frame_delta.py" /usr/local/bin/
+cp "$SCRIPT_DIR/../src/frame_suppressor.py" /usr/local/bin/
+echo "   ✅ 数据面模块: /usr/local/bin/batch_io.py, event_reactor.py, async_engine.py, queue_workers.py, frame_buffers.py, frame_pipeline.py, spsc_ring.py, cpu_policy.py, batch_classifier.py, packet_ring.py, kernel_offload.py, goose_pdu.py, frame_aggregator.py, frame_compressor.py, frame_delta.py, frame_suppressor.py"
+
 # 复制监控工具
 cp "$SCRIPT_DIR/goose-bridge-monitor.py" /usr/local/bin/goose-bridge-monitor
 chmod +x /usr/local/bin/goose-bridge-monitor
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+asyncio数据面引擎
+TAP接口和多播套接字通过loop.add_reader驱动，统计导出、IGMP保活、健康检查
+作为协程运行在同一事件循环中，取代每个描述符一个守护线程的模型；
+多个桥接实例可以在同一进程的同一事件循环中并发运行
+"""
+
+import asyncio
+
+
+class AsyncioDataPlane:
+    """asyncio数据面引擎"""
+
+    def __init__(self, logger, poll_interval=0.5):
+        self.logger = logger
+        self.poll_interval = poll_interval
+        self.loop = None
+
+        # fd -> (处理函数, 名称)
+        self.readers = {}
+        # (协程工厂, 名称)
+        self.coroutines = []
+        self.tasks = []
+
+        self.stats = {
+            'reader_callbacks': 0,
+            'handler_errors': 0
+        }
+
+    def add_reader(self, fd, handler, name):
+        """注册可读描述符；handler()每次批量读取直到EAGAIN或达到预算"""
+        if hasattr(fd, 'fileno'):
+            fd = fd.fileno()
+        self.readers[fd] = (handler, name)
+
+    def add_coroutine(self, coroutine_factory, name):
+        """注册后台协程（统计导出、IGMP保活、健康检查等）"""
+        self.coroutines.append((coroutine_factory, name))
+
+    def _on_readable(self, fd):
+        handler, name = self.readers[fd]
+        self.stats['reader_callbacks'] += 1
+        try:
+            # add_reader为水平触发，预算用完后剩余数据会在下一轮再次回调
+            handler()
+        except Exception as e:
+            self.stats['handler_errors'] += 1
+            self.logger.error(f"{name}读取回调失败: {e}")
+
+    async def _supervise(self, coroutine_factory, name):
+        try:
+            await coroutine_factory()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.logger.error(f"协程 {name} 异常退出: {e}")
+
+    async def run(self, running):
+        """运行数据面直到running()返回False"""
+        self.loop = asyncio.get_running_loop()
+
+        for fd in self.readers:
+            self.loop.add_reader(fd, self._on_readable, fd)
+        self.tasks = [asyncio.create_task(self._supervise(factory, name), name=name)
+                      for factory, name in self.coroutines]
+
+        self.logger.info(f"asyncio数据面启动: {len(self.readers)}个描述符, {len(self.tasks)}个协程")
+
+        try:
+            while running():
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            for fd in self.readers:
+                self.loop.remove_reader(fd)
+            for task in self.tasks:
+                task.cancel()
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+            self.tasks = []
+            self.logger.info("asyncio数据面已停止")
+
+    def get_stats(self):
+        """获取引擎统计信息"""
+        stats = dict(self.stats)
+        stats['readers'] = [name for _, name in self.readers.values()]
+        stats['coroutines'] = [name for _, name in self.coroutines]
+        return stats
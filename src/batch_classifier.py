@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+NumPy向量化批量分类
+一次唤醒内把TAP帧读入连续缓冲区（定长槽位，长度数组记录每帧长度），
+通过NumPy结构化视图一次性判断所有帧的EtherType、VLAN标签、目的MAC范围和APPID；
+只有需要转发的帧才进入Python层逐帧封装。NumPy为可选依赖，未安装时HAS_NUMPY为False
+"""
+
+import os
+
+from frame_buffers import GOOSE_MULTICAST_MAC
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    np = None
+    HAS_NUMPY = False
+
+GOOSE_ETHERTYPE = 0x88B8
+VLAN_ETHERTYPE = 0x8100
+
+
+def parse_appid_ranges(value):
+    """解析APPID过滤配置，例如 "0x0001-0x3FFF,0x8000"；空字符串返回空列表（不过滤）"""
+    ranges = []
+    for part in (value or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            low, high = part.split('-', 1)
+            ranges.append((int(low, 0), int(high, 0)))
+        else:
+            ranges.append((int(part, 0), int(part, 0)))
+    return ranges
+
+
+def header_dtype(stride):
+    """以太网头的结构化视图：字段重叠定义，同时覆盖无VLAN和802.1Q两种布局"""
+    return np.dtype({
+        'names': ['dst_high', 'dst_low', 'outer_type', 'tci', 'inner_type', 'appid_tagged'],
+        'formats': ['>u4', '>u2', '>u2', '>u2', '>u2', '>u2'],
+        # 无VLAN帧的APPID与tci位于同一偏移(14)
+        'offsets': [0, 4, 12, 14, 16, 18],
+        'itemsize': stride
+    })
+
+
+def parse_mac_range(value):
+    """解析目的MAC范围配置，例如 "01:0C:CD:01:00:00-01:0C:CD:01:01:FF"；空字符串返回None"""
+    value = (value or '').strip()
+    if not value:
+        return None
+    low, _, high = value.partition('-')
+    low = bytes.fromhex(low.replace(':', '').strip())
+    high = bytes.fromhex(high.replace(':', '').strip()) if high else low
+    if len(low) != 6 or len(high) != 6:
+        raise ValueError(f"无效的MAC范围: {value}")
+    return low, high
+
+
+class BurstFrame:
+    """突发缓冲区中一帧的视图，接口与FrameView一致（has_vlan/vlan_id/src_mac/encapsulate_into）"""
+
+    __slots__ = ('classifier', 'index', 'has_vlan', 'vlan_id')
+
+    def __init__(self, classifier):
+        self.classifier = classifier
+        self.index = 0
+        self.has_vlan = False
+        self.vlan_id = 0
+
+    @property
+    def src_mac(self):
+        return self.classifier.mac_views[self.index][1]
+
+    def encapsulate_into(self, slot, timestamp_us, codec):
+        return self.classifier.encapsulate_into(self.index, slot, timestamp_us, codec)
+
+
+class BatchClassifier:
+    """连续突发缓冲区 + 向量化GOOSE分类"""
+
+    def __init__(self, max_frames=64, buffer_size=2048, dst_mac_min=GOOSE_MULTICAST_MAC,
+                 dst_mac_max=GOOSE_MULTICAST_MAC, appid_ranges=None):
+        if not HAS_NUMPY:
+            raise RuntimeError("批量分类需要NumPy (pip install numpy)")
+        self.max_frames = max(1, max_frames)
+        self.stride = buffer_size
+        self.buffer = bytearray(self.max_frames * self.stride)
+        self.view = memoryview(self.buffer)
+        # os.readv使用的每个槽位缓冲区列表，预先创建
+        self.iovs = [[self.view[i * self.stride:(i + 1) * self.stride]] for i in range(self.max_frames)]
+        # 每个槽位的（目的MAC, 源MAC）固定视图，封装时直接传给codec
+        self.mac_views = [(self.view[i * self.stride:i * self.stride + 6],
+                           self.view[i * self.stride + 6:i * self.stride + 12]) for i in range(self.max_frames)]
+        self.lengths = np.zeros(self.max_frames, dtype=np.int32)
+        self.headers = np.ndarray((self.max_frames,), dtype=header_dtype(self.stride), buffer=self.buffer)
+        self.dst_mac_min = int.from_bytes(dst_mac_min, 'big')
+        self.dst_mac_max = int.from_bytes(dst_mac_max, 'big')
+        self.appid_ranges = list(appid_ranges or [])
+        self.count = 0
+        self.frame = BurstFrame(self)
+
+        # 最近一次分类结果（转为Python列表，逐帧封装时避免NumPy标量索引开销）
+        self.forward_indices = []
+        self.has_vlan = []
+        self.vlan_ids = []
+        self.tcis = []
+        self.header_lengths = []
+        self.frame_lengths = []
+
+        self.stats = {
+            'bursts': 0,
+            'frames_read': 0,
+            'frames_forwarded': 0,
+            'frames_filtered': 0
+        }
+
+    def read_burst(self, fd, max_frames=None):
+        """读取一次突发直到EAGAIN或槽位用完，返回帧数"""
+        limit = min(max_frames or self.max_frames, self.max_frames)
+        lengths = self.lengths
+        iovs = self.iovs
+        count = 0
+        while count < limit:
+            try:
+                length = os.readv(fd, iovs[count])
+            except BlockingIOError:
+                break
+            if not length:
+                break
+            lengths[count] = length
+            count += 1
+        self.count = count
+        if count:
+            self.stats['bursts'] += 1
+            self.stats['frames_read'] += count
+        return count
+
+    def classify(self):
+        """一次性分类本次突发的全部帧，返回需要转发的帧下标列表"""
+        count = self.count
+        if not count:
+            self.forward_indices = []
+            return self.forward_indices
+
+        headers = self.headers[:count]
+        lengths = self.lengths[:count]
+
+        has_vlan = headers['outer_type'] == VLAN_ETHERTYPE
+        ethertype = np.where(has_vlan, headers['inner_type'], headers['outer_type'])
+        header_lengths = np.where(has_vlan, 18, 14)
+        dst_mac = (headers['dst_high'].astype(np.uint64) << np.uint64(16)) | headers['dst_low']
+
+        mask = ((lengths >= header_lengths) &
+                (ethertype == GOOSE_ETHERTYPE) &
+                (dst_mac >= self.dst_mac_min) &
+                (dst_mac <= self.dst_mac_max))
+
+        if self.appid_ranges:
+            # APPID为GOOSE载荷的前两个字节
+            appid = np.where(has_vlan, headers['appid_tagged'], headers['tci'])
+            appid_match = np.zeros(count, dtype=bool)
+            for low, high in self.appid_ranges:
+                appid_match |= (appid >= low) & (appid <= high)
+            mask &= appid_match & (lengths >= header_lengths + 2)
+
+        self.forward_indices = np.flatnonzero(mask).tolist()
+        self.has_vlan = has_vlan.tolist()
+        self.tcis = headers['tci'].tolist()
+        self.vlan_ids = (headers['tci'] & 0x0FFF).tolist()
+        self.header_lengths = header_lengths.tolist()
+        self.frame_lengths = lengths.tolist()
+        forwarded = len(self.forward_indices)
+        self.stats['frames_forwarded'] += forwarded
+        self.stats['frames_filtered'] += count - forwarded
+        return self.forward_indices
+
+    def forwarded_frames(self):
+        """逐个返回需要转发的帧（复用同一个BurstFrame对象，接口与FrameView一致）"""
+        frame = self.frame
+        has_vlan = self.has_vlan
+        vlan_ids = self.vlan_ids
+        for index in self.forward_indices:
+            frame.index = index
+            frame.has_vlan = has_vlan[index]
+            frame.vlan_id = vlan_ids[index] if frame.has_vlan else 0
+            yield frame
+
+    def encapsulate_into(self, index, slot, timestamp_us, codec):
+        """把第index帧用codec封装后写入发送槽位，返回数据报长度"""
+        offset = index * self.stride
+        header_length = self.header_lengths[index]
+        payload_length = self.frame_lengths[index] - header_length
+        encap_length = codec.header_length
+        total = encap_length + payload_length
+        if total > len(slot):
+            raise ValueError(f"数据报长度 {total} 超过发送槽位 {len(slot)}")
+
+        dst_mac, src_mac = self.mac_views[index]
+        codec.pack_header_into(slot, dst_mac, src_mac, timestamp_us, self.tcis[index] if self.has_vlan[index] else None)
+        slot[encap_length:total] = self.view[offset + header_length:offset + header_length + payload_length]
+        return total
+
+    def get_stats(self):
+        """获取批量分类统计信息"""
+        stats = dict(self.stats)
+        stats['avg_burst'] = self.stats['frames_read'] / self.stats['bursts'] if self.stats['bursts'] else 0.0
+        stats['appid_ranges'] = [f"0x{low:04X}-0x{high:04X}" for low, high in self.appid_ranges]
+        return stats
@@ -0,0 +1,666 @@
+#!/usr/bin/env python3
+"""
+批量UDP收发引擎
+通过ctypes调用recvmmsg/sendmmsg，单次系统调用收发多个多播数据报，
+使用预分配缓冲区；内核或平台不支持时自动回退为逐包recvfrom_into/send。
+可选UDP GSO（UDP_SEGMENT，连续等长的数据报合并为一个超长数据报由内核分段）
+和UDP GRO（UDP_GRO，内核合并的突发数据报按控制消息中的分段长度拆分），不支持时自动回退
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import socket
+import struct
+import time
+
+# Linux socket常量
+MSG_DONTWAIT = 0x40
+SO_ATTACH_FILTER = 26
+SO_BUSY_POLL = 46
+SOL_UDP = 17
+UDP_SEGMENT = 103
+UDP_GRO = 104
+
+# UDP GSO：每次发送最多64个分段，总长度不超过IPv4 UDP最大载荷
+UDP_MAX_SEGMENTS = 64
+UDP_MAX_PAYLOAD = 65507
+# UDP GRO合并后的数据报最长64KB，接收槽位按此分配（否则被截断）
+GRO_BUFFER_SIZE = 65536
+# 发送失败时表示内核或网卡不支持GSO的错误码（回退为逐个数据报发送）
+GSO_UNSUPPORTED_ERRORS = (errno.EIO, errno.EINVAL, errno.ENOPROTOOPT, errno.EOPNOTSUPP)
+
+# 分片键：封装头中源MAC的最后两个字节（UDP套接字过滤器的偏移0为UDP头，载荷从8开始）；
+# 以魔数"GB"开头的数据报按版本字节区分：v2源MAC位于8字节前缀之后，v3源MAC位于偏移18；
+# 聚合包含多个发布者的帧，按桥接实例ID的低16位分片（聚合开启时发送端的全部帧都以聚合包发出）；
+# 字典通告由每个分片接收（各分片进程分别解压本分片的压缩数据报）
+SHARD_KEY_OFFSET = 8 + 4
+SHARD_KEY_OFFSET_V2 = 8 + 8 + 4
+SHARD_KEY_OFFSET_V3 = 8 + 18 + 4
+SHARD_KEY_OFFSET_BUNDLE = 8 + 6
+ENCAP_MAGIC_HALFWORD = 0x4742
+ENCAP_VERSION_OFFSET = 8 + 2
+ENCAP_FLAGS_OFFSET = 8 + 3
+ENCAP_FLAG_BUNDLE = 0x02
+ENCAP_FLAG_DICTIONARY = 0x08
+
+# 经典BPF指令
+BPF_LD_H_ABS = 0x28
+BPF_LD_B_ABS = 0x30
+BPF_ALU_MOD_K = 0x94
+BPF_JMP_JA = 0x05
+BPF_JMP_JEQ_K = 0x15
+BPF_JMP_JSET_K = 0x45
+BPF_RET_K = 0x06
+
+# 直方图分桶数量（按2的幂分桶：0, 1, 2-3, 4-7, ...）
+HISTOGRAM_BUCKETS = 12
+
+
+class iovec(ctypes.Structure):
+    _fields_ = [
+        ('iov_base', ctypes.c_void_p),
+        ('iov_len', ctypes.c_size_t)
+    ]
+
+
+class sockaddr_in(ctypes.Structure):
+    _fields_ = [
+        ('sin_family', ctypes.c_ushort),
+        ('sin_port', ctypes.c_uint16),
+        ('sin_addr', ctypes.c_uint8 * 4),
+        ('sin_zero', ctypes.c_uint8 * 8)
+    ]
+
+
+class msghdr(ctypes.Structure):
+    _fields_ = [
+        ('msg_name', ctypes.c_void_p),
+        ('msg_namelen', ctypes.c_uint32),
+        ('msg_iov', ctypes.POINTER(iovec)),
+        ('msg_iovlen', ctypes.c_size_t),
+        ('msg_control', ctypes.c_void_p),
+        ('msg_controllen', ctypes.c_size_t),
+        ('msg_flags', ctypes.c_int)
+    ]
+
+
+class mmsghdr(ctypes.Structure):
+    _fields_ = [
+        ('msg_hdr', msghdr),
+        ('msg_len', ctypes.c_uint)
+    ]
+
+
+class cmsghdr(ctypes.Structure):
+    _fields_ = [
+        ('cmsg_len', ctypes.c_size_t),
+        ('cmsg_level', ctypes.c_int),
+        ('cmsg_type', ctypes.c_int)
+    ]
+
+
+def _load_libc_function(name):
+    """加载libc中的批量收发函数，不可用时返回None"""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        func = getattr(libc, name)
+    except (OSError, AttributeError):
+        return None
+    func.restype = ctypes.c_int
+    return func
+
+
+_recvmmsg = _load_libc_function('recvmmsg')
+if _recvmmsg is not None:
+    _recvmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(mmsghdr), ctypes.c_uint,
+                          ctypes.c_int, ctypes.c_void_p]
+
+_sendmmsg = _load_libc_function('sendmmsg')
+if _sendmmsg is not None:
+    _sendmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(mmsghdr), ctypes.c_uint, ctypes.c_int]
+
+
+def create_connected_multicast_socket(multicast_ip, multicast_port, ttl=10, sndbuf=1024*1024, loop=True):
+    """创建已connect到多播组的发送套接字（发送时无需每次传入目标地址）
+
+    loop为False时设置IP_MULTICAST_LOOP=0，内核不再把发出的数据报回送给本机的接收套接字
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, sndbuf)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1 if loop else 0)
+        sock.connect((multicast_ip, multicast_port))
+    except Exception:
+        sock.close()
+        raise
+    return sock
+
+
+def supports_udp_segment(sock):
+    """内核支持UDP GSO（UDP_SEGMENT，Linux 4.18+）时返回True"""
+    try:
+        sock.getsockopt(SOL_UDP, UDP_SEGMENT)
+    except OSError:
+        return False
+    return True
+
+
+def enable_udp_gro(sock):
+    """开启UDP GRO（Linux 5.0+），不支持时返回False"""
+    try:
+        sock.setsockopt(SOL_UDP, UDP_GRO, 1)
+    except OSError:
+        return False
+    return True
+
+
+def enable_busy_poll(sock, busy_poll_us):
+    """设置SO_BUSY_POLL：阻塞接收时在网卡队列上忙轮询busy_poll_us微秒（提高到系统默认值以上需要CAP_NET_ADMIN）"""
+    sock.setsockopt(socket.SOL_SOCKET, SO_BUSY_POLL, busy_poll_us)
+
+
+def attach_socket_filter(sock, program):
+    """为套接字附加经典BPF过滤器，program为 [(code, jt, jf, k)]"""
+    instructions = ctypes.create_string_buffer(
+        b''.join(struct.pack('HBBI', *instruction) for instruction in program))
+    fprog = struct.pack('HL', len(program), ctypes.addressof(instructions))
+    sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, fprog)
+
+
+def attach_shard_filter(sock, shard_index, shard_count):
+    """只接收源MAC哈希落在本分片的数据报（同一发布者总是落在同一分片，保持帧顺序）"""
+    attach_socket_filter(sock, [
+        (BPF_LD_H_ABS, 0, 0, 8),
+        (BPF_JMP_JEQ_K, 0, 11, ENCAP_MAGIC_HALFWORD),
+        (BPF_LD_B_ABS, 0, 0, ENCAP_VERSION_OFFSET),
+        (BPF_JMP_JEQ_K, 0, 7, 3),
+        (BPF_LD_B_ABS, 0, 0, ENCAP_FLAGS_OFFSET),
+        (BPF_JMP_JSET_K, 10, 0, ENCAP_FLAG_DICTIONARY),
+        (BPF_JMP_JSET_K, 2, 0, ENCAP_FLAG_BUNDLE),
+        (BPF_LD_H_ABS, 0, 0, SHARD_KEY_OFFSET_V3),
+        (BPF_JMP_JA, 0, 0, 5),
+        (BPF_LD_H_ABS, 0, 0, SHARD_KEY_OFFSET_BUNDLE),
+        (BPF_JMP_JA, 0, 0, 3),
+        (BPF_LD_H_ABS, 0, 0, SHARD_KEY_OFFSET_V2),
+        (BPF_JMP_JA, 0, 0, 1),
+        (BPF_LD_H_ABS, 0, 0, SHARD_KEY_OFFSET),
+        (BPF_ALU_MOD_K, 0, 0, shard_count),
+        (BPF_JMP_JEQ_K, 0, 1, shard_index),
+        (BPF_RET_K, 0, 0, 0xFFFFFFFF),
+        (BPF_RET_K, 0, 0, 0)
+    ])
+
+
+def attach_drop_filter(sock):
+    """丢弃所有数据报（分片模式下父进程保留的套接字不再接收）"""
+    attach_socket_filter(sock, [(BPF_RET_K, 0, 0, 0)])
+
+
+def create_sharded_multicast_socket(multicast_ip, multicast_port, shard_index, shard_count,
+                                    rcvbuf=1024*1024):
+    """创建SO_REUSEPORT多播接收套接字并附加分片过滤器
+
+    多播数据报会复制给绑定同一端口的每个套接字（SO_REUSEPORT只对单播做负载均衡），
+    因此由每个分片套接字上的BPF过滤器决定归属
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        # 先附加过滤器再加入多播组，避免加入后收到不属于本分片的数据报
+        attach_shard_filter(sock, shard_index, shard_count)
+        sock.bind(('', multicast_port))
+        mreq = struct.pack('4sl', socket.inet_aton(multicast_ip), socket.INADDR_ANY)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+        sock.setblocking(False)
+    except Exception:
+        sock.close()
+        raise
+    return sock
+
+
+class BatchHistogram:
+    """每次唤醒批量大小直方图"""
+
+    def __init__(self):
+        self.buckets = [0] * HISTOGRAM_BUCKETS
+        self.wakeups = 0
+        self.datagrams = 0
+        self.syscalls = 0
+
+    def record(self, count, syscalls=1):
+        """记录一次唤醒收取的数据报数量及消耗的系统调用次数"""
+        self.wakeups += 1
+        self.datagrams += count
+        self.syscalls += syscalls
+        self.buckets[min(count.bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+
+    def to_dict(self):
+        """导出直方图（键为批量大小区间）"""
+        histogram = {'0': self.buckets[0], '1': self.buckets[1]}
+        for index in range(2, HISTOGRAM_BUCKETS):
+            lower = 1 << (index - 1)
+            label = f"{lower}-{(lower << 1) - 1}" if index < HISTOGRAM_BUCKETS - 1 else f"{lower}+"
+            histogram[label] = self.buckets[index]
+        return {
+            'wakeups': self.wakeups,
+            'datagrams': self.datagrams,
+            'syscalls': self.syscalls,
+            'avg_batch': self.datagrams / self.wakeups if self.wakeups else 0,
+            'datagrams_per_syscall': self.datagrams / self.syscalls if self.syscalls else 0,
+            'histogram': histogram
+        }
+
+
+class BatchReceiver:
+    """批量多播接收器（recvmmsg + 预分配缓冲区，可选UDP GRO）"""
+
+    def __init__(self, sock, batch_size=64, buffer_size=2048, use_recvmmsg=True, use_gro=False):
+        self.sock = sock
+        self.fd = sock.fileno()
+        self.batch_size = max(1, batch_size)
+        self.use_recvmmsg = use_recvmmsg and _recvmmsg is not None
+        # GRO的分段长度在控制消息中，只能由recvmmsg读取；合并后的数据报需要64KB槽位
+        self.use_gro = use_gro and self.use_recvmmsg and enable_udp_gro(sock)
+        if self.use_gro:
+            buffer_size = max(buffer_size, GRO_BUFFER_SIZE)
+        self.buffer_size = buffer_size
+
+        # 预分配连续缓冲区，每个数据报占用一个固定槽位
+        self.buffer = bytearray(self.batch_size * self.buffer_size)
+        self.view = memoryview(self.buffer)
+        self.slots = [self.view[i * buffer_size:(i + 1) * buffer_size]
+                      for i in range(self.batch_size)]
+        self.lengths = [0] * self.batch_size
+        self.senders = [None] * self.batch_size
+
+        # GRO拆分后的数据报及其所在槽位（发送方地址按槽位查找）
+        self.segments = []
+        self.segment_slots = []
+        self.gro_stats = {'gro_datagrams': 0, 'gro_segments': 0}
+
+        self.histogram = BatchHistogram()
+        self.last_syscalls = 0
+        self.last_messages = 0
+
+        if self.use_recvmmsg:
+            self._setup_mmsghdr()
+
+    def _setup_mmsghdr(self):
+        """初始化mmsghdr/iovec/sockaddr数组（只在创建时执行一次）"""
+        # 持有导出对象，保证缓冲区在生命周期内不会被移动
+        self._buffer_ref = ctypes.c_char.from_buffer(self.buffer)
+        base = ctypes.addressof(self._buffer_ref)
+        self._iovecs = (iovec * self.batch_size)()
+        self._addrs = (sockaddr_in * self.batch_size)()
+        self._msgs = (mmsghdr * self.batch_size)()
+        self._addr_size = ctypes.sizeof(sockaddr_in)
+        if self.use_gro:
+            # 每个消息一个控制消息缓冲区，接收UDP_GRO分段长度（int）
+            self._control_size = socket.CMSG_SPACE(4)
+            self._controls = (ctypes.c_char * (self._control_size * self.batch_size))()
+            control_base = ctypes.addressof(self._controls)
+
+        for i in range(self.batch_size):
+            self._iovecs[i].iov_base = base + i * self.buffer_size
+            self._iovecs[i].iov_len = self.buffer_size
+            hdr = self._msgs[i].msg_hdr
+            hdr.msg_name = ctypes.addressof(self._addrs[i])
+            hdr.msg_namelen = self._addr_size
+            hdr.msg_iov = ctypes.pointer(self._iovecs[i])
+            hdr.msg_iovlen = 1
+            if self.use_gro:
+                hdr.msg_control = control_base + i * self._control_size
+                hdr.msg_controllen = self._control_size
+
+    def recv_batch(self):
+        """单次系统调用收取一批数据报，返回数量（无数据时返回0）"""
+        if self.use_recvmmsg:
+            return self._recv_mmsg()
+        return self._recv_fallback()
+
+    def _recv_mmsg(self):
+        self.last_syscalls = 1
+        self.last_messages = 0
+        count = _recvmmsg(self.fd, self._msgs, self.batch_size, MSG_DONTWAIT, None)
+        if count < 0:
+            err = ctypes.get_errno()
+            if err in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                return 0
+            raise OSError(err, f"recvmmsg失败: {errno.errorcode.get(err, err)}")
+
+        msgs = self._msgs
+        for i in range(count):
+            self.lengths[i] = msgs[i].msg_len
+            self.senders[i] = None
+            # 内核会改写namelen，下次调用前复位
+            msgs[i].msg_hdr.msg_namelen = self._addr_size
+        self.last_messages = count
+        if self.use_gro:
+            return self._split_gro(count)
+        return count
+
+    def _split_gro(self, count):
+        """按UDP_GRO控制消息中的分段长度拆分内核合并的数据报，返回拆分后的数据报数量"""
+        segments = self.segments
+        segment_slots = self.segment_slots
+        segments.clear()
+        segment_slots.clear()
+        header_size = ctypes.sizeof(cmsghdr)
+        for i in range(count):
+            hdr = self._msgs[i].msg_hdr
+            size = 0
+            if hdr.msg_controllen >= socket.CMSG_LEN(4):
+                cmsg = cmsghdr.from_address(hdr.msg_control)
+                if cmsg.cmsg_level == SOL_UDP and cmsg.cmsg_type == UDP_GRO:
+                    size = ctypes.c_int.from_address(hdr.msg_control + header_size).value
+            # 内核会改写controllen，下次调用前复位
+            hdr.msg_controllen = self._control_size
+
+            slot = self.slots[i]
+            length = self.lengths[i]
+            if 0 < size < length:
+                self.gro_stats['gro_datagrams'] += 1
+                for offset in range(0, length, size):
+                    segments.append(slot[offset:min(offset + size, length)])
+                    segment_slots.append(i)
+                    self.gro_stats['gro_segments'] += 1
+            else:
+                segments.append(slot[:length])
+                segment_slots.append(i)
+        return len(segments)
+
+    def _recv_fallback(self):
+        count = 0
+        self.last_syscalls = 0
+        while count < self.batch_size:
+            self.last_syscalls += 1
+            try:
+                length, sender = self.sock.recvfrom_into(self.slots[count], self.buffer_size)
+            except (BlockingIOError, InterruptedError):
+                break
+            self.lengths[count] = length
+            self.senders[count] = sender
+            count += 1
+        self.last_messages = count
+        return count
+
+    def packet(self, index):
+        """返回第index个数据报（指向预分配缓冲区的memoryview，下次接收前有效）"""
+        if self.use_gro:
+            return self.segments[index]
+        return self.slots[index][:self.lengths[index]]
+
+    def sender(self, index):
+        """返回第index个数据报的发送方地址 (ip, port)"""
+        if self.use_gro:
+            index = self.segment_slots[index]
+        sender = self.senders[index]
+        if sender is None:
+            addr = self._addrs[index]
+            sender = (socket.inet_ntoa(bytes(addr.sin_addr)), socket.ntohs(addr.sin_port))
+            self.senders[index] = sender
+        return sender
+
+    def drain(self, handler, running=lambda: True):
+        """一次唤醒内持续收取直到EAGAIN，逐包回调handler(data, sender)，返回总包数"""
+        total = 0
+        syscalls = 0
+        while running():
+            count = self.recv_batch()
+            syscalls += self.last_syscalls
+            for i in range(count):
+                handler(self.packet(i), self.sender(i))
+            total += count
+            # GRO时一个消息可拆出多个数据报，按消息数判断是否已读空
+            if self.last_messages < self.batch_size:
+                break
+        self.histogram.record(total, syscalls)
+        return total
+
+    def get_stats(self):
+        """获取批量接收统计信息"""
+        stats = self.histogram.to_dict()
+        stats['mode'] = 'recvmmsg' if self.use_recvmmsg else 'recvfrom_into'
+        if self.use_gro:
+            stats['mode'] += '+gro'
+            stats.update(self.gro_stats)
+        stats['batch_size'] = self.batch_size
+        return stats
+
+
+class BatchSender:
+    """批量多播发送器（sendmmsg + 已连接套接字 + 最大保持时间，可选UDP GSO）"""
+
+    def __init__(self, sock, batch_size=64, buffer_size=2048, max_hold_us=50, use_sendmmsg=True, use_gso=False):
+        self.sock = sock
+        self.fd = sock.fileno()
+        self.batch_size = max(1, batch_size)
+        self.buffer_size = buffer_size
+        self.max_hold_ns = max(0, max_hold_us) * 1000
+        self.use_sendmmsg = use_sendmmsg and _sendmmsg is not None
+        # GSO的分段长度通过sendmmsg的控制消息逐个消息指定
+        self.use_gso = use_gso and self.use_sendmmsg and supports_udp_segment(sock)
+
+        # 预分配发送槽位
+        self.buffer = bytearray(self.batch_size * self.buffer_size)
+        self.view = memoryview(self.buffer)
+        self.slots = [self.view[i * buffer_size:(i + 1) * buffer_size]
+                      for i in range(self.batch_size)]
+        self.lengths = [0] * self.batch_size
+        self.pending = 0
+        self.first_queued_ns = 0
+
+        self.histogram = BatchHistogram()
+        self.stats = {
+            'flush_on_batch_end': 0,
+            'flush_on_full': 0,
+            'flush_on_hold': 0,
+            'send_errors': 0
+        }
+        if self.use_gso:
+            self.stats.update({'gso_sends': 0, 'gso_segments': 0, 'gso_fallbacks': 0})
+
+        if self.use_sendmmsg:
+            self._setup_mmsghdr()
+        if self.use_gso:
+            self._setup_gso()
+
+    def _setup_mmsghdr(self):
+        """初始化mmsghdr/iovec数组（已连接套接字无需msg_name）"""
+        self._buffer_ref = ctypes.c_char.from_buffer(self.buffer)
+        base = ctypes.addressof(self._buffer_ref)
+        self._iovecs = (iovec * self.batch_size)()
+        self._msgs = (mmsghdr * self.batch_size)()
+
+        for i in range(self.batch_size):
+            self._iovecs[i].iov_base = base + i * self.buffer_size
+            hdr = self._msgs[i].msg_hdr
+            hdr.msg_iov = ctypes.pointer(self._iovecs[i])
+            hdr.msg_iovlen = 1
+
+    def _setup_gso(self):
+        """初始化GSO消息数组：每个消息指向连续的若干iovec（每个iovec为一个分段），控制消息给出分段长度"""
+        self._iov_pointers = [ctypes.pointer(self._iovecs[i]) for i in range(self.batch_size)]
+        self._gso_msgs = (mmsghdr * self.batch_size)()
+        self._gso_runs = [0] * self.batch_size
+        self._control_size = socket.CMSG_SPACE(2)
+        self._controls = (ctypes.c_char * (self._control_size * self.batch_size))()
+        base = ctypes.addressof(self._controls)
+        header_size = ctypes.sizeof(cmsghdr)
+        self._control_addresses = []
+        self._segment_sizes = []
+        for i in range(self.batch_size):
+            address = base + i * self._control_size
+            cmsg = cmsghdr.from_address(address)
+            cmsg.cmsg_len = socket.CMSG_LEN(2)
+            cmsg.cmsg_level = SOL_UDP
+            cmsg.cmsg_type = UDP_SEGMENT
+            self._control_addresses.append(address)
+            self._segment_sizes.append(ctypes.c_uint16.from_address(address + header_size))
+
+    def add(self, packet):
+        """加入一个待发送数据报，返回本次调用触发flush时发送的数量"""
+        length = len(packet)
+        if length > self.buffer_size:
+            raise ValueError(f"数据报长度 {length} 超过发送槽位 {self.buffer_size}")
+
+        self.slots[self.pending][:length] = packet
+        return self.commit(length)
+
+    def reserve(self):
+        """返回下一个空闲槽位（memoryview），调用方直接写入数据报后调用commit()"""
+        return self.slots[self.pending]
+
+    def commit(self, length):
+        """提交reserve()槽位中长度为length的数据报，返回本次调用触发flush时发送的数量"""
+        index = self.pending
+        self.lengths[index] = length
+        self.pending = index + 1
+
+        if index == 0:
+            self.first_queued_ns = time.monotonic_ns()
+            if self.max_hold_ns == 0:
+                self.stats['flush_on_hold'] += 1
+                return self.flush()
+        elif time.monotonic_ns() - self.first_queued_ns >= self.max_hold_ns:
+            # 最早入队的帧已达到最大保持时间，立即发送
+            self.stats['flush_on_hold'] += 1
+            return self.flush()
+
+        if self.pending >= self.batch_size:
+            self.stats['flush_on_full'] += 1
+            return self.flush()
+        return 0
+
+    def flush_batch_end(self):
+        """TAP批量读取结束时发送所有待发数据报"""
+        if not self.pending:
+            return 0
+        self.stats['flush_on_batch_end'] += 1
+        return self.flush()
+
+    def flush(self):
+        """单次sendmmsg发送全部待发数据报，返回成功发送数量"""
+        count = self.pending
+        if not count:
+            return 0
+        self.pending = 0
+
+        if self.use_gso:
+            sent, syscalls = self._send_gso(count)
+        elif self.use_sendmmsg:
+            sent, syscalls = self._send_mmsg(count)
+        else:
+            sent, syscalls = self._send_fallback(count)
+        self.histogram.record(sent, syscalls)
+
+        if sent < count:
+            self.stats['send_errors'] += count - sent
+        return sent
+
+    def _send_mmsg(self, count, sent=0):
+        for i in range(sent, count):
+            self._iovecs[i].iov_len = self.lengths[i]
+
+        syscalls = 0
+        while sent < count:
+            syscalls += 1
+            result = _sendmmsg(self.fd, ctypes.byref(self._msgs[sent]), count - sent, 0)
+            if result < 0:
+                err = ctypes.get_errno()
+                if err == errno.EINTR:
+                    continue
+                # 剩余数据报丢弃，由调用方记录错误
+                break
+            sent += result
+        return sent, syscalls
+
+    def _send_gso(self, count):
+        """连续等长的数据报（最后一个可以更短）合并为一个GSO消息，单次sendmmsg发送全部消息
+
+        内核或出口网卡不支持GSO时关闭GSO，本批剩余的数据报逐个消息发送
+        """
+        lengths = self.lengths
+        runs = self._gso_runs
+        messages = 0
+        index = 0
+        while index < count:
+            size = lengths[index]
+            self._iovecs[index].iov_len = size
+            end = index + 1
+            total = size
+            while end < count and end - index < UDP_MAX_SEGMENTS:
+                length = lengths[end]
+                if length > size or total + length > UDP_MAX_PAYLOAD:
+                    break
+                self._iovecs[end].iov_len = length
+                total += length
+                end += 1
+                if length < size:
+                    # 只有最后一个分段可以短于分段长度
+                    break
+
+            hdr = self._gso_msgs[messages].msg_hdr
+            hdr.msg_iov = self._iov_pointers[index]
+            hdr.msg_iovlen = end - index
+            if end - index > 1:
+                self._segment_sizes[messages].value = size
+                hdr.msg_control = self._control_addresses[messages]
+                hdr.msg_controllen = self._control_size
+            else:
+                hdr.msg_control = None
+                hdr.msg_controllen = 0
+            runs[messages] = end - index
+            messages += 1
+            index = end
+
+        sent = 0
+        done = 0
+        syscalls = 0
+        while done < messages:
+            syscalls += 1
+            result = _sendmmsg(self.fd, ctypes.byref(self._gso_msgs[done]), messages - done, 0)
+            if result < 0:
+                err = ctypes.get_errno()
+                if err == errno.EINTR:
+                    continue
+                if err in GSO_UNSUPPORTED_ERRORS and runs[done] > 1:
+                    self.use_gso = False
+                    self.stats['gso_fallbacks'] += 1
+                    sent, more = self._send_mmsg(count, sent)
+                    return sent, syscalls + more
+                # 剩余数据报丢弃，由调用方记录错误
+                break
+            for message in range(done, done + result):
+                if runs[message] > 1:
+                    self.stats['gso_sends'] += 1
+                    self.stats['gso_segments'] += runs[message]
+                sent += runs[message]
+            done += result
+        return sent, syscalls
+
+    def _send_fallback(self, count):
+        sent = 0
+        for i in range(count):
+            try:
+                self.sock.send(self.slots[i][:self.lengths[i]])
+                sent += 1
+            except OSError:
+                pass
+        return sent, count
+
+    def get_stats(self):
+        """获取批量发送统计信息"""
+        stats = self.histogram.to_dict()
+        stats['flushes'] = stats.pop('wakeups')
+        stats.update(self.stats)
+        stats['mode'] = 'sendmmsg' if self.use_sendmmsg else 'send'
+        if self.use_gso:
+            stats['mode'] += '+gso'
+        stats['batch_size'] = self.batch_size
+        stats['max_hold_us'] = self.max_hold_ns // 1000
+        return stats
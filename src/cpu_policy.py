@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+数据面CPU策略
+数据面线程（TAP读取、多播接收、epoll反应器、流水线线程）按顺序各绑定dataplane_cpus中的一个CPU
+（未配置dataplane_cpus时恢复为启动时的CPU集合去掉housekeeping_cpus，不继承主线程的后台CPU），
+可选SCHED_FIFO实时优先级；统计导出、健康检查、IGMP保活等后台线程（及其启动的aws子进程）
+绑定到housekeeping_cpus，避免抢占数据面。生效的策略按线程/进程ID实时读取后导出到统计
+"""
+
+import os
+import threading
+
+from queue_workers import parse_cpu_list
+
+SCHED_POLICY_NAMES = {
+    getattr(os, name): name for name in ('SCHED_OTHER', 'SCHED_FIFO', 'SCHED_RR', 'SCHED_BATCH', 'SCHED_IDLE')
+    if hasattr(os, name)
+}
+
+
+def describe_policy(task_id=0):
+    """读取线程/进程（task_id为原生线程ID或PID，0为当前线程）的CPU亲和性和调度策略"""
+    try:
+        policy = os.sched_getscheduler(task_id)
+        return {
+            'cpus': sorted(os.sched_getaffinity(task_id)),
+            'policy': SCHED_POLICY_NAMES.get(policy, str(policy)),
+            'priority': os.sched_getparam(task_id).sched_priority,
+            'alive': True
+        }
+    except OSError:
+        return {'alive': False}
+
+
+class CPUPolicy:
+    """数据面/后台线程的CPU亲和性与实时调度策略"""
+
+    def __init__(self, config, logger):
+        self.logger = logger
+        self.dataplane_cpus = parse_cpu_list(config.get('dataplane_cpus', ''))
+        self.housekeeping_cpus = parse_cpu_list(config.get('housekeeping_cpus', ''))
+        self.rt_priority = config.getint('dataplane_rt_priority', 0)
+        # 启动时的CPU集合：主线程随后绑定到后台CPU，由它创建的数据面线程会继承该亲和性
+        self.original_cpus = os.sched_getaffinity(0)
+        self.shared_dataplane_cpus = (self.original_cpus - set(self.housekeeping_cpus)) or self.original_cpus
+        self.next_cpu = 0
+        self.lock = threading.Lock()
+        # 名称 -> (线程ID或PID, 角色)
+        self.tasks = {}
+
+    def enabled(self):
+        return bool(self.dataplane_cpus or self.housekeeping_cpus or self.rt_priority > 0)
+
+    def apply(self, name, role='dataplane', pin=True):
+        """在当前线程中应用策略（必须由目标线程自身调用）；role为dataplane或housekeeping"""
+        cpus = None
+        if pin and role == 'dataplane' and self.dataplane_cpus:
+            with self.lock:
+                cpus = {self.dataplane_cpus[self.next_cpu % len(self.dataplane_cpus)]}
+                self.next_cpu += 1
+        elif pin and role == 'dataplane' and self.housekeeping_cpus:
+            cpus = self.shared_dataplane_cpus
+        elif pin and role == 'housekeeping' and self.housekeeping_cpus:
+            cpus = set(self.housekeeping_cpus)
+
+        if cpus:
+            try:
+                os.sched_setaffinity(0, cpus)
+            except OSError as e:
+                self.logger.warning(f"{name} 绑定CPU {sorted(cpus)} 失败: {e}")
+
+        if role == 'dataplane' and self.rt_priority > 0:
+            try:
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.rt_priority))
+            except (OSError, AttributeError) as e:
+                self.logger.warning(f"{name} 设置SCHED_FIFO优先级 {self.rt_priority} 失败"
+                                    f"（需要CAP_SYS_NICE或RLIMIT_RTPRIO）: {e}")
+
+        self.track(name, threading.get_native_id(), role)
+        if self.enabled():
+            effective = describe_policy()
+            self.logger.info(f"🎯 {name} CPU策略: CPU {effective['cpus']}, "
+                             f"{effective['policy']} 优先级 {effective['priority']}")
+
+    def track(self, name, task_id, role):
+        """登记需要在统计中报告生效策略的线程或进程"""
+        with self.lock:
+            self.tasks[name] = (task_id, role)
+
+    def get_stats(self):
+        """导出配置和每个线程/进程当前生效的策略"""
+        with self.lock:
+            tasks = dict(self.tasks)
+        effective = {}
+        for name, (task_id, role) in tasks.items():
+            entry = describe_policy(task_id)
+            entry['role'] = role
+            entry['tid'] = task_id
+            effective[name] = entry
+        return {
+            'dataplane_cpus': self.dataplane_cpus,
+            'housekeeping_cpus': self.housekeeping_cpus,
+            'rt_priority': self.rt_priority,
+            'tasks': effective
+        }
@@ -10,6 +10,7 @@ import threading
 import time
 import json
 import subprocess
+import asyncio
 from datetime import datetime
 
 class DualIGMPKeepaliveManager:
@@ -58,20 +59,20 @@ class DualIGMPKeepaliveManager:
         # 运行状态
         self.running = False
     
-    def start(self):
-        """启动双路径IGMP保活"""
+    def start(self, threaded=True):
+        """启动双路径IGMP保活（threaded=False时由run_async协程驱动）"""
         try:
             self.running = True
             
             # 启动主路径保活
-            primary_success = self.primary_keepalive.start()
+            primary_success = self.primary_keepalive.start(threaded)
             if primary_success:
                 self.logger.info("🔄 主路径IGMP保活启动成功")
             else:
                 self.logger.error("❌ 主路径IGMP保活启动失败")
             
             # 启动备路径保活
-            backup_success = self.backup_keepalive.start()
+            backup_success = self.backup_keepalive.start(threaded)
             if backup_success:
                 self.logger.info("🔄 备路径IGMP保活启动成功")
             else:
@@ -102,6 +103,13 @@ class DualIGMPKeepaliveManager:
         
         self.logger.info("✅ 双路径IGMP保活管理器已停止")
     
+    async def run_async(self):
+        """asyncio模式下双路径保活协程"""
+        await asyncio.gather(
+            self.primary_keepalive.run_async(),
+            self.backup_keepalive.run_async()
+        )
+    
     def get_stats(self):
         """获取双路径统计信息"""
         return {
@@ -147,8 +155,8 @@ class SingleIGMPKeepalive:
         self.consecutive_missing = 0
         self.last_tgw_check_success = True
     
-    def start(self):
-        """启动单路径IGMP保活"""
+    def start(self, threaded=True):
+        """启动单路径IGMP保活（threaded=False时由run_async协程驱动）"""
         if self.running:
             return True
         
@@ -164,15 +172,16 @@ class SingleIGMPKeepalive:
             self.running = True
             
             # 启动保活线程
-            self.keepalive_thread = threading.Thread(
-                target=self._keepalive_worker, 
-                name=f"IGMP-Keepalive-{self.name}",
-                daemon=True
-            )
-            self.keepalive_thread.start()
+            if threaded:
+                self.keepalive_thread = threading.Thread(
+                    target=self._keepalive_worker, 
+                    name=f"IGMP-Keepalive-{self.name}",
+                    daemon=True
+                )
+                self.keepalive_thread.start()
             
             # 启动监控线程
-            if self.enable_tgw_monitoring:
+            if threaded and self.enable_tgw_monitoring:
                 self.monitor_thread = threading.Thread(
                     target=self._monitor_worker,
                     name=f"IGMP-Monitor-{self.name}",
@@ -256,6 +265,49 @@ class SingleIGMPKeepalive:
         
         self.logger.info(f"{self.name}路径IGMP监控线程结束")
     
+    async def run_async(self):
+        """asyncio模式下的保活与监控协程（替代保活/监控线程）"""
+        self.logger.info(f"🔄 {self.name}路径IGMP保活协程启动")
+        loop = asyncio.get_running_loop()
+        next_keepalive = loop.time()
+        next_monitor = loop.time() + self.monitor_interval
+        
+        while self.running:
+            now = loop.time()
+            try:
+                if now >= next_keepalive:
+                    await self._perform_keepalive_async()
+                    next_keepalive = now + self.keepalive_interval
+                
+                if self.enable_tgw_monitoring and now >= next_monitor:
+                    # aws CLI查询为阻塞子进程，放到线程池执行
+                    await loop.run_in_executor(None, self._perform_monitoring)
+                    next_monitor = now + self.monitor_interval
+            except Exception as e:
+                self.logger.error(f"{self.name}路径IGMP保活协程错误: {e}")
+            
+            await asyncio.sleep(1)
+        
+        self.logger.info(f"{self.name}路径IGMP保活协程结束")
+    
+    async def _perform_keepalive_async(self):
+        """执行IGMP保活操作（不阻塞事件循环）"""
+        try:
+            mreq = struct.pack('4sl', socket.inet_aton(self.multicast_ip), socket.INADDR_ANY)
+            
+            # 先离开再加入 (刷新IGMP注册)
+            self.keepalive_sock.setsockopt(socket.IPPROTO_IP, socket.IP_DROP_MEMBERSHIP, mreq)
+            await asyncio.sleep(0.1)
+            self.keepalive_sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+            
+            self.stats['keepalive_count'] += 1
+            self.stats['last_keepalive'] = datetime.now()
+            
+            self.logger.debug(f"{self.name}路径IGMP保活完成: {self.multicast_ip} (第{self.stats['keepalive_count']}次)")
+            
+        except Exception as e:
+            self.logger.warning(f"{self.name}路径IGMP保活失败: {e}")
+    
     def _perform_keepalive(self):
         """执行IGMP保活操作"""
         try:
@@ -12,11 +12,35 @@ import threading
 import time
 import logging
 
+from batch_io import (BatchReceiver, BatchSender, attach_drop_filter, enable_busy_poll,
+                      create_connected_multicast_socket, create_sharded_multicast_socket)
+from event_reactor import EpollReactor, BusyPoller
+from queue_workers import WorkerProcessPool, parse_cpu_list
+from frame_buffers import ENCAP_EXPAND, EncapCodec, FrameBufferPool, FrameInjector, HeaderCache, generate_bridge_id
+from frame_aggregator import FrameAggregator
+from frame_compressor import FrameCompressor, load_dictionary
+from frame_delta import FrameDeltaEncoder
+from frame_suppressor import RetransmissionSuppressor
+from cpu_policy import CPUPolicy
+from batch_classifier import BatchClassifier, HAS_NUMPY, parse_appid_ranges, parse_mac_range
+
 # 协议常量
 GOOSE_ETHERTYPE = 0x88B8
 VLAN_ETHERTYPE = 0x8100
 GOOSE_MULTICAST_MAC = bytes.fromhex('01:0C:CD:01:00:01'.replace(':', ''))
 
+# 多队列TAP工作进程汇总到父进程的计数器
+QUEUE_WORKER_COUNTERS = ('goose_received', 'vlan_goose_received', 'goose_to_ip',
+                         'bundles_sent', 'bundled_frames', 'bundle_bytes', 'compressed_datagrams',
+                         'compression_skipped', 'compression_bytes_in', 'compression_bytes_out',
+                         'compression_ns', 'delta_frames', 'delta_references_sent', 'delta_bytes_in',
+                         'delta_bytes_out', 'suppressed_frames', 'suppressed_bytes', 'errors')
+# 多播分片工作进程汇总到父进程的计数器
+SHARD_WORKER_COUNTERS = ('ip_to_goose', 'loopback_dropped', 'sequence_lost', 'sequence_reordered',
+                         'encap_invalid', 'bundles_received', 'compressed_received',
+                         'compression_dict_missing', 'dictionaries_received', 'delta_received',
+                         'delta_reference_missing', 'errors')
+
 class DualPathProcessor:
     """双路径数据处理器"""
     
@@ -29,6 +53,103 @@ class DualPathProcessor:
         # 性能配置
         self.buffer_size = config.getint('buffer_size', 2048)
         self.batch_size = config.getint('batch_size', 10)
+        self.recv_batch_size = config.getint('recv_batch_size', 64)
+        self.enable_recvmmsg = config.getboolean('enable_recvmmsg', True)
+        self.send_batch_size = config.getint('send_batch_size', 64)
+        self.send_max_hold_us = config.getint('send_max_hold_us', 50)
+        self.enable_sendmmsg = config.getboolean('enable_sendmmsg', True)
+        self.enable_udp_gso = config.getboolean('enable_udp_gso', False)
+        self.enable_udp_gro = config.getboolean('enable_udp_gro', False)
+        self.enable_zero_copy_rx = config.getboolean('enable_zero_copy_rx', True)
+        self.enable_writev_inject = config.getboolean('enable_writev_inject', True)
+        self.io_mode = config.get('io_mode', 'select')
+        self.reactor = None
+        self.latency_mode = config.get('latency_mode', 'normal')
+        self.busy_poll_budget_us = config.getint('busy_poll_budget_us', 200)
+        self.so_busy_poll_us = config.getint('so_busy_poll_us', 50)
+        self.busy_pollers = {}
+        self.queue_worker_cpus = parse_cpu_list(config.get('queue_worker_cpus', ''))
+        self.tap_workers = None
+        self.multicast_shards = config.getint('multicast_shards', 1)
+        self.shard_worker_cpus = parse_cpu_list(config.get('shard_worker_cpus', ''))
+        self.shard_workers = None
+        self.cpu_policy = CPUPolicy(config, logger)
+        # 桥接实例ID（两条路径共用）：接收时一次整数比较丢弃本实例发出的数据报
+        self.bridge_id = generate_bridge_id(config.get('bridge_id', ''))
+        self.encap_version = config.getint('encap_version', 3)
+        # 帧聚合：多个GOOSE帧打包进一个多播数据报（需要v3封装头）
+        self.enable_aggregation = config.getboolean('enable_aggregation', False)
+        if self.enable_aggregation and self.encap_version == 1:
+            self.logger.warning("帧聚合需要encap_version=3，已禁用")
+            self.enable_aggregation = False
+        self.aggregate_max_bytes = min(config.getint('aggregate_max_bytes', 1400), self.buffer_size)
+        self.aggregate_max_delay_us = config.getint('aggregate_max_delay_us', 500)
+        # 载荷压缩：zlib预置字典（需要v3封装头），配置了字典文件时两条路径的接收端都加载
+        self.enable_compression = config.getboolean('enable_compression', False)
+        if self.enable_compression and self.encap_version == 1:
+            self.logger.warning("载荷压缩需要encap_version=3，已禁用")
+            self.enable_compression = False
+        self.compression_level = config.getint('compression_level', 6)
+        self.compression_dictionary_size = config.getint('compression_dictionary_size', 4096)
+        self.compression_learn_frames = config.getint('compression_learn_frames', 1000)
+        self.compression_announce_interval = config.getfloat('compression_announce_interval', 0.2)
+        self.compression_dictionary = None
+        dictionary_path = config.get('compression_dictionary', '')
+        if dictionary_path:
+            try:
+                self.compression_dictionary = load_dictionary(dictionary_path)
+            except (OSError, ValueError) as e:
+                self.logger.error(f"加载压缩字典失败，已禁用压缩: {e}")
+                self.enable_compression = False
+        # 重传增量编码：stNum变化时发送完整参考帧，重传只发送t和sqNum（需要v3封装头）
+        self.enable_delta_encoding = config.getboolean('enable_delta_encoding', False)
+        if self.enable_delta_encoding and self.encap_version == 1:
+            self.logger.warning("增量编码需要encap_version=3，已禁用")
+            self.enable_delta_encoding = False
+        self.delta_refresh_frames = config.getint('delta_refresh_frames', 8)
+        # 重传抑制：稳态重传按timeAllowedtoLive的一部分稀疏转发
+        self.enable_suppression = config.getboolean('enable_suppression', False)
+        self.suppression_fast_retransmissions = config.getint('suppression_fast_retransmissions', 3)
+        self.suppression_tal_fraction = config.getfloat('suppression_tal_fraction', 0.5)
+        if not 0 < self.suppression_tal_fraction < 1:
+            self.logger.warning(f"suppression_tal_fraction必须在0和1之间 ({self.suppression_tal_fraction})，使用0.5")
+            self.suppression_tal_fraction = 0.5
+        self.multicast_loop = config.getboolean('multicast_loop', False)
+        
+        # 批量接收器/发送器（每条路径一个）
+        self.receivers = {}
+        self.senders = {}
+        
+        # 零拷贝TAP读取缓冲池（每条路径一个）
+        self.frame_pools = {}
+        if self.enable_zero_copy_rx:
+            for path_name in ('primary', 'backup'):
+                self.frame_pools[path_name] = FrameBufferPool(self.batch_size, self.buffer_size)
+        
+        # NumPy向量化批量分类（每条路径一个突发缓冲区，可选依赖）
+        self.classifiers = {}
+        if config.getboolean('enable_batch_classify', False):
+            if HAS_NUMPY:
+                dst_mac_range = parse_mac_range(config.get('goose_dst_mac_range', ''))
+                dst_mac_min, dst_mac_max = dst_mac_range or (GOOSE_MULTICAST_MAC, GOOSE_MULTICAST_MAC)
+                appid_ranges = parse_appid_ranges(config.get('goose_appid_filter', ''))
+                for path_name in ('primary', 'backup'):
+                    self.classifiers[path_name] = BatchClassifier(
+                        self.batch_size, self.buffer_size, dst_mac_min, dst_mac_max, appid_ranges)
+            else:
+                self.logger.warning("未安装NumPy，批量分类不可用，回退为逐帧解析 (pip install numpy)")
+        
+        # writev分散写入TAP（每条路径一个，头模板不跨线程共享）
+        self.frame_injectors = {}
+        if self.enable_writev_inject:
+            for path_name in ('primary', 'backup'):
+                self.frame_injectors[path_name] = FrameInjector()
+        
+        # 不使用writev时按发布者缓存以太网头模板（每条路径一个）
+        self.header_caches = {}
+        if not self.enable_writev_inject:
+            for path_name in ('primary', 'backup'):
+                self.header_caches[path_name] = HeaderCache(config.getint('header_cache_size', 1024))
         
         # 运行状态
         self.running = False
@@ -41,6 +162,30 @@ class DualPathProcessor:
             'primary': {
                 'goose_to_ip': 0,
                 'ip_to_goose': 0,
+                'loopback_dropped': 0,
+                'sequence_lost': 0,
+                'sequence_reordered': 0,
+                'encap_invalid': 0,
+                'bundles_sent': 0,
+                'bundled_frames': 0,
+                'bundle_bytes': 0,
+                'bundles_received': 0,
+                'compressed_datagrams': 0,
+                'compression_skipped': 0,
+                'compression_bytes_in': 0,
+                'compression_bytes_out': 0,
+                'compression_ns': 0,
+                'compressed_received': 0,
+                'compression_dict_missing': 0,
+                'dictionaries_received': 0,
+                'delta_frames': 0,
+                'delta_references_sent': 0,
+                'delta_bytes_in': 0,
+                'delta_bytes_out': 0,
+                'delta_received': 0,
+                'delta_reference_missing': 0,
+                'suppressed_frames': 0,
+                'suppressed_bytes': 0,
                 'goose_received': 0,
                 'vlan_goose_received': 0,
                 'errors': 0,
@@ -49,71 +194,97 @@ class DualPathProcessor:
             'backup': {
                 'goose_to_ip': 0,
                 'ip_to_goose': 0,
+                'loopback_dropped': 0,
+                'sequence_lost': 0,
+                'sequence_reordered': 0,
+                'encap_invalid': 0,
+                'bundles_sent': 0,
+                'bundled_frames': 0,
+                'bundle_bytes': 0,
+                'bundles_received': 0,
+                'compressed_datagrams': 0,
+                'compression_skipped': 0,
+                'compression_bytes_in': 0,
+                'compression_bytes_out': 0,
+                'compression_ns': 0,
+                'compressed_received': 0,
+                'compression_dict_missing': 0,
+                'dictionaries_received': 0,
+                'delta_frames': 0,
+                'delta_references_sent': 0,
+                'delta_bytes_in': 0,
+                'delta_bytes_out': 0,
+                'delta_received': 0,
+                'delta_reference_missing': 0,
+                'suppressed_frames': 0,
+                'suppressed_bytes': 0,
                 'goose_received': 0,
                 'vlan_goose_received': 0,
                 'errors': 0,
                 'last_activity': time.time()
             }
         }
+        
+        # 封装头编解码（每条路径一个，发送序号和接收序号跟踪按路径独立，计数写入路径统计）
+        self.codecs = {path_name: EncapCodec(self.bridge_id, self.encap_version, self.stats[path_name])
+                       for path_name in ('primary', 'backup')}
+        if self.compression_dictionary:
+            for codec in self.codecs.values():
+                codec.add_dictionary(self.compression_dictionary)
     
-    def start(self):
-        """启动双路径数据处理"""
+    def start(self, threaded=True):
+        """启动双路径数据处理（threaded=False时由asyncio引擎通过register_async_readers驱动）"""
         try:
             self.running = True
             
-            # 启动主路径处理线程
-            primary_threads = [
-                threading.Thread(
-                    target=self.tap_reader_worker,
-                    args=(
-                        self.tap_manager.primary_fd,
-                        self.multicast_manager.primary_sock,
-                        self.multicast_manager.primary_multicast_ip,
-                        'primary'
-                    ),
-                    name="Primary-TAP-Reader",
-                    daemon=True
-                ),
-                threading.Thread(
-                    target=self.multicast_receiver_worker,
-                    args=(
-                        self.multicast_manager.primary_sock,
-                        self.tap_manager.primary_fd,
-                        'primary'
-                    ),
-                    name="Primary-Multicast-Receiver",
-                    daemon=True
+            # 创建批量接收器
+            for path_name, sock in (('primary', self.multicast_manager.primary_sock),
+                                    ('backup', self.multicast_manager.backup_sock)):
+                self.receivers[path_name] = BatchReceiver(
+                    sock,
+                    batch_size=self.recv_batch_size,
+                    buffer_size=self.buffer_size,
+                    use_recvmmsg=self.enable_recvmmsg,
+                    use_gro=self.enable_udp_gro and self.multicast_shards <= 1
                 )
-            ]
             
-            # 启动备路径处理线程
-            backup_threads = [
-                threading.Thread(
-                    target=self.tap_reader_worker,
-                    args=(
-                        self.tap_manager.backup_fd,
-                        self.multicast_manager.backup_sock,
-                        self.multicast_manager.backup_multicast_ip,
-                        'backup'
-                    ),
-                    name="Backup-TAP-Reader",
-                    daemon=True
-                ),
-                threading.Thread(
-                    target=self.multicast_receiver_worker,
-                    args=(
-                        self.multicast_manager.backup_sock,
-                        self.tap_manager.backup_fd,
-                        'backup'
-                    ),
-                    name="Backup-Multicast-Receiver",
-                    daemon=True
-                )
-            ]
+            # 创建批量发送器（已连接的独立发送套接字）
+            for path_name, multicast_ip in (('primary', self.multicast_manager.primary_multicast_ip),
+                                            ('backup', self.multicast_manager.backup_multicast_ip)):
+                tx_sock = create_connected_multicast_socket(multicast_ip, self.multicast_manager.multicast_port,
+                                                            loop=self.multicast_loop)
+                self.senders[path_name] = self.create_sender(tx_sock, path_name)
             
-            # 启动所有线程
-            self.threads = primary_threads + backup_threads
+            # 多队列TAP：GOOSE→IP由每队列一个工作进程处理（先于其他线程fork）
+            if self.tap_manager.queue_fds:
+                self.start_tap_workers()
+            # 多播分片：IP→GOOSE由每条路径每个SO_REUSEPORT分片一个工作进程处理
+            if self.multicast_shards > 1:
+                self.start_shard_workers()
+            else:
+                for path_name in ('primary', 'backup'):
+                    self.apply_so_busy_poll(getattr(self.multicast_manager, f'{path_name}_sock'), path_name)
+            
+            # CPU策略：其余线程由主线程创建，先设置主线程的亲和性
+            self.apply_main_cpu_policy(threaded)
+            
+            if not threaded:
+                self.logger.info("✅ 双路径数据处理器启动成功 (asyncio引擎)")
+                return True
             
+            if self.io_mode == 'epoll':
+                # 单个epoll线程同时处理双路径的TAP接口和多播套接字
+                self.threads = [
+                    threading.Thread(
+                        target=self.reactor_worker,
+                        name="Dual-Path-Reactor",
+                        daemon=True
+                    )
+                ]
+            else:
+                self.threads = self.create_path_threads()
+            
+            # 启动所有线程
             for thread in self.threads:
                 thread.start()
                 self.logger.info(f"线程 {thread.name} 已启动")
@@ -125,11 +296,225 @@ class DualPathProcessor:
             self.logger.error(f"启动双路径数据处理器失败: {e}")
             return False
     
+    def apply_main_cpu_policy(self, threaded):
+        """工作进程fork之后调用：登记工作进程，并为主线程设置策略
+        
+        threads引擎下主线程（及其后创建的监控、IGMP保活线程）继承后台CPU；
+        asyncio引擎下主线程即数据面事件循环
+        """
+        for pool in (self.tap_workers, self.shard_workers):
+            if pool:
+                for process in pool.processes:
+                    self.cpu_policy.track(process.name, process.pid, 'worker')
+        if threaded:
+            self.cpu_policy.apply("Main", 'housekeeping')
+        else:
+            self.cpu_policy.apply("Asyncio-Engine")
+    
+    def create_path_threads(self):
+        """创建每条路径独立的TAP读取/多播接收线程（select模式）"""
+        threads = []
+        for path_name, label in (('primary', 'Primary'), ('backup', 'Backup')):
+            tap_fd = getattr(self.tap_manager, f'{path_name}_fd')
+            multicast_sock = getattr(self.multicast_manager, f'{path_name}_sock')
+            multicast_ip = getattr(self.multicast_manager, f'{path_name}_multicast_ip')
+            
+            if not self.tap_workers:
+                threads.append(threading.Thread(
+                    target=self.tap_reader_worker,
+                    args=(tap_fd, self.senders[path_name], multicast_ip, path_name),
+                    name=f"{label}-TAP-Reader",
+                    daemon=True
+                ))
+            if not self.shard_workers:
+                threads.append(threading.Thread(
+                    target=self.multicast_receiver_worker,
+                    args=(multicast_sock, tap_fd, path_name),
+                    name=f"{label}-Multicast-Receiver",
+                    daemon=True
+                ))
+        return threads
+    
+    def register_async_readers(self, async_plane):
+        """向asyncio数据面注册双路径的TAP接口和多播套接字"""
+        for fd, handler, name in self.iter_drain_handlers():
+            async_plane.add_reader(fd, handler, name)
+    
+    def iter_drain_handlers(self):
+        """生成双路径四个描述符及其批量读取函数 (fd, handler, name)"""
+        for path_name in ('primary', 'backup'):
+            tap_fd = getattr(self.tap_manager, f'{path_name}_fd')
+            multicast_sock = getattr(self.multicast_manager, f'{path_name}_sock')
+            multicast_ip = getattr(self.multicast_manager, f'{path_name}_multicast_ip')
+            sender = self.senders[path_name]
+            receiver = self.receivers[path_name]
+            handle_packet = self.make_multicast_handler(tap_fd, path_name)
+            
+            if not self.tap_workers:
+                yield (
+                    tap_fd,
+                    lambda tap_fd=tap_fd, sender=sender, multicast_ip=multicast_ip, path_name=path_name:
+                        self.drain_tap(tap_fd, sender, multicast_ip, path_name, self.batch_size),
+                    f"{path_name}路径TAP接口"
+                )
+            if not self.shard_workers:
+                yield (
+                    multicast_sock,
+                    lambda receiver=receiver, handle_packet=handle_packet, path_name=path_name:
+                        self.drain_multicast(receiver, handle_packet, path_name),
+                    f"{path_name}路径多播套接字"
+                )
+    
+    def start_tap_workers(self):
+        """为双路径的每个TAP队列启动一个工作进程"""
+        targets = []
+        for path_name in ('primary', 'backup'):
+            interface_name = getattr(self.tap_manager, f'{path_name}_interface')
+            multicast_ip = getattr(self.multicast_manager, f'{path_name}_multicast_ip')
+            for index, queue_fd in enumerate(self.tap_manager.queue_fds.get(interface_name, [])):
+                targets.append((
+                    f"{path_name}-q{index}",
+                    path_name,
+                    lambda ctx, path_name=path_name, queue_fd=queue_fd, multicast_ip=multicast_ip:
+                        self.tap_queue_worker(ctx, path_name, queue_fd, multicast_ip)
+                ))
+        
+        self.tap_workers = WorkerProcessPool("Dual-TAP-Queue", self.logger, QUEUE_WORKER_COUNTERS,
+                                             cpus=self.queue_worker_cpus)
+        self.tap_workers.start(targets)
+    
+    def start_shard_workers(self):
+        """为双路径的每个多播分片启动一个工作进程，父进程的多播套接字不再接收"""
+        targets = []
+        for path_name in ('primary', 'backup'):
+            attach_drop_filter(getattr(self.multicast_manager, f'{path_name}_sock'))
+            interface_name = getattr(self.tap_manager, f'{path_name}_interface')
+            # 多队列TAP时各分片写入不同的队列
+            tap_fds = (self.tap_manager.queue_fds.get(interface_name)
+                       or [getattr(self.tap_manager, f'{path_name}_fd')])
+            for shard_index in range(self.multicast_shards):
+                targets.append((
+                    f"{path_name}-shard{shard_index}",
+                    path_name,
+                    lambda ctx, path_name=path_name, shard_index=shard_index,
+                           tap_fd=tap_fds[shard_index % len(tap_fds)]:
+                        self.multicast_shard_worker(ctx, path_name, shard_index, tap_fd)
+                ))
+        
+        self.shard_workers = WorkerProcessPool("Dual-Multicast-Shard", self.logger, SHARD_WORKER_COUNTERS,
+                                               cpus=self.shard_worker_cpus)
+        self.shard_workers.start(targets)
+    
+    def run_worker_loop(self, ctx, fd, drain, path_name, counters):
+        """工作进程主循环：fd可读时批量处理，每秒向父进程发布一次计数器"""
+        # CPU绑定由进程池完成，这里只设置实时优先级
+        self.cpu_policy.apply(ctx.name, pin=False)
+        path_stats = self.stats[path_name]
+        for key in counters:
+            path_stats[key] = 0
+        last_publish = time.time()
+        busy_poller = self.create_busy_poller(fd, ctx.name)
+        
+        while self.running and ctx.running():
+            try:
+                if self.wait_readable(fd, busy_poller):
+                    drain()
+            except Exception as e:
+                path_stats['errors'] += 1
+                self.logger.error(f"{path_name}路径工作进程 {ctx.name} 错误: {e}")
+                time.sleep(1)
+            
+            if time.time() - last_publish >= 1.0:
+                ctx.publish(path_stats)
+                last_publish = time.time()
+        
+        ctx.publish(path_stats)
+    
+    def tap_queue_worker(self, ctx, path_name, queue_fd, multicast_ip):
+        """多队列TAP工作进程：独立处理一条路径一个队列的GOOSE→IP转发"""
+        self.logger.info(f"🔄 {path_name}路径TAP队列工作进程 {ctx.name} 启动 (PID {os.getpid()})")
+        
+        # 每个进程使用独立的多播发送套接字
+        sender = self.create_sender(
+            create_connected_multicast_socket(multicast_ip, self.multicast_manager.multicast_port,
+                                              loop=self.multicast_loop),
+            path_name)
+        
+        self.run_worker_loop(
+            ctx, queue_fd,
+            lambda: self.drain_tap(queue_fd, sender, multicast_ip, path_name, self.batch_size),
+            path_name, QUEUE_WORKER_COUNTERS
+        )
+        if hasattr(sender, 'close'):
+            # 发送聚合包中剩余的帧后再发布一次计数器
+            self.record_sent(path_name, sender.close())
+            ctx.publish(self.stats[path_name])
+        sender.sock.close()
+        self.logger.info(f"{path_name}路径TAP队列工作进程 {ctx.name} 结束")
+    
+    def multicast_shard_worker(self, ctx, path_name, shard_index, tap_fd):
+        """多播分片工作进程：接收一条路径上源MAC哈希属于本分片的数据报并写入TAP"""
+        multicast_ip = getattr(self.multicast_manager, f'{path_name}_multicast_ip')
+        sock = create_sharded_multicast_socket(
+            multicast_ip, self.multicast_manager.multicast_port, shard_index, self.multicast_shards)
+        self.apply_so_busy_poll(sock, path_name)
+        # 分片套接字不开启GRO：分片过滤器只检查合并数据报的第一个分段
+        receiver = BatchReceiver(
+            sock,
+            batch_size=self.recv_batch_size,
+            buffer_size=self.buffer_size,
+            use_recvmmsg=self.enable_recvmmsg
+        )
+        handle_packet = self.make_multicast_handler(tap_fd, path_name)
+        
+        self.logger.info(f"🔄 {path_name}路径多播分片工作进程 {ctx.name} 启动 (PID {os.getpid()}, 分片 {shard_index}/{self.multicast_shards})")
+        self.run_worker_loop(
+            ctx, sock,
+            lambda: self.drain_multicast(receiver, handle_packet, path_name),
+            path_name, SHARD_WORKER_COUNTERS
+        )
+        sock.close()
+        self.logger.info(f"{path_name}路径多播分片工作进程 {ctx.name} 结束")
+    
+    def create_sender(self, tx_sock, path_name):
+        """创建一条路径的批量发送器，按需依次外加压缩、帧聚合、增量编码和重传抑制（接口相同）"""
+        sender = BatchSender(
+            tx_sock,
+            batch_size=self.send_batch_size,
+            buffer_size=self.buffer_size,
+            max_hold_us=self.send_max_hold_us,
+            use_sendmmsg=self.enable_sendmmsg,
+            use_gso=self.enable_udp_gso
+        )
+        if self.enable_compression:
+            # 先聚合后压缩：聚合按未压缩的载荷判断状态变化，整个聚合包一次压缩
+            sender = FrameCompressor(sender, self.codecs[path_name], self.compression_level,
+                                     self.compression_dictionary, self.compression_dictionary_size,
+                                     self.compression_learn_frames, self.compression_announce_interval,
+                                     self.stats[path_name])
+        if self.enable_aggregation:
+            sender = FrameAggregator(sender, self.codecs[path_name], self.aggregate_max_bytes,
+                                     self.aggregate_max_delay_us, self.stats[path_name])
+        if self.enable_delta_encoding:
+            # 增量编码逐帧进行，聚合包中的记录可以是增量
+            sender = FrameDeltaEncoder(sender, self.codecs[path_name], self.delta_refresh_frames,
+                                       self.stats[path_name], gap_references=not self.enable_suppression)
+        if self.enable_suppression:
+            # 最先丢弃不转发的重传，之后的编码只处理转发的帧
+            sender = RetransmissionSuppressor(sender, self.codecs[path_name], self.suppression_fast_retransmissions,
+                                              self.suppression_tal_fraction, self.stats[path_name])
+        return sender
+    
     def stop(self):
         """停止双路径数据处理"""
         self.logger.info("正在停止双路径数据处理器...")
         self.running = False
         
+        # 停止工作进程（多队列TAP / 多播分片）
+        for pool in (self.tap_workers, self.shard_workers):
+            if pool:
+                pool.stop()
+        
         # 等待所有线程结束
         for thread in self.threads:
             if thread.is_alive():
@@ -139,55 +524,33 @@ class DualPathProcessor:
                 else:
                     self.logger.info(f"线程 {thread.name} 已结束")
         
+        # 关闭发送套接字
+        for path_name, sender in self.senders.items():
+            try:
+                if hasattr(sender, 'close'):
+                    # 发送聚合包中剩余的帧
+                    self.record_sent(path_name, sender.close())
+                sender.sock.close()
+            except Exception as e:
+                self.logger.warning(f"关闭{path_name}路径发送套接字失败: {e}")
+        
         self.logger.info("✅ 双路径数据处理器已停止")
     
-    def tap_reader_worker(self, tap_fd, multicast_sock, multicast_ip, path_name):
+    def tap_reader_worker(self, tap_fd, sender, multicast_ip, path_name):
         """TAP接口读取工作线程"""
         self.logger.info(f"🔄 {path_name}路径TAP读取线程启动")
+        self.cpu_policy.apply(f"{path_name}-TAP-Reader")
         
         consecutive_timeouts = 0
         max_consecutive_timeouts = 100
+        busy_poller = self.create_busy_poller(tap_fd, f'{path_name}-tap')
         
         while self.running:
             try:
-                # 使用select进行非阻塞I/O
-                ready, _, _ = select.select([tap_fd], [], [], 1.0)
-                
-                if ready:
+                # 使用select进行非阻塞I/O（忙轮询模式下先自旋）
+                if self.wait_readable(tap_fd, busy_poller):
                     consecutive_timeouts = 0
-                    
-                    # 批量读取帧以提高性能
-                    frames_processed = 0
-                    while frames_processed < self.batch_size and self.running:
-                        try:
-                            frame_data = os.read(tap_fd, self.buffer_size)
-                            if not frame_data:
-                                break
-                            
-                            # 解析帧
-                            frame = self.parse_ethernet_frame_with_vlan(frame_data)
-                            
-                            if frame and self.is_goose_frame(frame):
-                                if frame['has_vlan']:
-                                    self.stats[path_name]['vlan_goose_received'] += 1
-                                else:
-                                    self.stats[path_name]['goose_received'] += 1
-                                
-                                # 转换为IP多播
-                                success = self.goose_to_multicast(frame, multicast_sock, multicast_ip, path_name)
-                                if success:
-                                    self.stats[path_name]['goose_to_ip'] += 1
-                                    self.stats[path_name]['last_activity'] = time.time()
-                            
-                            frames_processed += 1
-                            
-                        except BlockingIOError:
-                            # 没有更多数据可读
-                            break
-                        except Exception as e:
-                            self.stats[path_name]['errors'] += 1
-                            self.logger.error(f"{path_name}路径TAP读取帧处理失败: {e}")
-                            break
+                    self.drain_tap(tap_fd, sender, multicast_ip, path_name, self.batch_size)
                 else:
                     consecutive_timeouts += 1
                     if consecutive_timeouts > max_consecutive_timeouts:
@@ -204,39 +567,20 @@ class DualPathProcessor:
     def multicast_receiver_worker(self, multicast_sock, tap_fd, path_name):
         """多播接收工作线程"""
         self.logger.info(f"🔄 {path_name}路径多播接收线程启动")
+        self.cpu_policy.apply(f"{path_name}-Multicast-Receiver")
+        
+        receiver = self.receivers[path_name]
+        handle_packet = self.make_multicast_handler(tap_fd, path_name)
         
         consecutive_timeouts = 0
         max_consecutive_timeouts = 100
+        busy_poller = self.create_busy_poller(multicast_sock, f'{path_name}-multicast')
         
         while self.running:
             try:
-                ready, _, _ = select.select([multicast_sock], [], [], 1.0)
-                
-                if ready:
+                if self.wait_readable(multicast_sock, busy_poller):
                     consecutive_timeouts = 0
-                    
-                    # 批量处理多播数据
-                    packets_processed = 0
-                    while packets_processed < self.batch_size and self.running:
-                        try:
-                            packet_data, sender_addr = multicast_sock.recvfrom(self.buffer_size)
-                            
-                            # 过滤本机发送的数据
-                            if sender_addr[0] != self.multicast_manager.local_ip:
-                                success = self.multicast_to_goose(packet_data, sender_addr, tap_fd, path_name)
-                                if success:
-                                    self.stats[path_name]['ip_to_goose'] += 1
-                                    self.stats[path_name]['last_activity'] = time.time()
-                            
-                            packets_processed += 1
-                            
-                        except BlockingIOError:
-                            # 没有更多数据可读
-                            break
-                        except Exception as e:
-                            self.stats[path_name]['errors'] += 1
-                            self.logger.error(f"{path_name}路径多播数据处理失败: {e}")
-                            break
+                    self.drain_multicast(receiver, handle_packet, path_name)
                 else:
                     consecutive_timeouts += 1
                     if consecutive_timeouts > max_consecutive_timeouts:
@@ -250,6 +594,196 @@ class DualPathProcessor:
         
         self.logger.info(f"{path_name}路径多播接收线程结束")
     
+    def reactor_worker(self):
+        """epoll数据面线程（双路径四个描述符共用一个边沿触发事件循环）"""
+        self.logger.info("🔄 双路径epoll数据面线程启动")
+        self.cpu_policy.apply("Dual-Path-Reactor")
+        
+        busy_poll_us = self.busy_poll_budget_us if self.latency_mode == 'busy_poll' else 0
+        self.reactor = EpollReactor(self.logger, timeout=1.0, busy_poll_us=busy_poll_us)
+        for fd, handler, name in self.iter_drain_handlers():
+            self.reactor.register(fd, handler, name)
+        
+        while self.running:
+            try:
+                self.reactor.run(self.is_running)
+            except Exception as e:
+                self.logger.error(f"双路径epoll数据面线程错误: {e}")
+                time.sleep(1)
+        
+        self.reactor.close()
+        self.logger.info("双路径epoll数据面线程结束")
+    
+    def drain_tap(self, tap_fd, sender, multicast_ip, path_name, max_frames):
+        """批量读取TAP帧直到EAGAIN或达到max_frames，返回True表示可能仍有数据"""
+        if path_name in self.classifiers:
+            return self.drain_tap_classified(tap_fd, sender, multicast_ip, path_name, max_frames)
+        if path_name in self.frame_pools:
+            return self.drain_tap_zero_copy(tap_fd, sender, multicast_ip, path_name, max_frames)
+        
+        frames_processed = 0
+        more = False
+        
+        while self.running:
+            if frames_processed >= max_frames:
+                more = True
+                break
+            
+            try:
+                frame_data = os.read(tap_fd, self.buffer_size)
+                if not frame_data:
+                    break
+                
+                # 解析帧
+                frame = self.parse_ethernet_frame_with_vlan(frame_data)
+                
+                if frame and self.is_goose_frame(frame):
+                    if frame['has_vlan']:
+                        self.stats[path_name]['vlan_goose_received'] += 1
+                    else:
+                        self.stats[path_name]['goose_received'] += 1
+                    
+                    # 转换为IP多播（加入批量发送队列）
+                    self.goose_to_multicast(frame, sender, multicast_ip, path_name)
+                
+                frames_processed += 1
+                
+            except BlockingIOError:
+                # 没有更多数据可读
+                break
+            except Exception as e:
+                self.stats[path_name]['errors'] += 1
+                self.logger.error(f"{path_name}路径TAP读取帧处理失败: {e}")
+                break
+        
+        # 本批帧统一发送
+        self.flush_multicast_batch(sender, path_name)
+        return more
+    
+    def drain_tap_classified(self, tap_fd, sender, multicast_ip, path_name, max_frames):
+        """批量分类：整批帧读入连续缓冲区后向量化分类，只有需要转发的帧进入逐帧封装"""
+        classifier = self.classifiers[path_name]
+        path_stats = self.stats[path_name]
+        
+        try:
+            count = classifier.read_burst(tap_fd, max_frames)
+        except Exception as e:
+            path_stats['errors'] += 1
+            self.logger.error(f"{path_name}路径TAP读取帧失败: {e}")
+            return False
+        if not count:
+            return False
+        
+        classifier.classify()
+        for frame in classifier.forwarded_frames():
+            if frame.has_vlan:
+                path_stats['vlan_goose_received'] += 1
+            else:
+                path_stats['goose_received'] += 1
+            self.goose_frame_to_multicast(frame, sender, multicast_ip, path_name)
+        
+        # 本批帧统一发送
+        self.flush_multicast_batch(sender, path_name)
+        return count >= max_frames
+    
+    def drain_tap_zero_copy(self, tap_fd, sender, multicast_ip, path_name, max_frames):
+        """零拷贝批量读取：帧读入预分配缓冲池，解析和封装都不复制帧数据"""
+        frames_processed = 0
+        more = False
+        frame_pool = self.frame_pools[path_name]
+        path_stats = self.stats[path_name]
+        
+        while self.running:
+            if frames_processed >= max_frames:
+                more = True
+                break
+            
+            try:
+                frame = frame_pool.read(tap_fd)
+                if frame is None:
+                    break
+                
+                if frame.parse():
+                    if frame.has_vlan:
+                        path_stats['vlan_goose_received'] += 1
+                    else:
+                        path_stats['goose_received'] += 1
+                    
+                    # 封装直接写入发送槽位
+                    self.goose_frame_to_multicast(frame, sender, multicast_ip, path_name)
+                
+                frames_processed += 1
+                
+            except Exception as e:
+                path_stats['errors'] += 1
+                self.logger.error(f"{path_name}路径TAP读取帧处理失败: {e}")
+                break
+        
+        # 本批帧统一发送
+        self.flush_multicast_batch(sender, path_name)
+        return more
+    
+    def make_multicast_handler(self, tap_fd, path_name):
+        """创建单条路径的多播数据报处理函数"""
+        codec = self.codecs[path_name]
+        decode = codec.decode
+        path_stats = self.stats[path_name]
+        
+        def handle_packet(packet_data, sender_addr):
+            # 解码封装头，本实例发出的和无效的数据报由解码计数后丢弃，聚合包拆分、压缩数据报解压为单帧
+            header = decode(packet_data)
+            if header is None:
+                return
+            if header is ENCAP_EXPAND:
+                for record, header in codec.expand(packet_data):
+                    if self.multicast_to_goose(record, sender_addr, header, tap_fd, path_name):
+                        path_stats['ip_to_goose'] += 1
+                path_stats['last_activity'] = time.time()
+                return
+            if self.multicast_to_goose(packet_data, sender_addr, header, tap_fd, path_name):
+                path_stats['ip_to_goose'] += 1
+                path_stats['last_activity'] = time.time()
+        
+        return handle_packet
+    
+    def drain_multicast(self, receiver, handle_packet, path_name):
+        """批量接收多播数据直到EAGAIN"""
+        try:
+            receiver.drain(handle_packet, self.is_running)
+        except Exception as e:
+            self.stats[path_name]['errors'] += 1
+            self.logger.error(f"{path_name}路径多播数据处理失败: {e}")
+        return False
+    
+    def apply_so_busy_poll(self, sock, path_name):
+        """忙轮询模式下为多播接收套接字设置SO_BUSY_POLL"""
+        if self.latency_mode != 'busy_poll' or not self.so_busy_poll_us:
+            return
+        try:
+            enable_busy_poll(sock, self.so_busy_poll_us)
+            self.logger.info(f"{path_name}路径多播套接字已启用SO_BUSY_POLL ({self.so_busy_poll_us}µs)")
+        except OSError as e:
+            self.logger.warning(f"{path_name}路径设置SO_BUSY_POLL失败（需要CAP_NET_ADMIN或内核不支持）: {e}")
+    
+    def create_busy_poller(self, fd, name):
+        """忙轮询模式下为读取循环创建BusyPoller，普通模式返回None"""
+        if self.latency_mode != 'busy_poll':
+            return None
+        poller = BusyPoller(fd, self.busy_poll_budget_us)
+        self.busy_pollers[name] = poller
+        return poller
+    
+    def wait_readable(self, fd, busy_poller=None):
+        """等待fd可读（最多1秒）；忙轮询模式下先在预算时间内自旋"""
+        if busy_poller:
+            return busy_poller.wait()
+        ready, _, _ = select.select([fd], [], [], 1.0)
+        return bool(ready)
+    
+    def is_running(self):
+        """数据面运行状态（供批量接收循环检查）"""
+        return self.running
+    
     def parse_ethernet_frame_with_vlan(self, frame_data):
         """解析支持VLAN标签的以太网帧"""
         try:
@@ -280,6 +814,7 @@ class DualPathProcessor:
                     'has_vlan': True,
                     'vlan_id': vlan_id,
                     'vlan_priority': vlan_priority,
+                    'vlan_tci': vlan_tci,
                     'ethertype': ethertype,
                     'payload': payload,
                     'raw': frame_data,
@@ -296,6 +831,7 @@ class DualPathProcessor:
                     'has_vlan': False,
                     'vlan_id': None,
                     'vlan_priority': None,
+                    'vlan_tci': None,
                     'ethertype': ethertype,
                     'payload': payload,
                     'raw': frame_data,
@@ -311,24 +847,16 @@ class DualPathProcessor:
                 frame['ethertype'] == GOOSE_ETHERTYPE and 
                 frame['dst_mac'] == GOOSE_MULTICAST_MAC)
     
-    def goose_to_multicast(self, goose_frame, multicast_sock, multicast_ip, path_name):
+    def goose_to_multicast(self, goose_frame, sender, multicast_ip, path_name):
         """将GOOSE帧转换为IP多播"""
         try:
-            timestamp = struct.pack('!Q', int(time.time() * 1000000))
-            
-            # 封装数据：源MAC + 时间戳 + VLAN信息 + GOOSE载荷
-            vlan_info = struct.pack('!HH', 
-                                   1 if goose_frame['has_vlan'] else 0,
-                                   goose_frame['vlan_id'] or 0)
+            # 封装数据：封装头（目的MAC、源MAC、时间戳、TCI、序号） + GOOSE载荷
+            packet_data = self.codecs[path_name].encode(
+                goose_frame['dst_mac'], goose_frame['src_mac'], int(time.time() * 1000000),
+                goose_frame['vlan_tci'], goose_frame['payload'])
             
-            packet_data = (
-                goose_frame['src_mac'] +
-                timestamp +
-                vlan_info +
-                goose_frame['payload']
-            )
-            
-            multicast_sock.sendto(packet_data, (multicast_ip, self.multicast_manager.multicast_port))
+            # 加入批量发送队列（队列满或超过最大保持时间时立即发送）
+            self.record_sent(path_name, sender.add(packet_data))
             
             if self.config.getboolean('debug', False):
                 src_mac_str = ':'.join(f'{b:02x}' for b in goose_frame['src_mac'])
@@ -341,47 +869,54 @@ class DualPathProcessor:
             self.logger.error(f"{path_name}路径GOOSE转多播失败: {e}")
             return False
     
-    def multicast_to_goose(self, packet_data, sender_addr, tap_fd, path_name):
-        """将IP多播转换为GOOSE帧"""
+    def goose_frame_to_multicast(self, frame, sender, multicast_ip, path_name):
+        """零拷贝路径：把FrameView直接封装进批量发送器的槽位"""
         try:
-            if len(packet_data) < 18:
-                return False
+            length = frame.encapsulate_into(sender.reserve(), time.time_ns() // 1000, self.codecs[path_name])
+            self.record_sent(path_name, sender.commit(length))
             
-            # 解析封装的数据包
-            src_mac = packet_data[0:6]
-            timestamp = struct.unpack('!Q', packet_data[6:14])[0]
-            vlan_flag, vlan_id = struct.unpack('!HH', packet_data[14:18])
-            goose_payload = packet_data[18:]
+            if self.config.getboolean('debug', False):
+                src_mac_str = ':'.join(f'{b:02x}' for b in frame.src_mac)
+                vlan_str = f"VLAN {frame.vlan_id}" if frame.has_vlan else "无VLAN"
+                self.logger.debug(f"{path_name}路径 GOOSE→IP: {src_mac_str} → {multicast_ip}:{self.multicast_manager.multicast_port} ({vlan_str})")
             
-            # 重构以太网帧
-            if vlan_flag:
-                # 带VLAN标签的帧
-                vlan_tci = (4 << 13) | (vlan_id & 0x0FFF)
-                ethernet_frame = (
-                    GOOSE_MULTICAST_MAC +
-                    src_mac +
-                    struct.pack('!H', VLAN_ETHERTYPE) +
-                    struct.pack('!H', vlan_tci) +
-                    struct.pack('!H', GOOSE_ETHERTYPE) +
-                    goose_payload
-                )
-            else:
-                # 无VLAN标签的帧
-                ethernet_frame = (
-                    GOOSE_MULTICAST_MAC +
-                    src_mac +
-                    struct.pack('!H', GOOSE_ETHERTYPE) +
-                    goose_payload
-                )
+            return True
             
-            # 写入TAP接口
-            os.write(tap_fd, ethernet_frame)
+        except Exception as e:
+            self.logger.error(f"{path_name}路径GOOSE转多播失败: {e}")
+            return False
+    
+    def flush_multicast_batch(self, sender, path_name):
+        """TAP批量读取结束，单次sendmmsg发送全部待发数据报"""
+        try:
+            self.record_sent(path_name, sender.flush_batch_end())
+        except Exception as e:
+            self.stats[path_name]['errors'] += 1
+            self.logger.error(f"{path_name}路径批量发送多播失败: {e}")
+    
+    def record_sent(self, path_name, sent):
+        """记录已发送的多播数据报数量"""
+        if sent:
+            self.stats[path_name]['goose_to_ip'] += sent
+            self.stats[path_name]['last_activity'] = time.time()
+    
+    def multicast_to_goose(self, packet_data, sender_addr, header, tap_fd, path_name):
+        """将IP多播转换为GOOSE帧（header为EncapCodec.decode的结果）"""
+        try:
+            frame_injector = self.frame_injectors.get(path_name)
+            if frame_injector:
+                # 分散写入：缓存的头模板 + 载荷memoryview，不拼接中间缓冲区
+                frame_injector.inject(tap_fd, packet_data, header)
+                
+                if self.config.getboolean('debug', False):
+                    self.log_injected_frame(header, sender_addr, path_name)
+                return True
+            
+            # 按发布者缓存的以太网头 + 载荷，一次拼接
+            os.write(tap_fd, self.header_caches[path_name].lookup(header) + packet_data[header[4]:])
             
             if self.config.getboolean('debug', False):
-                src_mac_str = ':'.join(f'{b:02x}' for b in src_mac)
-                age_ms = (int(time.time() * 1000000) - timestamp) // 1000
-                vlan_str = f"VLAN {vlan_id}" if vlan_flag else "无VLAN"
-                self.logger.debug(f"{path_name}路径 IP→GOOSE: {sender_addr[0]} → {src_mac_str} (延迟: {age_ms}ms, {vlan_str})")
+                self.log_injected_frame(header, sender_addr, path_name)
             
             return True
             
@@ -389,6 +924,53 @@ class DualPathProcessor:
             self.logger.error(f"{path_name}路径多播转GOOSE失败: {e}")
             return False
     
+    def log_injected_frame(self, header, sender_addr, path_name):
+        """调试日志：按解码后的封装头输出源MAC、延迟和VLAN"""
+        _, src_mac, tci, timestamp, _ = header
+        src_mac_str = ':'.join(f'{b:02x}' for b in src_mac)
+        age_ms = (int(time.time() * 1000000) - timestamp) // 1000
+        vlan_str = f"VLAN {tci & 0x0FFF} PCP {tci >> 13}" if tci is not None else "无VLAN"
+        self.logger.debug(f"{path_name}路径 IP→GOOSE: {sender_addr[0]} → {src_mac_str} (延迟: {age_ms}ms, {vlan_str})")
+    
     def get_stats(self):
         """获取统计信息"""
-        return dict(self.stats)
+        stats = {path_name: dict(path_stats) for path_name, path_stats in self.stats.items()}
+        for path_name, receiver in self.receivers.items():
+            stats[path_name]['recv_batch'] = receiver.get_stats()
+        for path_name, sender in self.senders.items():
+            stats[path_name]['send_batch'] = sender.get_stats()
+        for path_name, frame_pool in self.frame_pools.items():
+            stats[path_name]['frame_pool'] = frame_pool.get_stats()
+        for path_name, frame_injector in self.frame_injectors.items():
+            stats[path_name]['frame_injector'] = frame_injector.get_stats()
+        for path_name, header_cache in self.header_caches.items():
+            stats[path_name]['header_cache'] = header_cache.get_stats()
+        for path_name, classifier in self.classifiers.items():
+            stats[path_name]['batch_classifier'] = classifier.get_stats()
+        if self.reactor:
+            stats['reactor'] = self.reactor.get_stats()
+        stats['busy_poll'] = {
+            'latency_mode': self.latency_mode,
+            'budget_us': self.busy_poll_budget_us,
+            'so_busy_poll_us': self.so_busy_poll_us,
+            'pollers': {name: poller.get_stats() for name, poller in self.busy_pollers.items()}
+        }
+        stats['cpu_policy'] = self.cpu_policy.get_stats()
+        stats['encap'] = {
+            'bridge_id': f"0x{self.bridge_id:08X}",
+            'version': self.encap_version,
+            'multicast_loop': self.multicast_loop,
+            'paths': {path_name: codec.get_stats() for path_name, codec in self.codecs.items()}
+        }
+        # 工作进程的计数来自共享内存（错误计数保留在各进程明细中）
+        for section, pool, counters in (('queue_workers', self.tap_workers, QUEUE_WORKER_COUNTERS),
+                                        ('multicast_shards', self.shard_workers, SHARD_WORKER_COUNTERS)):
+            if not pool:
+                continue
+            aggregated = pool.aggregate()
+            for path_name, totals in aggregated['totals'].items():
+                for key in counters:
+                    if key != 'errors':
+                        stats[path_name][key] = totals[key]
+            stats[section] = aggregated
+        return stats
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+epoll事件反应器
+单线程同时监听TAP接口和多播套接字，边沿触发(EPOLLET)，
+每个就绪描述符由处理函数读取直到EAGAIN；
+忙轮询模式下空闲后先以零超时自旋一段预算时间，再回退为阻塞等待
+"""
+
+import select
+import time
+
+
+class EpollReactor:
+    """边沿触发epoll反应器"""
+
+    def __init__(self, logger, timeout=1.0, busy_poll_us=0):
+        self.logger = logger
+        self.timeout = timeout
+        self.busy_poll_ns = max(0, busy_poll_us) * 1000
+        self.epoll = select.epoll()
+
+        # fd -> (处理函数, 名称)
+        self.handlers = {}
+
+        # 处理预算用完、仍可能有数据的fd（边沿触发不会再次通知）
+        self.pending = []
+        self.active = True
+
+        self.stats = {
+            'wakeups': 0,
+            'events': 0,
+            'idle_timeouts': 0,
+            'requeued': 0,
+            'handler_errors': 0,
+            'busy_spins': 0
+        }
+
+    def register(self, fd, handler, name):
+        """注册描述符；handler()返回True表示数据未读完，需要再次调度"""
+        if hasattr(fd, 'fileno'):
+            fd = fd.fileno()
+        self.epoll.register(fd, select.EPOLLIN | select.EPOLLET)
+        self.handlers[fd] = (handler, name)
+        # 注册前可能已有数据，边沿触发不会补发通知，先调度一次
+        self.pending.append(fd)
+
+    def unregister(self, fd):
+        """注销描述符"""
+        if hasattr(fd, 'fileno'):
+            fd = fd.fileno()
+        if self.handlers.pop(fd, None) is not None:
+            try:
+                self.epoll.unregister(fd)
+            except OSError:
+                pass
+
+    def _dispatch(self, fd):
+        entry = self.handlers.get(fd)
+        if entry is None:
+            return False
+        handler, name = entry
+        try:
+            return bool(handler())
+        except Exception as e:
+            self.stats['handler_errors'] += 1
+            self.logger.error(f"{name}事件处理失败: {e}")
+            return False
+
+    def run(self, running, on_idle=None):
+        """事件循环，running()返回False时退出；超时无事件时调用on_idle()"""
+        self.active = True
+        spin_deadline = 0
+        while self.active and running():
+            # 有未读完的描述符时不阻塞；忙轮询预算内零超时自旋
+            if self.pending:
+                timeout = 0
+            elif self.busy_poll_ns and time.perf_counter_ns() < spin_deadline:
+                timeout = 0
+                self.stats['busy_spins'] += 1
+            else:
+                timeout = self.timeout
+            try:
+                events = self.epoll.poll(timeout)
+            except InterruptedError:
+                continue
+
+            ready = self.pending
+            self.pending = []
+
+            if events:
+                self.stats['wakeups'] += 1
+                self.stats['events'] += len(events)
+                for fd, _ in events:
+                    if fd not in ready:
+                        ready.append(fd)
+                if self.busy_poll_ns:
+                    spin_deadline = time.perf_counter_ns() + self.busy_poll_ns
+            elif not ready:
+                if timeout == 0:
+                    continue
+                self.stats['idle_timeouts'] += 1
+                if on_idle:
+                    on_idle()
+                continue
+
+            for fd in ready:
+                if self._dispatch(fd):
+                    self.pending.append(fd)
+                    self.stats['requeued'] += 1
+
+    def stop(self):
+        """请求事件循环在本轮处理后退出"""
+        self.active = False
+
+    def close(self):
+        """关闭epoll实例"""
+        self.handlers.clear()
+        self.epoll.close()
+
+    def get_stats(self):
+        """获取反应器统计信息"""
+        stats = dict(self.stats)
+        stats['watched_fds'] = [name for _, name in self.handlers.values()]
+        stats['busy_poll_us'] = self.busy_poll_ns // 1000
+        return stats
+
+
+class BusyPoller:
+    """单描述符忙轮询等待：先在预算时间内以零超时poll自旋，超出预算后回退为阻塞等待
+
+    自旋期间只做就绪探测，数据由调用方的批量读取函数处理，
+    避免空读被计入批量接收直方图
+    """
+
+    def __init__(self, fd, budget_us=200, timeout=1.0):
+        if hasattr(fd, 'fileno'):
+            fd = fd.fileno()
+        self.poller = select.poll()
+        self.poller.register(fd, select.POLLIN)
+        self.budget_ns = max(0, budget_us) * 1000
+        self.timeout_ms = int(timeout * 1000)
+        self.stats = {
+            'spins': 0,
+            'spin_hits': 0,
+            'blocking_waits': 0,
+            'blocking_hits': 0,
+            'idle_timeouts': 0
+        }
+
+    def wait(self):
+        """等待描述符可读，返回False表示阻塞等待超时"""
+        poll = self.poller.poll
+        deadline = time.perf_counter_ns() + self.budget_ns
+        spins = 0
+        while True:
+            spins += 1
+            if poll(0):
+                self.stats['spins'] += spins
+                self.stats['spin_hits'] += 1
+                return True
+            if time.perf_counter_ns() >= deadline:
+                break
+        self.stats['spins'] += spins
+
+        self.stats['blocking_waits'] += 1
+        if self.poller.poll(self.timeout_ms):
+            self.stats['blocking_hits'] += 1
+            return True
+        self.stats['idle_timeouts'] += 1
+        return False
+
+    def get_stats(self):
+        """获取忙轮询统计信息"""
+        stats = dict(self.stats)
+        stats['budget_us'] = self.budget_ns // 1000
+        return stats
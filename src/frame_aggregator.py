@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+GOOSE帧聚合
+TGW多播按数据包计费和限速，而GOOSE帧通常只有100-300字节；
+GOOSE→IP方向把多个封装后的v3数据报打包进一个UDP数据报（聚合包，格式见frame_buffers）：
+聚合包达到aggregate_max_bytes、最早的帧等待超过aggregate_max_delay_us、
+或遇到状态变化（stNum改变）的帧时立即发送；接收端由EncapCodec.expand拆分
+"""
+
+import threading
+import time
+
+from frame_buffers import (BUNDLE_OVERHEAD, BUNDLE_RECORD_LENGTH, ENCAP_FLAG_BUNDLE, ENCAP_FLAG_DELTA, ENCAP_MAGIC,
+                           ENCAP_V2_PREFIX, ENCAP_V2_PREFIX_LENGTH, ENCAP_V3_SRC_MAC_OFFSET, ENCAP_VERSION)
+from goose_pdu import GOOSE_HEADER_LENGTH, ST_NUM_TAG, GoosePdu
+
+
+class FrameAggregator:
+    """聚合发送器，接口与BatchSender一致（add/reserve/commit/flush_batch_end/get_stats）
+
+    reserve()返回独立的暂存槽位，commit()在锁内把数据报复制进当前聚合包，聚合包关闭后交给BatchSender；
+    截止时间由后台线程检查（aggregate_max_delay_us为0时每批TAP读取结束即发送），
+    后台线程发送的帧数在下一次add/commit/flush_batch_end时返回。
+    聚合包数、帧数和字节数计入stats（通常传入桥接服务的统计字典）
+    """
+
+    COUNTERS = ('bundles_sent', 'bundled_frames', 'bundle_bytes')
+
+    def __init__(self, sender, codec, max_bytes=1400, max_delay_us=500, stats=None):
+        if codec.version != ENCAP_VERSION:
+            raise ValueError(f"帧聚合需要v{ENCAP_VERSION}封装头")
+        self.sender = sender
+        self.sock = sender.sock
+        self.header_length = codec.header_length
+        # 单帧聚合包也不能超过发送槽位
+        self.max_bytes = max(BUNDLE_OVERHEAD + codec.header_length, min(max_bytes, sender.buffer_size))
+        self.max_delay_ns = max(0, max_delay_us) * 1000
+        # 剩余空间放不下最短的GOOSE帧时聚合包视为已满
+        self.min_record = BUNDLE_RECORD_LENGTH.size + codec.header_length + GOOSE_HEADER_LENGTH
+
+        # 可被FrameDeltaEncoder包装：单个数据报不能超过暂存槽位
+        self.buffer_size = sender.buffer_size - BUNDLE_OVERHEAD
+        self.scratch = memoryview(bytearray(self.buffer_size))
+        self.bundle = bytearray(sender.buffer_size)
+        self.bundle_view = memoryview(self.bundle)
+        ENCAP_V2_PREFIX.pack_into(self.bundle, 0, ENCAP_MAGIC, ENCAP_VERSION, ENCAP_FLAG_BUNDLE, codec.bridge_id)
+        self.offset = ENCAP_V2_PREFIX_LENGTH
+        self.frames = 0
+        self.first_queued_ns = 0
+        # BatchSender中待发送的每个聚合包所含帧数
+        self.pending_frames = []
+        self.unreported = 0
+        # 每个发布者（源MAC + APPID）最近的stNum值：(起始偏移, 结束偏移, 值字节)
+        self.last_states = {}
+
+        self.condition = threading.Condition()
+        self.timer = None
+        self.running = True
+
+        self.stats = stats if stats is not None else {}
+        for key in self.COUNTERS:
+            self.stats.setdefault(key, 0)
+        self.flush_stats = {
+            'flush_on_size': 0,
+            'flush_on_deadline': 0,
+            'flush_on_state_change': 0,
+            'flush_on_batch_end': 0
+        }
+
+    def add(self, packet):
+        """加入一个封装后的数据报，返回本次调用发送的帧数"""
+        length = len(packet)
+        if length > len(self.scratch):
+            raise ValueError(f"数据报长度 {length} 超过聚合槽位 {len(self.scratch)}")
+        self.scratch[:length] = packet
+        return self.commit(length)
+
+    def reserve(self):
+        """返回暂存槽位（memoryview），调用方写入封装后的数据报后调用commit()"""
+        return self.scratch
+
+    def commit(self, length):
+        """把暂存槽位中的数据报加入聚合包，返回本次调用发送的帧数"""
+        record = self.scratch[:length]
+        state_change = self.is_state_change(record)
+        with self.condition:
+            sent = self.unreported
+            self.unreported = 0
+            if self.frames and self.offset + BUNDLE_RECORD_LENGTH.size + length > self.max_bytes:
+                sent += self.close_bundle('flush_on_size')
+
+            offset = self.offset
+            BUNDLE_RECORD_LENGTH.pack_into(self.bundle, offset, length)
+            offset += BUNDLE_RECORD_LENGTH.size
+            self.bundle_view[offset:offset + length] = record
+            self.offset = offset + length
+            self.frames += 1
+
+            if self.frames == 1:
+                self.first_queued_ns = time.monotonic_ns()
+                if self.max_delay_ns:
+                    if self.timer is None:
+                        self.start_timer()
+                    self.condition.notify()
+
+            if state_change:
+                # 状态变化的帧不等待，连同已排队的帧立即发送
+                sent += self.close_bundle('flush_on_state_change')
+                sent += self.account(self.sender.flush_batch_end())
+            elif self.offset + self.min_record > self.max_bytes:
+                sent += self.close_bundle('flush_on_size')
+            elif self.max_delay_ns and time.monotonic_ns() - self.first_queued_ns >= self.max_delay_ns:
+                sent += self.close_bundle('flush_on_deadline')
+            return sent
+
+    def flush_batch_end(self):
+        """TAP批量读取结束：发送已关闭的聚合包；未设置截止时间时当前聚合包也立即发送"""
+        with self.condition:
+            sent = self.unreported
+            self.unreported = 0
+            if self.frames and not self.max_delay_ns:
+                sent += self.close_bundle('flush_on_batch_end')
+            return sent + self.account(self.sender.flush_batch_end())
+
+    def close_bundle(self, reason):
+        """关闭当前聚合包并交给BatchSender（调用方持有锁），返回BatchSender本次发送的帧数"""
+        length = self.offset
+        self.pending_frames.append(self.frames)
+        self.flush_stats[reason] += 1
+        stats = self.stats
+        stats['bundles_sent'] += 1
+        stats['bundled_frames'] += self.frames
+        stats['bundle_bytes'] += length
+        self.offset = ENCAP_V2_PREFIX_LENGTH
+        self.frames = 0
+        return self.account(self.sender.add(self.bundle_view[:length]))
+
+    def account(self, sent):
+        """把BatchSender发送的聚合包数换算为帧数（发送失败的聚合包中的帧不计入）"""
+        if self.sender.pending:
+            return 0
+        frames = sum(self.pending_frames[:sent])
+        self.pending_frames.clear()
+        return frames
+
+    def is_state_change(self, record):
+        """数据报中GOOSE载荷的stNum与该发布者上一帧不同（或首次出现）时返回True
+
+        同一发布者的goosePdu布局通常不变：先在上次的偏移处比较stNum的值字节，不一致时才遍历BER
+        """
+        if record[3] & ENCAP_FLAG_DELTA:
+            # 增量数据报只携带重传的t和sqNum
+            return False
+        payload = self.header_length
+        key = (int.from_bytes(record[ENCAP_V3_SRC_MAC_OFFSET:ENCAP_V3_SRC_MAC_OFFSET + 6], 'big') << 16 |
+               record[payload] << 8 | record[payload + 1])
+        state = self.last_states.get(key)
+        if state is not None and record[state[0]:state[1]] == state[2]:
+            return False
+
+        if len(record) < payload + GOOSE_HEADER_LENGTH:
+            return False
+        field = GoosePdu(record, payload).field(ST_NUM_TAG)
+        if field is None:
+            return False
+        value = bytes(record[field[0]:field[1]])
+        self.last_states[key] = (field[0], field[1], value)
+        # 布局变化但stNum未变
+        return state is None or state[2] != value
+
+    def start_timer(self):
+        """首次排队时启动截止时间线程（工作进程在fork之后各自启动）"""
+        self.timer = threading.Thread(target=self._deadline_worker, name="Frame-Aggregator", daemon=True)
+        self.timer.start()
+
+    def _deadline_worker(self):
+        with self.condition:
+            while self.running:
+                if not self.frames:
+                    self.condition.wait(1.0)
+                    continue
+                remaining = self.first_queued_ns + self.max_delay_ns - time.monotonic_ns()
+                if remaining > 0:
+                    self.condition.wait(remaining / 1e9)
+                    continue
+                self.unreported += self.close_bundle('flush_on_deadline')
+                self.unreported += self.account(self.sender.flush_batch_end())
+
+    def close(self):
+        """发送剩余的帧并停止截止时间线程，返回尚未返回过的已发送帧数"""
+        with self.condition:
+            self.running = False
+            sent = self.unreported
+            self.unreported = 0
+            if self.frames:
+                sent += self.close_bundle('flush_on_batch_end')
+            # 内层为压缩发送器时同时停止其字典通告线程
+            close = getattr(self.sender, 'close', None)
+            sent += self.account(close() if close else self.sender.flush_batch_end())
+            self.condition.notify_all()
+        if self.timer:
+            self.timer.join(1.0)
+        return sent
+
+    def get_stats(self):
+        """批量发送统计，附加聚合统计（平均每包帧数和平均填充率）"""
+        stats = self.sender.get_stats()
+        bundles = self.stats['bundles_sent']
+        aggregation = dict(self.flush_stats)
+        aggregation.update({key: self.stats[key] for key in self.COUNTERS})
+        aggregation['max_bytes'] = self.max_bytes
+        aggregation['max_delay_us'] = self.max_delay_ns // 1000
+        aggregation['avg_frames'] = self.stats['bundled_frames'] / bundles if bundles else 0.0
+        aggregation['avg_fill'] = self.stats['bundle_bytes'] / (bundles * self.max_bytes) if bundles else 0.0
+        aggregation['publishers'] = len(self.last_states)
+        stats['aggregation'] = aggregation
+        return stats
@@ -0,0 +1,578 @@
+#!/usr/bin/env python3
+"""
+零拷贝帧缓冲区
+TAP帧通过os.readv读入预分配的bytearray环形池，以memoryview切片表示；
+解析只检查固定偏移的字节，不创建bytes副本或字典；
+封装头与载荷直接写入批量发送器的预分配槽位；
+反方向由缓存的以太网头模板和载荷memoryview经os.writev写入TAP；
+封装头携带桥接实例ID和序号，接收时一次整数比较即可丢弃本实例发出的数据报；
+聚合包（多个v3数据报打包进一个UDP数据报）、压缩数据报（zlib预置字典）和增量数据报（相对发布者参考帧）
+由EncapCodec.expand拆分、解压和还原；
+不使用writev时按发布者缓存预先构造的以太网头，每帧只做一次查找和一次载荷拼接
+"""
+
+import os
+import struct
+import zlib
+from collections import OrderedDict
+
+# 协议常量
+GOOSE_MULTICAST_MAC = bytes.fromhex('010CCD010001')
+GOOSE_ETHERTYPE_BYTES = (0x88, 0xB8)
+VLAN_ETHERTYPE_BYTES = (0x81, 0x00)
+
+# 封装头v1：源MAC(6) + 时间戳(8) + VLAN标志(2) + VLAN ID(2)
+ENCAP_V1 = struct.Struct('!6sQHH')
+ENCAP_V1_LENGTH = ENCAP_V1.size
+# 发送端打包时跳过MAC字段，MAC由帧缓冲区的memoryview直接切片赋值写入，不为每帧创建bytes
+ENCAP_V1_FIELDS = struct.Struct('!6xQHH')
+# v1不携带目的MAC和优先级，解码时按GOOSE默认目的MAC和优先级4还原
+V1_VLAN_PRIORITY = 4
+
+# 魔数"GB"开头的带版本封装头；v1数据报以源MAC开头，单播MAC首字节最低位为0，不会与0x47混淆
+ENCAP_MAGIC = b'GB'
+# v2前缀：魔数(2) + 版本(1) + 标志(1) + 桥接实例ID(4)，其后为v1封装头（只解码）
+ENCAP_V2_PREFIX = struct.Struct('!2sBBI')
+ENCAP_V2_PREFIX_LENGTH = ENCAP_V2_PREFIX.size
+# v3：魔数(2) + 版本(1) + 标志(1) + 桥接实例ID(4) + 序号(4) + 目的MAC(6) + 源MAC(6) + 时间戳(8) + TCI(2)，
+# TCI保留优先级(PCP)、DEI和VLAN ID，一次unpack_from解析全部字段
+ENCAP_V3 = struct.Struct('!2sBBII6s6sQH')
+ENCAP_V3_LENGTH = ENCAP_V3.size
+ENCAP_V3_FIELDS = struct.Struct('!2sBBII12xQH')
+ENCAP_VERSION = 3
+ENCAP_FLAG_VLAN = 0x01
+ENCAP_V3_SRC_MAC_OFFSET = 18
+
+# 聚合包：v2前缀格式的8字节头（标志含ENCAP_FLAG_BUNDLE） + 若干条（长度(2) + 完整v3数据报）
+ENCAP_FLAG_BUNDLE = 0x02
+BUNDLE_RECORD_LENGTH = struct.Struct('!H')
+BUNDLE_OVERHEAD = ENCAP_V2_PREFIX_LENGTH + BUNDLE_RECORD_LENGTH.size
+# 压缩：v3数据报（或聚合包）的头保持不变，其后为字典ID(4) + 使用该预置字典的raw deflate流
+ENCAP_FLAG_COMPRESSED = 0x04
+COMPRESSED_DICTIONARY_ID = struct.Struct('!I')
+# 字典通告：v2前缀格式的8字节头（标志含ENCAP_FLAG_DICTIONARY） + 字典ID(4) + 字典长度(2) + 分片偏移(2) + 分片
+ENCAP_FLAG_DICTIONARY = 0x08
+DICTIONARY_CHUNK = struct.Struct('!IHH')
+# 字典ID为字典内容的Adler-32；每个接收端最多保留的字典数（多个发送桥接、字典更新）
+MAX_DICTIONARIES = 16
+# 解压后的长度上限，防止异常数据报占用大量内存
+MAX_EXPANDED_LENGTH = 65536
+# 增量编码：参考帧为带ENCAP_FLAG_REFERENCE的完整v3数据报，接收端按（桥接实例ID, 源MAC, APPID）保存其载荷；
+# 增量数据报（ENCAP_FLAG_DELTA）的v3头之后为APPID(2) + 参考帧序号(4) + t偏移(2) + sqNum偏移(2) + sqNum长度(1)
+# + t(8) + sqNum，接收端在参考载荷上替换这两个字段还原完整载荷
+ENCAP_FLAG_DELTA = 0x10
+ENCAP_FLAG_REFERENCE = 0x20
+DELTA_HEADER = struct.Struct('!HIHHB')
+DELTA_TIMESTAMP_LENGTH = 8
+# 发送端和接收端最多保留的参考帧数（超过时淘汰最早保存的）
+MAX_DELTA_REFERENCES = 4096
+ENCAP_EXPAND_FLAGS = (ENCAP_FLAG_BUNDLE | ENCAP_FLAG_COMPRESSED | ENCAP_FLAG_DICTIONARY |
+                      ENCAP_FLAG_DELTA | ENCAP_FLAG_REFERENCE)
+# decode()遇到聚合包、压缩数据报、增量数据报、参考帧或字典通告时返回此标记，调用方改用expand()逐帧处理
+ENCAP_EXPAND = object()
+
+# 前8字节按一个64位整数读取，回环判断屏蔽标志字节，只比较魔数、版本和桥接实例ID
+ENCAP_WORD = struct.Struct('!Q')
+ENCAP_LOOPBACK_MASK = 0xFFFFFF00FFFFFFFF
+
+# 落后最新序号不超过此窗口的数据报视为乱序，超过时视为对端重启并重新同步
+SEQUENCE_REORDER_WINDOW = 1024
+
+
+def generate_bridge_id(value=''):
+    """解析配置的桥接实例ID（支持0x前缀），未配置时随机生成非零的32位ID"""
+    if value:
+        bridge_id = int(value, 0)
+        if not 0 < bridge_id <= 0xFFFFFFFF:
+            raise ValueError(f"桥接实例ID超出范围 (1-0xFFFFFFFF): {value}")
+        return bridge_id
+    while True:
+        bridge_id = int.from_bytes(os.urandom(4), 'big')
+        if bridge_id:
+            return bridge_id
+
+
+class EncapCodec:
+    """封装头编解码
+
+    发送：version为3时写入v3头（桥接实例ID、按源MAC递增的序号、目的MAC、完整TCI），
+    为1时写入v1头（与未升级的对端互通）；
+    接收：识别v1、v2前缀和v3头，统一解码为 (目的MAC, 源MAC, TCI或None, 时间戳, 载荷偏移)；
+    本实例发出的数据报一次整数比较丢弃，v3序号按（桥接实例ID, 源MAC）检查，
+    压缩数据报按字典ID查找预置字典解压（字典来自配置文件或对端的字典通告），
+    增量数据报只在保存的参考帧序号与增量声明的一致时还原（丢失参考帧后等待下一个参考帧），
+    回环、丢失、乱序、无效数据报、收到的聚合包、压缩和增量数据报计入stats（通常传入桥接服务的统计字典）
+    """
+
+    COUNTERS = ('loopback_dropped', 'sequence_lost', 'sequence_reordered', 'encap_invalid', 'bundles_received',
+                'compressed_received', 'compression_dict_missing', 'dictionaries_received',
+                'delta_received', 'delta_reference_missing')
+
+    def __init__(self, bridge_id, version=ENCAP_VERSION, stats=None):
+        if version not in (1, ENCAP_VERSION):
+            raise ValueError(f"不支持的封装版本: {version}（可选: 1, {ENCAP_VERSION}）")
+        self.bridge_id = bridge_id
+        self.version = version
+        self.header_length = ENCAP_V3_LENGTH if version == ENCAP_VERSION else ENCAP_V1_LENGTH
+        self.loopback_word = ENCAP_WORD.unpack(ENCAP_V2_PREFIX.pack(ENCAP_MAGIC, ENCAP_VERSION, 0, bridge_id))[0]
+        self.tx_sequences = {}
+        self.tx_last_mac = None
+        self.rx_sequences = {}
+        # 字典ID -> 预置字典；正在接收的字典通告：字典ID -> [缓冲区, 已收到的分片偏移, 已收到字节数]
+        self.dictionaries = OrderedDict()
+        self.partial_dictionaries = {}
+        # (桥接实例ID, 源MAC, APPID) -> (参考帧序号, 参考载荷)
+        self.references = OrderedDict()
+        self.reference_bytes = 0
+        self.stats = stats if stats is not None else {}
+        for key in self.COUNTERS:
+            self.stats.setdefault(key, 0)
+
+    def pack_header_into(self, slot, dst_mac, src_mac, timestamp_us, tci):
+        """把封装头写入槽位开头（MAC为bytes或帧缓冲区的memoryview，tci为None表示无VLAN），返回头长度"""
+        if self.version != ENCAP_VERSION:
+            if tci is None:
+                ENCAP_V1_FIELDS.pack_into(slot, 0, timestamp_us, 0, 0)
+            else:
+                ENCAP_V1_FIELDS.pack_into(slot, 0, timestamp_us, 1, tci & 0x0FFF)
+            slot[0:6] = src_mac
+            return ENCAP_V1_LENGTH
+
+        # 同一发布者的连续帧直接复用上一帧的键，只在源MAC变化时复制为bytes
+        key = self.tx_last_mac
+        if src_mac != key:
+            key = self.tx_last_mac = bytes(src_mac)
+        sequences = self.tx_sequences
+        sequence = (sequences.get(key, 0) + 1) & 0xFFFFFFFF
+        sequences[key] = sequence
+        if tci is None:
+            ENCAP_V3_FIELDS.pack_into(slot, 0, ENCAP_MAGIC, ENCAP_VERSION, 0, self.bridge_id, sequence,
+                                      timestamp_us, 0)
+        else:
+            ENCAP_V3_FIELDS.pack_into(slot, 0, ENCAP_MAGIC, ENCAP_VERSION, ENCAP_FLAG_VLAN, self.bridge_id,
+                                      sequence, timestamp_us, tci)
+        slot[12:18] = dst_mac
+        slot[18:24] = src_mac
+        return ENCAP_V3_LENGTH
+
+    def encode(self, dst_mac, src_mac, timestamp_us, tci, payload):
+        """返回封装后的数据报bytes（字典解析路径使用）"""
+        header = bytearray(self.header_length)
+        self.pack_header_into(header, dst_mac, src_mac, timestamp_us, tci)
+        return bytes(header) + payload
+
+    def decode(self, packet):
+        """解码封装头；本实例发出的数据报和无效数据报计数后返回None，聚合包、压缩数据报和字典通告返回ENCAP_EXPAND"""
+        length = len(packet)
+        offset = 0
+        if length >= ENCAP_V2_PREFIX_LENGTH and packet[0] == ENCAP_MAGIC[0]:
+            if ENCAP_WORD.unpack_from(packet)[0] & ENCAP_LOOPBACK_MASK == self.loopback_word:
+                self.stats['loopback_dropped'] += 1
+                return None
+            version = packet[2]
+            if version == ENCAP_VERSION and packet[3] & ENCAP_EXPAND_FLAGS:
+                if packet[3] & ENCAP_FLAG_BUNDLE:
+                    self.stats['bundles_received'] += 1
+                return ENCAP_EXPAND
+            if version == ENCAP_VERSION and length >= ENCAP_V3_LENGTH:
+                (_, _, flags, bridge_id, sequence,
+                 dst_mac, src_mac, timestamp, tci) = ENCAP_V3.unpack_from(packet)
+                self.check_sequence(bridge_id, src_mac, sequence)
+                return dst_mac, src_mac, tci if flags & ENCAP_FLAG_VLAN else None, timestamp, ENCAP_V3_LENGTH
+            if version != 2 or packet[1] != ENCAP_MAGIC[1]:
+                self.stats['encap_invalid'] += 1
+                return None
+            offset = ENCAP_V2_PREFIX_LENGTH
+
+        if length < offset + ENCAP_V1_LENGTH:
+            self.stats['encap_invalid'] += 1
+            return None
+        src_mac, timestamp, vlan_flag, vlan_id = ENCAP_V1.unpack_from(packet, offset)
+        tci = (V1_VLAN_PRIORITY << 13) | (vlan_id & 0x0FFF) if vlan_flag else None
+        return GOOSE_MULTICAST_MAC, src_mac, tci, timestamp, offset + ENCAP_V1_LENGTH
+
+    def expand(self, packet):
+        """逐个返回decode()为ENCAP_EXPAND的数据报中的 (数据报或载荷, 解码结果)
+
+        聚合包逐条返回记录；压缩、增量数据报和参考帧返回解压或还原后的载荷（解码结果中的载荷偏移为0）；
+        字典通告只登记分片，不返回帧
+        """
+        view = memoryview(packet)
+        flags = view[3]
+        if flags & ENCAP_FLAG_DICTIONARY:
+            self.receive_dictionary(view)
+            return
+        if flags & ENCAP_FLAG_BUNDLE:
+            if flags & ENCAP_FLAG_COMPRESSED:
+                body = self.decompress(view, ENCAP_V2_PREFIX_LENGTH)
+                if body is not None:
+                    yield from self.split_bundle(memoryview(body))
+            else:
+                yield from self.split_bundle(view[ENCAP_V2_PREFIX_LENGTH:])
+            return
+
+        if len(view) < ENCAP_V3_LENGTH:
+            self.stats['encap_invalid'] += 1
+            return
+        if flags & ENCAP_FLAG_COMPRESSED:
+            body = self.decompress(view, ENCAP_V3_LENGTH)
+            if body is None:
+                return
+        else:
+            body = view[ENCAP_V3_LENGTH:]
+        (_, _, flags, bridge_id, sequence,
+         dst_mac, src_mac, timestamp, tci) = ENCAP_V3.unpack_from(view)
+        self.check_sequence(bridge_id, src_mac, sequence)
+        if flags & ENCAP_FLAG_DELTA:
+            body = self.apply_delta(bridge_id, src_mac, body)
+            if body is None:
+                return
+        elif flags & ENCAP_FLAG_REFERENCE:
+            self.store_reference(bridge_id, src_mac, sequence, body)
+        yield body, (dst_mac, src_mac, tci if flags & ENCAP_FLAG_VLAN else None, timestamp, 0)
+
+    def split_bundle(self, view):
+        """逐个返回聚合包记录部分中的 (数据报memoryview, 解码结果)；截断和嵌套的记录计为无效"""
+        end = len(view)
+        offset = 0
+        record_length = BUNDLE_RECORD_LENGTH.size
+        while offset + record_length <= end:
+            length = (view[offset] << 8) | view[offset + 1]
+            offset += record_length
+            if offset + length > end:
+                break
+            record = view[offset:offset + length]
+            offset += length
+            header = self.decode(record)
+            if header is ENCAP_EXPAND:
+                if record[3] & (ENCAP_FLAG_BUNDLE | ENCAP_FLAG_DICTIONARY):
+                    self.stats['encap_invalid'] += 1
+                else:
+                    yield from self.expand(record)
+            elif header is not None:
+                yield record, header
+        if offset != end:
+            self.stats['encap_invalid'] += 1
+
+    def decompress(self, view, header_length):
+        """解压header_length之后的压缩数据，字典未知或数据无效时计数后返回None"""
+        body_offset = header_length + COMPRESSED_DICTIONARY_ID.size
+        if len(view) < body_offset:
+            self.stats['encap_invalid'] += 1
+            return None
+        dictionary = self.dictionaries.get(COMPRESSED_DICTIONARY_ID.unpack_from(view, header_length)[0])
+        if dictionary is None:
+            self.stats['compression_dict_missing'] += 1
+            return None
+        try:
+            # 接收端使用最大窗口，兼容发送端按字典大小选择的任意窗口
+            decompressor = zlib.decompressobj(-zlib.MAX_WBITS, zdict=dictionary)
+            body = decompressor.decompress(view[body_offset:], MAX_EXPANDED_LENGTH)
+        except zlib.error:
+            self.stats['encap_invalid'] += 1
+            return None
+        if not decompressor.eof or decompressor.unconsumed_tail:
+            self.stats['encap_invalid'] += 1
+            return None
+        self.stats['compressed_received'] += 1
+        return body
+
+    def store_reference(self, bridge_id, src_mac, sequence, body):
+        """保存参考帧载荷（按APPID区分同一源MAC的多个控制块）"""
+        if len(body) < 2:
+            return
+        key = (bridge_id, src_mac, (body[0] << 8) | body[1])
+        old = self.references.pop(key, None)
+        if old is not None:
+            self.reference_bytes -= len(old[1])
+        body = bytes(body)
+        self.references[key] = (sequence, body)
+        self.reference_bytes += len(body)
+        while len(self.references) > MAX_DELTA_REFERENCES:
+            self.reference_bytes -= len(self.references.popitem(last=False)[1][1])
+
+    def apply_delta(self, bridge_id, src_mac, body):
+        """在参考载荷上替换t和sqNum还原完整载荷；参考帧缺失或序号不一致（中间丢失了参考帧）时返回None"""
+        if len(body) < DELTA_HEADER.size + DELTA_TIMESTAMP_LENGTH:
+            self.stats['encap_invalid'] += 1
+            return None
+        appid, reference_sequence, t_offset, sq_offset, sq_length = DELTA_HEADER.unpack_from(body)
+        reference = self.references.get((bridge_id, src_mac, appid))
+        if reference is None or reference[0] != reference_sequence:
+            self.stats['delta_reference_missing'] += 1
+            return None
+        payload = bytearray(reference[1])
+        values = DELTA_HEADER.size
+        if (t_offset + DELTA_TIMESTAMP_LENGTH > len(payload) or sq_offset + sq_length > len(payload) or
+                len(body) != values + DELTA_TIMESTAMP_LENGTH + sq_length):
+            self.stats['encap_invalid'] += 1
+            return None
+        payload[t_offset:t_offset + DELTA_TIMESTAMP_LENGTH] = body[values:values + DELTA_TIMESTAMP_LENGTH]
+        payload[sq_offset:sq_offset + sq_length] = body[values + DELTA_TIMESTAMP_LENGTH:]
+        self.stats['delta_received'] += 1
+        return payload
+
+    def add_dictionary(self, dictionary):
+        """登记预置字典（配置文件或字典通告），返回字典ID"""
+        dictionary_id = zlib.adler32(dictionary)
+        self.dictionaries[dictionary_id] = bytes(dictionary)
+        self.dictionaries.move_to_end(dictionary_id)
+        while len(self.dictionaries) > MAX_DICTIONARIES:
+            self.dictionaries.popitem(last=False)
+        return dictionary_id
+
+    def receive_dictionary(self, view):
+        """接收字典通告的一个分片，全部分片到齐且校验通过后登记字典"""
+        if len(view) < ENCAP_V2_PREFIX_LENGTH + DICTIONARY_CHUNK.size:
+            self.stats['encap_invalid'] += 1
+            return
+        dictionary_id, total, offset = DICTIONARY_CHUNK.unpack_from(view, ENCAP_V2_PREFIX_LENGTH)
+        if dictionary_id in self.dictionaries:
+            return
+        chunk = view[ENCAP_V2_PREFIX_LENGTH + DICTIONARY_CHUNK.size:]
+        if not chunk or offset + len(chunk) > total:
+            self.stats['encap_invalid'] += 1
+            return
+
+        partial = self.partial_dictionaries.get(dictionary_id)
+        if partial is None or len(partial[0]) != total:
+            if len(self.partial_dictionaries) >= MAX_DICTIONARIES:
+                self.partial_dictionaries.clear()
+            partial = self.partial_dictionaries[dictionary_id] = [bytearray(total), set(), 0]
+        if offset in partial[1]:
+            return
+        partial[0][offset:offset + len(chunk)] = chunk
+        partial[1].add(offset)
+        partial[2] += len(chunk)
+        if partial[2] < total:
+            return
+
+        del self.partial_dictionaries[dictionary_id]
+        if zlib.adler32(partial[0]) != dictionary_id:
+            self.stats['encap_invalid'] += 1
+            return
+        self.add_dictionary(partial[0])
+        self.stats['dictionaries_received'] += 1
+
+    def check_sequence(self, bridge_id, src_mac, sequence):
+        """检查同一发送桥接、同一发布者的序号连续性"""
+        key = (bridge_id, src_mac)
+        sequences = self.rx_sequences
+        last = sequences.get(key)
+        if last is not None:
+            gap = (sequence - last) & 0xFFFFFFFF
+            if gap == 0 or gap >= 0x80000000:
+                if (last - sequence) & 0xFFFFFFFF <= SEQUENCE_REORDER_WINDOW:
+                    self.stats['sequence_reordered'] += 1
+                    return
+            elif gap > 1:
+                self.stats['sequence_lost'] += gap - 1
+        sequences[key] = sequence
+
+    def get_stats(self):
+        """获取编解码配置和跟踪的发布者数量"""
+        return {
+            'bridge_id': f"0x{self.bridge_id:08X}",
+            'version': self.version,
+            'tx_publishers': len(self.tx_sequences),
+            'rx_publishers': len(self.rx_sequences),
+            'dictionaries': [f"0x{dictionary_id:08X}" for dictionary_id in self.dictionaries],
+            'delta_references': len(self.references),
+            'delta_reference_bytes': self.reference_bytes
+        }
+
+
+class FrameView:
+    """预分配缓冲区中的一个以太网帧（属性直接引用缓冲区，不复制）"""
+
+    __slots__ = ('buffer', 'view', 'dst_mac', 'src_mac', 'iov', 'length', 'has_vlan', 'vlan_id',
+                 'vlan_priority', 'tci', 'header_length')
+
+    def __init__(self, buffer_size):
+        self.buffer = bytearray(buffer_size)
+        self.view = memoryview(self.buffer)
+        # MAC字段的固定视图，封装时直接传给codec，不为每帧创建切片
+        self.dst_mac = self.view[0:6]
+        self.src_mac = self.view[6:12]
+        # os.readv使用的缓冲区列表，预先创建避免每帧分配
+        self.iov = [self.buffer]
+        self.length = 0
+        self.has_vlan = False
+        self.vlan_id = 0
+        self.vlan_priority = 0
+        self.tci = None
+        self.header_length = 14
+
+    def parse(self):
+        """解析以太网头（支持802.1Q），返回是否为GOOSE帧"""
+        buf = self.buffer
+        length = self.length
+        if length < 14 or not buf.startswith(GOOSE_MULTICAST_MAC):
+            return False
+
+        if buf[12] == VLAN_ETHERTYPE_BYTES[0] and buf[13] == VLAN_ETHERTYPE_BYTES[1]:
+            if length < 18:
+                return False
+            self.has_vlan = True
+            self.tci = (buf[14] << 8) | buf[15]
+            self.vlan_priority = buf[14] >> 5
+            self.vlan_id = self.tci & 0x0FFF
+            self.header_length = 18
+            return buf[16] == GOOSE_ETHERTYPE_BYTES[0] and buf[17] == GOOSE_ETHERTYPE_BYTES[1]
+
+        self.has_vlan = False
+        self.tci = None
+        self.vlan_priority = 0
+        self.vlan_id = 0
+        self.header_length = 14
+        return buf[12] == GOOSE_ETHERTYPE_BYTES[0] and buf[13] == GOOSE_ETHERTYPE_BYTES[1]
+
+    @property
+    def payload(self):
+        return self.view[self.header_length:self.length]
+
+    def encapsulate_into(self, slot, timestamp_us, codec):
+        """用codec写入封装头，载荷直接复制到发送槽位，返回数据报长度"""
+        header_length = codec.header_length
+        total = header_length + self.length - self.header_length
+        if total > len(slot):
+            raise ValueError(f"数据报长度 {total} 超过发送槽位 {len(slot)}")
+
+        codec.pack_header_into(slot, self.dst_mac, self.src_mac, timestamp_us, self.tci)
+        slot[header_length:total] = self.view[self.header_length:self.length]
+        return total
+
+
+class FrameInjector:
+    """IP→GOOSE分散写入：缓存的以太网头模板 + 数据报memoryview，由os.writev一次写入TAP
+
+    iovec依次为 目的MAC、源MAC（解码结果）、类型/VLAN尾部模板、载荷（数据报切片），
+    每帧只原地改写VLAN模板中的两个TCI字节，不拼接或复制任何中间缓冲区
+    """
+
+    def __init__(self):
+        self.untagged_tail = bytes(GOOSE_ETHERTYPE_BYTES)
+        self.tagged_tail = bytearray(bytes(VLAN_ETHERTYPE_BYTES) + bytes(2) + bytes(GOOSE_ETHERTYPE_BYTES))
+        # os.writev使用的缓冲区列表，第1、2、4项为当前数据报的MAC和载荷切片
+        self._untagged_iov = [b'', b'', self.untagged_tail, b'']
+        self._tagged_iov = [b'', b'', self.tagged_tail, b'']
+        self.stats = {
+            'frames_written': 0,
+            'bytes_written': 0
+        }
+
+    def inject(self, fd, packet, header):
+        """按EncapCodec.decode的解码结果把数据报还原为以太网帧写入fd，返回写入字节数"""
+        dst_mac, src_mac, tci, _, offset = header
+        if tci is None:
+            iov = self._untagged_iov
+        else:
+            # 带VLAN标签：TCI原样还原（优先级 + DEI + VLAN ID）
+            tail = self.tagged_tail
+            tail[2] = tci >> 8
+            tail[3] = tci & 0xFF
+            iov = self._tagged_iov
+
+        iov[0] = dst_mac
+        iov[1] = src_mac
+        iov[3] = memoryview(packet)[offset:]
+        try:
+            written = os.writev(fd, iov)
+        finally:
+            # 不持有接收缓冲区的引用
+            iov[3] = b''
+
+        self.stats['frames_written'] += 1
+        self.stats['bytes_written'] += written
+        return written
+
+    def get_stats(self):
+        """获取注入统计信息"""
+        return dict(self.stats)
+
+
+class HeaderCache:
+    """IP→GOOSE以太网头模板缓存（有界LRU）
+
+    同一发布者（目的MAC, 源MAC, TCI）还原出的14/18字节以太网头总是相同，
+    命中时直接返回缓存的bytes，超过max_entries时淘汰最久未使用的发布者
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max(1, max_entries)
+        self.entries = OrderedDict()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0
+        }
+
+    def lookup(self, header):
+        """返回EncapCodec.decode解码结果对应的以太网头"""
+        key = header[:3]
+        entries = self.entries
+        header = entries.get(key)
+        if header is not None:
+            entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return header
+
+        self.stats['misses'] += 1
+        dst_mac, src_mac, tci = key
+        if tci is None:
+            header = dst_mac + src_mac + bytes(GOOSE_ETHERTYPE_BYTES)
+        else:
+            header = (dst_mac + src_mac + bytes(VLAN_ETHERTYPE_BYTES) +
+                      tci.to_bytes(2, 'big') + bytes(GOOSE_ETHERTYPE_BYTES))
+        entries[key] = header
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self.stats['evictions'] += 1
+        return header
+
+    def get_stats(self):
+        """获取缓存统计信息（hit_rate为命中率）"""
+        stats = dict(self.stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        stats['entries'] = len(self.entries)
+        stats['max_entries'] = self.max_entries
+        return stats
+
+
+class FrameBufferPool:
+    """预分配帧缓冲区环形池
+
+    read()依次复用池中的缓冲区，返回的FrameView在之后pool_size-1次读取内保持有效
+    """
+
+    def __init__(self, pool_size=64, buffer_size=2048):
+        self.frames = [FrameView(buffer_size) for _ in range(max(1, pool_size))]
+        self.next_index = 0
+        self.stats = {
+            'frames_read': 0,
+            'bytes_read': 0
+        }
+
+    def read(self, fd):
+        """从fd读取一帧到下一个缓冲区，无数据时返回None"""
+        frame = self.frames[self.next_index]
+        try:
+            length = os.readv(fd, frame.iov)
+        except BlockingIOError:
+            return None
+        if not length:
+            return None
+
+        frame.length = length
+        self.next_index = (self.next_index + 1) % len(self.frames)
+        self.stats['frames_read'] += 1
+        self.stats['bytes_read'] += length
+        return frame
+
+    def get_stats(self):
+        """获取缓冲池统计信息"""
+        stats = dict(self.stats)
+        stats['pool_size'] = len(self.frames)
+        stats['buffer_size'] = len(self.frames[0].buffer)
+        return stats
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+GOOSE载荷压缩
+同一发布者的GOOSE载荷逐帧几乎相同（gocbRef、datSet、goID字符串不变，allData大多不变），
+用包含各发布者样本帧的zlib预置字典压缩每个数据报，适合跨区域带宽受限的TGW链路；
+字典来自配置文件（所有桥接使用同一文件），或从流量中学习并通过字典通告（封装头标志）分发给接收端；
+通告没有确认，学习的新字典先通告若干次再用于压缩，之前继续使用旧字典（没有旧字典时原样发送）
+"""
+
+import threading
+import time
+import zlib
+
+from frame_buffers import (BUNDLE_RECORD_LENGTH, COMPRESSED_DICTIONARY_ID, DICTIONARY_CHUNK, ENCAP_FLAG_BUNDLE,
+                           ENCAP_FLAG_COMPRESSED, ENCAP_FLAG_DICTIONARY, ENCAP_MAGIC, ENCAP_V2_PREFIX,
+                           ENCAP_V2_PREFIX_LENGTH, ENCAP_V3_LENGTH, ENCAP_V3_SRC_MAC_OFFSET, ENCAP_VERSION)
+
+# zlib预置字典最大32KB（窗口大小）
+MAX_DICTIONARY_SIZE = 32768
+# 字典通告分片不超过常见MTU，避免IP分片
+DICTIONARY_ANNOUNCE_MTU = 1400
+# 新字典通告这么多次之后才用于压缩（单次通告的分片丢失不会使接收端无法解压）
+DICTIONARY_ACTIVATION_ANNOUNCES = 5
+
+
+def load_dictionary(path):
+    """读取预置字典文件（超过32KB时只保留末尾部分，zlib优先匹配字典末尾）"""
+    with open(path, 'rb') as f:
+        dictionary = f.read()
+    if not dictionary:
+        raise ValueError(f"压缩字典为空: {path}")
+    return dictionary[-MAX_DICTIONARY_SIZE:]
+
+
+class FrameCompressor:
+    """压缩发送器，接口与BatchSender一致（add/reserve/commit/flush_batch_end/get_stats），可被FrameAggregator包装
+
+    v3数据报压缩载荷，聚合包压缩全部记录；压缩后不更短或尚无字典时原样发送。
+    未配置字典时采集每个发布者（源MAC + APPID）的第一帧作为样本，learn_frames帧后生成字典，
+    之后出现新发布者时重新生成。字典的生成和通告由后台线程每announce_interval秒执行一次（不在数据面发送）：
+    新字典通告DICTIONARY_ACTIVATION_ANNOUNCES次后切换，当前字典持续通告，供重启或新加入的接收端解压。
+    压缩字节数和耗时计入stats（通常传入桥接服务的统计字典）
+    """
+
+    COUNTERS = ('compressed_datagrams', 'compression_skipped', 'compression_bytes_in',
+                'compression_bytes_out', 'compression_ns')
+
+    def __init__(self, sender, codec, level=6, dictionary=None, dictionary_size=4096, learn_frames=1000,
+                 announce_interval=0.2, stats=None):
+        if codec.version != ENCAP_VERSION:
+            raise ValueError(f"压缩需要v{ENCAP_VERSION}封装头")
+        self.sender = sender
+        self.sock = sender.sock
+        self.buffer_size = sender.buffer_size
+        self.bridge_id = codec.bridge_id
+        self.level = level
+        self.dictionary_size = max(256, min(dictionary_size, MAX_DICTIONARY_SIZE))
+        self.learn_frames = max(1, learn_frames)
+        self.announce_interval = max(0.01, announce_interval)
+        self.scratch = memoryview(bytearray(sender.buffer_size))
+
+        # 配置文件字典由所有桥接预先加载，不学习也不通告
+        self.learning = dictionary is None
+        self.samples = {}
+        self.samples_changed = False
+        self.samples_lock = threading.Lock()
+        self.frames_seen = 0
+        self.dictionaries_built = 0
+        self.dictionaries_announced = 0
+        self.announce_errors = 0
+        # 已生成、正在通告但尚未用于压缩的字典
+        self.pending_dictionary = None
+        self.pending_announces = 0
+
+        self.dictionary = None
+        self.dictionary_id = 0
+        # (字典ID, 预先加载字典的压缩对象)，由通告线程整体替换
+        self.active = None
+        if dictionary is not None:
+            self.set_dictionary(dictionary)
+
+        self.announcer = None
+        self.stopped = threading.Event()
+
+        self.stats = stats if stats is not None else {}
+        for key in self.COUNTERS:
+            self.stats.setdefault(key, 0)
+
+    @property
+    def pending(self):
+        return self.sender.pending
+
+    def set_dictionary(self, dictionary):
+        """切换当前字典并预先加载到压缩对象（每个数据报复制该对象，避免重复加载字典）"""
+        self.dictionary = bytes(dictionary)
+        self.dictionary_id = zlib.adler32(self.dictionary)
+        # 窗口按字典大小选择，memLevel 1：单个数据报很短，较小的状态复制得更快
+        wbits = min(zlib.MAX_WBITS, max(9, len(self.dictionary).bit_length() + 1))
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, -wbits, 1, zlib.Z_DEFAULT_STRATEGY, self.dictionary)
+        self.active = (self.dictionary_id, compressor)
+
+    def add(self, packet):
+        """压缩一个封装后的数据报（或聚合包）并交给BatchSender，返回本次调用发送的数量"""
+        length = len(packet)
+        flags = packet[3]
+        header_length = ENCAP_V2_PREFIX_LENGTH if flags & ENCAP_FLAG_BUNDLE else ENCAP_V3_LENGTH
+        stats = self.stats
+        stats['compression_bytes_in'] += length
+
+        if self.learning:
+            if self.announcer is None:
+                self.start_announcer()
+            self.learn(packet, flags)
+
+        active = self.active
+        if active is not None and length > header_length:
+            dictionary_id, compressor = active
+            start = time.perf_counter_ns()
+            compressor = compressor.copy()
+            body = compressor.compress(packet[header_length:]) + compressor.flush()
+            stats['compression_ns'] += time.perf_counter_ns() - start
+
+            body_offset = header_length + COMPRESSED_DICTIONARY_ID.size
+            total = body_offset + len(body)
+            if total < length:
+                slot = self.sender.reserve()
+                slot[:header_length] = packet[:header_length]
+                slot[3] = flags | ENCAP_FLAG_COMPRESSED
+                COMPRESSED_DICTIONARY_ID.pack_into(slot, header_length, dictionary_id)
+                slot[body_offset:total] = body
+                stats['compressed_datagrams'] += 1
+                stats['compression_bytes_out'] += total
+                return self.sender.commit(total)
+
+        stats['compression_skipped'] += 1
+        stats['compression_bytes_out'] += length
+        return self.sender.add(packet)
+
+    def reserve(self):
+        """返回暂存槽位（memoryview），调用方写入封装后的数据报后调用commit()"""
+        return self.scratch
+
+    def commit(self, length):
+        """压缩暂存槽位中的数据报并交给BatchSender"""
+        return self.add(self.scratch[:length])
+
+    def flush_batch_end(self):
+        """TAP批量读取结束：发送BatchSender中排队的数据报"""
+        return self.sender.flush_batch_end()
+
+    def learn(self, packet, flags):
+        """采集每个发布者的第一帧（完整v3数据报）作为字典样本"""
+        if flags & ENCAP_FLAG_BUNDLE:
+            offset = ENCAP_V2_PREFIX_LENGTH
+            end = len(packet)
+            while offset + BUNDLE_RECORD_LENGTH.size <= end:
+                length = (packet[offset] << 8) | packet[offset + 1]
+                offset += BUNDLE_RECORD_LENGTH.size
+                self.add_sample(packet[offset:offset + length])
+                offset += length
+        else:
+            self.add_sample(packet)
+
+    def add_sample(self, record):
+        """记录一个发布者的样本帧（已有样本的发布者忽略）"""
+        self.frames_seen += 1
+        if len(record) < ENCAP_V3_LENGTH + 2:
+            return
+        key = bytes(record[ENCAP_V3_SRC_MAC_OFFSET:ENCAP_V3_SRC_MAC_OFFSET + 6]) + \
+            bytes(record[ENCAP_V3_LENGTH:ENCAP_V3_LENGTH + 2])
+        if key not in self.samples:
+            with self.samples_lock:
+                self.samples[key] = bytes(record)
+                self.samples_changed = True
+
+    def start_announcer(self):
+        """首次发送时启动字典通告线程（工作进程在fork之后各自启动）"""
+        self.announcer = threading.Thread(target=self._announce_worker, name="Dictionary-Announcer", daemon=True)
+        self.announcer.start()
+
+    def _announce_worker(self):
+        while not self.stopped.wait(self.announce_interval):
+            self.refresh_dictionary()
+
+    def refresh_dictionary(self):
+        """学习阶段结束后生成字典，出现新发布者时重新生成；新字典通告足够次数后切换，否则通告当前字典"""
+        if self.frames_seen < self.learn_frames:
+            return
+        if self.samples_changed:
+            with self.samples_lock:
+                samples = b''.join(self.samples.values())
+                self.samples_changed = False
+            # 样本超过字典大小时保留最近出现的发布者
+            dictionary = samples[-self.dictionary_size:]
+            if dictionary != self.dictionary and dictionary != self.pending_dictionary:
+                self.pending_dictionary = dictionary
+                self.pending_announces = 0
+                self.dictionaries_built += 1
+
+        if self.pending_dictionary is not None:
+            if self.announce(self.pending_dictionary):
+                self.pending_announces += 1
+            if self.pending_announces >= DICTIONARY_ACTIVATION_ANNOUNCES:
+                self.set_dictionary(self.pending_dictionary)
+                self.pending_dictionary = None
+            elif self.dictionary is not None:
+                self.announce(self.dictionary)
+        elif self.dictionary is not None:
+            self.announce(self.dictionary)
+
+    def announce(self, dictionary):
+        """分片发送字典（直接通过已连接的发送套接字，不进入批量发送和聚合），返回是否全部发出"""
+        dictionary_id = zlib.adler32(dictionary)
+        header = ENCAP_V2_PREFIX.pack(ENCAP_MAGIC, ENCAP_VERSION, ENCAP_FLAG_DICTIONARY, self.bridge_id)
+        chunk_size = min(DICTIONARY_ANNOUNCE_MTU, self.buffer_size) - len(header) - DICTIONARY_CHUNK.size
+        for offset in range(0, len(dictionary), chunk_size):
+            chunk = DICTIONARY_CHUNK.pack(dictionary_id, len(dictionary), offset)
+            try:
+                self.sock.send(header + chunk + dictionary[offset:offset + chunk_size])
+            except OSError:
+                self.announce_errors += 1
+                return False
+        self.dictionaries_announced += 1
+        return True
+
+    def close(self):
+        """停止字典通告线程，发送BatchSender中排队的数据报，返回发送的数量"""
+        self.stopped.set()
+        if self.announcer:
+            self.announcer.join(1.0)
+        return self.sender.flush_batch_end()
+
+    def get_stats(self):
+        """批量发送统计，附加压缩统计（节省字节数和每个数据报的压缩耗时）"""
+        stats = self.sender.get_stats()
+        compressed = self.stats['compressed_datagrams']
+        bytes_in = self.stats['compression_bytes_in']
+        saved = bytes_in - self.stats['compression_bytes_out']
+        compression = {key: self.stats[key] for key in self.COUNTERS}
+        compression.update({
+            'level': self.level,
+            'dictionary_id': f"0x{self.dictionary_id:08X}" if self.dictionary is not None else None,
+            'dictionary_size': len(self.dictionary) if self.dictionary is not None else 0,
+            'pending_dictionary_id': (f"0x{zlib.adler32(self.pending_dictionary):08X}"
+                                      if self.pending_dictionary is not None else None),
+            'pending_announces': self.pending_announces,
+            'learning': self.learning,
+            'publishers': len(self.samples),
+            'dictionaries_built': self.dictionaries_built,
+            'dictionaries_announced': self.dictionaries_announced,
+            'announce_errors': self.announce_errors,
+            'bytes_saved': saved,
+            'ratio': self.stats['compression_bytes_out'] / bytes_in if bytes_in else 1.0,
+            # 压缩耗时包含压缩后不更短而原样发送的尝试
+            'avg_compress_us': self.stats['compression_ns'] / compressed / 1000 if compressed else 0.0
+        })
+        stats['compression'] = compression
+        return stats
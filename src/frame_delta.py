@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+GOOSE重传增量编码
+两次状态变化之间发布者重复发送相同的数据，只有sqNum和时间戳t变化；
+stNum变化（或其他字段变化）时发送完整的参考帧，重传只发送t和sqNum（增量数据报，格式见frame_buffers），
+接收端在按发布者保存的参考载荷上还原完整帧
+"""
+
+from collections import OrderedDict
+
+from frame_buffers import (DELTA_HEADER, DELTA_TIMESTAMP_LENGTH, ENCAP_FLAG_BUNDLE, ENCAP_FLAG_DELTA,
+                           ENCAP_FLAG_REFERENCE, ENCAP_V2_PREFIX_LENGTH, ENCAP_V3_LENGTH, ENCAP_V3_SRC_MAC_OFFSET,
+                           ENCAP_VERSION, MAX_DELTA_REFERENCES)
+from goose_pdu import GOOSE_HEADER_LENGTH, SQ_NUM_TAG, T_TAG, GoosePdu
+
+
+def delta_fields(payload):
+    """返回GOOSE载荷中t和sqNum值的 (t偏移, sqNum偏移, sqNum长度)，字段缺失或格式不符时返回None"""
+    pdu = GoosePdu(payload)
+    t_field = pdu.field(T_TAG)
+    sq_field = pdu.field(SQ_NUM_TAG)
+    if t_field is None or sq_field is None:
+        return None
+    t_offset, t_end = t_field
+    sq_offset, sq_end = sq_field
+    sq_length = sq_end - sq_offset
+    if t_end - t_offset != DELTA_TIMESTAMP_LENGTH or not 0 < sq_length <= 4 or sq_offset < t_offset:
+        return None
+    return t_offset, sq_offset, sq_length
+
+
+class FrameDeltaEncoder:
+    """增量编码发送器，接口与BatchSender一致（add/reserve/commit/flush_batch_end/get_stats），包装FrameAggregator等
+
+    以下情况发送完整的参考帧：发布者首次出现、t和sqNum以外的任何字节变化（stNum变化、数据变化、长度变化）、
+    sqNum不连续（发布者到本桥接之间丢帧，gap_references为False时不检查），
+    以及每refresh_frames个增量之后（接收端丢失参考帧后由此恢复）。
+    增量只引用参考帧，不链式依赖，丢失一个增量不影响后续帧。编码前后的字节数计入stats
+    """
+
+    COUNTERS = ('delta_frames', 'delta_references_sent', 'delta_bytes_in', 'delta_bytes_out')
+
+    def __init__(self, sender, codec, refresh_frames=8, stats=None, gap_references=True):
+        if codec.version != ENCAP_VERSION:
+            raise ValueError(f"增量编码需要v{ENCAP_VERSION}封装头")
+        self.sender = sender
+        self.sock = sender.sock
+        self.buffer_size = sender.buffer_size
+        self.refresh_frames = max(1, refresh_frames)
+        # 外层开启重传抑制时sqNum不连续是预期的（增量携带完整的sqNum，不依赖连续）
+        self.gap_references = gap_references
+        self.scratch = memoryview(bytearray(sender.buffer_size))
+
+        # 源MAC + APPID -> [参考帧序号, 参考载荷, t偏移, sqNum偏移, sqNum长度, 最近的sqNum, 参考帧之后的增量数]
+        self.references = OrderedDict()
+        self.reference_bytes = 0
+        self.full_reasons = {
+            'full_on_new_publisher': 0,
+            'full_on_change': 0,
+            'full_on_gap': 0,
+            'full_on_refresh': 0
+        }
+
+        self.stats = stats if stats is not None else {}
+        for key in self.COUNTERS:
+            self.stats.setdefault(key, 0)
+
+    @property
+    def pending(self):
+        return self.sender.pending
+
+    def add(self, packet):
+        """编码一个封装后的v3数据报并交给内层发送器，返回本次调用发送的数量"""
+        length = len(packet)
+        self.stats['delta_bytes_in'] += length
+        if length < ENCAP_V3_LENGTH + GOOSE_HEADER_LENGTH or packet[3] & ENCAP_FLAG_BUNDLE:
+            self.stats['delta_bytes_out'] += length
+            return self.sender.add(packet)
+
+        payload = packet[ENCAP_V3_LENGTH:]
+        key = bytes(packet[ENCAP_V3_SRC_MAC_OFFSET:ENCAP_V3_SRC_MAC_OFFSET + 6]) + bytes(payload[:2])
+        reference = self.references.get(key)
+        if reference is None:
+            return self.send_reference(packet, key, payload, 'full_on_new_publisher')
+
+        base, t_offset, sq_offset, sq_length = reference[1:5]
+        t_end = t_offset + DELTA_TIMESTAMP_LENGTH
+        sq_end = sq_offset + sq_length
+        if (len(payload) != len(base) or payload[:t_offset] != base[:t_offset] or
+                payload[t_end:sq_offset] != base[t_end:sq_offset] or payload[sq_end:] != base[sq_end:]):
+            return self.send_reference(packet, key, payload, 'full_on_change')
+        sq_num = int.from_bytes(payload[sq_offset:sq_end], 'big')
+        if self.gap_references and sq_num != reference[5] + 1:
+            return self.send_reference(packet, key, payload, 'full_on_gap')
+        if reference[6] >= self.refresh_frames:
+            return self.send_reference(packet, key, payload, 'full_on_refresh')
+
+        slot = self.sender.reserve()
+        slot[:ENCAP_V3_LENGTH] = packet[:ENCAP_V3_LENGTH]
+        slot[3] = packet[3] | ENCAP_FLAG_DELTA
+        DELTA_HEADER.pack_into(slot, ENCAP_V3_LENGTH, (payload[0] << 8) | payload[1], reference[0],
+                               t_offset, sq_offset, sq_length)
+        offset = ENCAP_V3_LENGTH + DELTA_HEADER.size
+        slot[offset:offset + DELTA_TIMESTAMP_LENGTH] = payload[t_offset:t_end]
+        offset += DELTA_TIMESTAMP_LENGTH
+        slot[offset:offset + sq_length] = payload[sq_offset:sq_end]
+        total = offset + sq_length
+        reference[5] = sq_num
+        reference[6] += 1
+        self.stats['delta_frames'] += 1
+        self.stats['delta_bytes_out'] += total
+        return self.sender.commit(total)
+
+    def send_reference(self, packet, key, payload, reason):
+        """发送带参考帧标志的完整数据报并保存为该发布者的参考；无法定位t和sqNum时原样发送"""
+        length = len(packet)
+        self.stats['delta_bytes_out'] += length
+        fields = delta_fields(payload)
+        old = self.references.pop(key, None)
+        if old is not None:
+            self.reference_bytes -= len(old[1])
+        if fields is None:
+            return self.sender.add(packet)
+
+        t_offset, sq_offset, sq_length = fields
+        sequence = int.from_bytes(packet[ENCAP_V2_PREFIX_LENGTH:ENCAP_V2_PREFIX_LENGTH + 4], 'big')
+        base = bytes(payload)
+        self.references[key] = [sequence, base, t_offset, sq_offset, sq_length,
+                                int.from_bytes(base[sq_offset:sq_offset + sq_length], 'big'), 0]
+        self.reference_bytes += len(base)
+        while len(self.references) > MAX_DELTA_REFERENCES:
+            self.reference_bytes -= len(self.references.popitem(last=False)[1][1])
+        self.full_reasons[reason] += 1
+        self.stats['delta_references_sent'] += 1
+
+        slot = self.sender.reserve()
+        slot[:length] = packet
+        slot[3] = packet[3] | ENCAP_FLAG_REFERENCE
+        return self.sender.commit(length)
+
+    def reserve(self):
+        """返回暂存槽位（memoryview），调用方写入封装后的数据报后调用commit()"""
+        return self.scratch
+
+    def commit(self, length):
+        """编码暂存槽位中的数据报并交给内层发送器"""
+        return self.add(self.scratch[:length])
+
+    def flush_batch_end(self):
+        """TAP批量读取结束：由内层发送器发送排队的数据报"""
+        return self.sender.flush_batch_end()
+
+    def close(self):
+        """关闭内层发送器（帧聚合时发送剩余的帧），返回尚未返回过的已发送帧数"""
+        close = getattr(self.sender, 'close', None)
+        return close() if close else self.sender.flush_batch_end()
+
+    def get_stats(self):
+        """内层发送器统计，附加增量编码统计（编码比例和参考帧缓存占用）"""
+        stats = self.sender.get_stats()
+        bytes_in = self.stats['delta_bytes_in']
+        delta = dict(self.full_reasons)
+        delta.update({key: self.stats[key] for key in self.COUNTERS})
+        delta.update({
+            'refresh_frames': self.refresh_frames,
+            'ratio': self.stats['delta_bytes_out'] / bytes_in if bytes_in else 1.0,
+            'references': len(self.references),
+            'reference_bytes': self.reference_bytes
+        })
+        stats['delta'] = delta
+        return stats
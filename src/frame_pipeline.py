@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+分级帧处理流水线
+读取线程只负责收取并入队，分类/封装由worker_threads个工作线程完成，
+发送由独立线程批量执行（没有分类/封装工作时为读取 → 发送两级）；各级之间为有界队列，满时按策略丢弃：
+drop_oldest丢弃队列中最旧的帧（保护类流量优先传递最新状态），
+drop_newest丢弃新到的帧（保持已排队帧的连续性）
+"""
+
+import threading
+from collections import deque
+
+DROP_POLICIES = ('drop_oldest', 'drop_newest')
+
+
+class BoundedFrameQueue:
+    """有界帧队列（满时按丢弃策略处理，不阻塞生产者）
+
+    不使用spsc_ring：drop_oldest需要生产者丢弃队首帧，而SPSC环的读索引只能由消费者推进；
+    多个分类/封装线程共用发送队列（多生产者）；IP→GOOSE方向交接的是元组而不是定长帧
+    """
+
+    def __init__(self, maxsize=1000, policy='drop_oldest'):
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"未知的丢弃策略: {policy}（可选: {', '.join(DROP_POLICIES)}）")
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.items = deque()
+        self.condition = threading.Condition()
+        self.stats = {
+            'enqueued': 0,
+            'dequeued': 0,
+            'dropped': 0,
+            'max_depth': 0
+        }
+
+    def put(self, item):
+        """入队，返回是否入队成功（drop_newest策略下队列满时返回False）"""
+        with self.condition:
+            items = self.items
+            if len(items) >= self.maxsize:
+                self.stats['dropped'] += 1
+                if self.policy == 'drop_newest':
+                    return False
+                items.popleft()
+            items.append(item)
+            self.stats['enqueued'] += 1
+            if len(items) > self.stats['max_depth']:
+                self.stats['max_depth'] = len(items)
+            self.condition.notify()
+            return True
+
+    def get_batch(self, max_items, timeout):
+        """取出最多max_items个帧；队列为空时最多等待timeout秒，超时返回空列表"""
+        with self.condition:
+            items = self.items
+            if not items:
+                self.condition.wait(timeout)
+            count = min(len(items), max_items)
+            batch = [items.popleft() for _ in range(count)]
+            self.stats['dequeued'] += count
+            return batch
+
+    def wake(self):
+        """唤醒所有等待的消费者（停止流水线时使用）"""
+        with self.condition:
+            self.condition.notify_all()
+
+    def __len__(self):
+        return len(self.items)
+
+    def get_stats(self):
+        """获取队列统计信息（depth为当前深度）"""
+        stats = dict(self.stats)
+        stats['depth'] = len(self.items)
+        stats['maxsize'] = self.maxsize
+        return stats
+
+
+class FramePipeline:
+    """读取 → 分类/封装 → 发送 三级流水线
+
+    submit()由读取线程调用；按key(item)把帧分派到固定的分类/封装线程，
+    同一发布者的帧始终由同一线程处理，经单一发送队列后仍保持顺序。
+    encode(item)返回待发送对象或None（丢弃），encode为None时不启动分类/封装线程，读取级直接入发送队列；
+    transmit(out)逐个发送，每批发送结束后调用flush()；thread_init(线程名)在每个流水线线程开始时调用（如设置CPU策略）。
+    每个线程只更新自己的计数器，get_stats()时汇总
+    """
+
+    def __init__(self, name, logger, encode, transmit, flush=None, key=None,
+                 workers=2, queue_size=1000, policy='drop_oldest', batch_size=64, thread_init=None):
+        self.name = name
+        self.logger = logger
+        self.encode = encode
+        self.transmit = transmit
+        self.flush = flush
+        self.key = key
+        self.thread_init = thread_init
+        self.batch_size = max(1, batch_size)
+        workers = max(1, workers) if encode else 0
+        self.encode_queues = [BoundedFrameQueue(queue_size, policy) for _ in range(workers)]
+        self.transmit_queue = BoundedFrameQueue(queue_size, policy)
+        self.threads = []
+        self.running = False
+        # 读取级、每个分类/封装线程和发送级各自的计数器
+        self.submit_stats = {'submitted': 0}
+        self.encode_stats = [{'encoded': 0, 'filtered': 0, 'encode_errors': 0} for _ in range(workers)]
+        self.transmit_stats = {'transmitted': 0, 'transmit_errors': 0}
+
+    def start(self):
+        """启动分类/封装线程和发送线程"""
+        self.running = True
+        for index, encode_queue in enumerate(self.encode_queues):
+            self.threads.append(threading.Thread(
+                target=self._encode_worker, args=(encode_queue, self.encode_stats[index]),
+                name=f"{self.name}-Encode-{index}", daemon=True))
+        self.threads.append(threading.Thread(
+            target=self._transmit_worker, name=f"{self.name}-Transmit", daemon=True))
+        for thread in self.threads:
+            thread.start()
+        stages = f"{len(self.encode_queues)}个分类/封装线程" if self.encode_queues else "读取 → 发送两级"
+        self.logger.info(f"🏭 流水线 {self.name} 已启动: {stages}, "
+                         f"队列上限 {self.transmit_queue.maxsize}, 策略 {self.transmit_queue.policy}")
+
+    def stop(self, timeout=2.0):
+        """停止流水线（未处理的排队帧被丢弃）"""
+        self.running = False
+        for bounded_queue in self.encode_queues + [self.transmit_queue]:
+            bounded_queue.wake()
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def submit(self, item):
+        """读取级：把帧分派到分类/封装队列（两级时直接入发送队列），返回是否入队"""
+        queues = self.encode_queues
+        self.submit_stats['submitted'] += 1
+        if not queues:
+            return self.transmit_queue.put(item)
+        if len(queues) > 1 and self.key:
+            encode_queue = queues[self.key(item) % len(queues)]
+        else:
+            encode_queue = queues[0]
+        return encode_queue.put(item)
+
+    def _encode_worker(self, encode_queue, stats):
+        """分类/封装级（stats为本线程的计数器）"""
+        if self.thread_init:
+            self.thread_init(threading.current_thread().name)
+        encode = self.encode
+        transmit_queue = self.transmit_queue
+        while self.running:
+            for item in encode_queue.get_batch(self.batch_size, 0.5):
+                try:
+                    out = encode(item)
+                except Exception as e:
+                    stats['encode_errors'] += 1
+                    self.logger.debug(f"流水线 {self.name} 分类/封装失败: {e}")
+                    continue
+                if out is None:
+                    stats['filtered'] += 1
+                    continue
+                stats['encoded'] += 1
+                transmit_queue.put(out)
+
+    def _transmit_worker(self):
+        """发送级：批量取出并发送，每批结束调用flush"""
+        if self.thread_init:
+            self.thread_init(threading.current_thread().name)
+        transmit = self.transmit
+        stats = self.transmit_stats
+        while self.running:
+            batch = self.transmit_queue.get_batch(self.batch_size, 0.5)
+            if not batch:
+                continue
+            for out in batch:
+                try:
+                    transmit(out)
+                    stats['transmitted'] += 1
+                except Exception as e:
+                    stats['transmit_errors'] += 1
+                    self.logger.debug(f"流水线 {self.name} 发送失败: {e}")
+            if self.flush:
+                self.flush()
+
+    def get_stats(self):
+        """获取流水线统计信息（汇总各线程的计数器，附加各级队列深度和丢弃数）"""
+        stats = dict(self.submit_stats)
+        stats.update(self.transmit_stats)
+        for key in ('encoded', 'filtered', 'encode_errors'):
+            stats[key] = sum(worker_stats[key] for worker_stats in self.encode_stats)
+        encode_stats = [q.get_stats() for q in self.encode_queues]
+        stats['encode_queues'] = encode_stats
+        stats['transmit_queue'] = self.transmit_queue.get_stats()
+        stats['queue_depth'] = sum(s['depth'] for s in encode_stats) + stats['transmit_queue']['depth']
+        stats['dropped'] = sum(s['dropped'] for s in encode_stats) + stats['transmit_queue']['dropped']
+        return stats
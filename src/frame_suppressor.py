@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+GOOSE重传抑制
+IEC 61850发布者在状态变化后按递增间隔快速重传，之后按心跳间隔重传，每个重传都经过TGW；
+GOOSE→IP方向始终转发stNum变化的帧和其后的前几个快速重传，
+稳态只在远端订阅者按上一个转发帧的timeAllowedtoLive（TAL）计时到期之前转发，
+使远端相邻两帧的间隔不超过TAL × suppression_tal_fraction
+"""
+
+import struct
+import time
+
+from frame_buffers import ENCAP_V2_PREFIX_LENGTH, ENCAP_V3_SRC_MAC_OFFSET, ENCAP_VERSION
+from goose_pdu import GOOSE_HEADER_LENGTH, GoosePdu, StateNumberReader
+
+# 按发布者保留的状态数上限（超过时淘汰最早出现的发布者）
+MAX_SUPPRESSION_PUBLISHERS = 4096
+# v3封装头中的按源MAC递增序号
+ENCAP_SEQUENCE = struct.Struct('!I')
+
+
+class RetransmissionSuppressor:
+    """重传抑制发送器，接口与BatchSender一致（add/reserve/commit/flush_batch_end/get_stats），包装FrameDeltaEncoder等
+
+    按发布者（源MAC + APPID）跟踪stNum和sqNum：stNum变化、sqNum回退（发布者重启）或新发布者的帧转发，
+    之后fast_retransmissions个重传也转发；其余重传预计下一个重传（按上一个到达间隔）会晚于
+    上一个转发帧的 TAL × tal_fraction 时转发，否则丢弃。无法解析stNum/sqNum的帧原样转发。
+    抑制的帧数和字节数计入stats，每个发布者的转发/抑制数由get_stats()导出。
+    封装时已分配v3序号，转发的帧按源MAC重新连续编号，接收端的序号丢失统计只反映真实丢失
+    """
+
+    COUNTERS = ('suppressed_frames', 'suppressed_bytes')
+
+    def __init__(self, sender, codec, fast_retransmissions=3, tal_fraction=0.5, stats=None):
+        self.sender = sender
+        self.sock = sender.sock
+        self.buffer_size = sender.buffer_size
+        self.header_length = codec.header_length
+        # v1封装头以源MAC开头，且没有序号
+        self.src_mac_offset = ENCAP_V3_SRC_MAC_OFFSET if codec.version == ENCAP_VERSION else 0
+        self.renumber = codec.version == ENCAP_VERSION
+        self.fast_retransmissions = max(0, fast_retransmissions)
+        self.tal_fraction = tal_fraction
+        self.reader = StateNumberReader()
+        self.slot = None
+
+        # 源MAC + APPID -> [stNum, sqNum, 状态变化后的重传数, 最近到达时间, 远端到期时间(ns), 转发数, 抑制数, gocbRef]
+        self.publishers = {}
+        # 源MAC -> 最近转发的v3序号
+        self.sequences = {}
+        self.unparsed = 0
+
+        self.stats = stats if stats is not None else {}
+        for key in self.COUNTERS:
+            self.stats.setdefault(key, 0)
+
+    @property
+    def pending(self):
+        return self.sender.pending
+
+    def add(self, packet):
+        """转发或丢弃一个封装后的数据报，返回本次调用发送的数量"""
+        length = len(packet)
+        if not self.forward(packet, length):
+            return 0
+        if not self.renumber:
+            return self.sender.add(packet)
+        # 调用方的数据报可能不可写，复制进内层槽位后重新编号
+        slot = self.sender.reserve()
+        slot[:length] = packet
+        self.renumber_sequence(slot)
+        return self.sender.commit(length)
+
+    def reserve(self):
+        """返回内层发送器的槽位（memoryview），丢弃的数据报不提交，槽位留给下一帧"""
+        self.slot = self.sender.reserve()
+        return self.slot
+
+    def commit(self, length):
+        """转发或丢弃reserve()槽位中的数据报"""
+        if not self.forward(self.slot, length):
+            return 0
+        if self.renumber:
+            self.renumber_sequence(self.slot)
+        return self.sender.commit(length)
+
+    def renumber_sequence(self, slot):
+        """按源MAC为转发的v3数据报分配连续序号（发布者首次出现时沿用封装时的序号）"""
+        mac = bytes(slot[ENCAP_V3_SRC_MAC_OFFSET:ENCAP_V3_SRC_MAC_OFFSET + 6])
+        last = self.sequences.get(mac)
+        if last is None:
+            if len(self.sequences) >= MAX_SUPPRESSION_PUBLISHERS:
+                del self.sequences[next(iter(self.sequences))]
+            self.sequences[mac] = ENCAP_SEQUENCE.unpack_from(slot, ENCAP_V2_PREFIX_LENGTH)[0]
+            return
+        sequence = (last + 1) & 0xFFFFFFFF
+        ENCAP_SEQUENCE.pack_into(slot, ENCAP_V2_PREFIX_LENGTH, sequence)
+        self.sequences[mac] = sequence
+
+    def flush_batch_end(self):
+        """TAP批量读取结束：由内层发送器发送排队的数据报"""
+        return self.sender.flush_batch_end()
+
+    def close(self):
+        """关闭内层发送器，返回尚未返回过的已发送帧数"""
+        close = getattr(self.sender, 'close', None)
+        return close() if close else self.sender.flush_batch_end()
+
+    def forward(self, packet, length):
+        """判断数据报是否转发（丢弃时计入抑制统计）"""
+        header = self.header_length
+        numbers = self.reader.read(packet, header, length) if length >= header + GOOSE_HEADER_LENGTH else None
+        if numbers is None:
+            self.unparsed += 1
+            return True
+        st_num, sq_num = numbers
+        mac = self.src_mac_offset
+        key = int.from_bytes(packet[mac:mac + 6], 'big') << 16 | packet[header] << 8 | packet[header + 1]
+        now = time.monotonic_ns()
+
+        state = self.publishers.get(key)
+        if state is None or state[0] != st_num or sq_num < state[1]:
+            # 状态变化（或发布者重启）：记录gocbRef用于按发布者统计
+            if state is None:
+                if len(self.publishers) >= MAX_SUPPRESSION_PUBLISHERS:
+                    del self.publishers[next(iter(self.publishers))]
+                state = [st_num, sq_num, 0, now, now, 0, 0, GoosePdu(packet, header, length).gocb_ref]
+                self.publishers[key] = state
+            state[0] = st_num
+            state[2] = 0
+            return self.forward_frame(state, packet, length, sq_num, now)
+
+        state[2] += 1
+        interval = now - state[3]
+        if state[2] <= self.fast_retransmissions or now + interval >= state[4]:
+            return self.forward_frame(state, packet, length, sq_num, now)
+
+        state[1] = sq_num
+        state[3] = now
+        state[6] += 1
+        self.stats['suppressed_frames'] += 1
+        self.stats['suppressed_bytes'] += length
+        return False
+
+    def forward_frame(self, state, packet, length, sq_num, now):
+        """转发一帧，按其TAL更新远端到期时间（TAL缺失时下一帧总是转发）"""
+        tal = GoosePdu(packet, self.header_length, length).time_allowed_to_live
+        state[1] = sq_num
+        state[3] = now
+        state[4] = now + int(tal * self.tal_fraction * 1000000) if tal else now
+        state[5] += 1
+        return True
+
+    def get_stats(self):
+        """内层发送器统计，附加重传抑制统计（每个发布者的转发和抑制数）"""
+        stats = self.sender.get_stats()
+        publishers = {}
+        for key, state in self.publishers.items():
+            mac = ':'.join(f"{b:02x}" for b in (key >> 16).to_bytes(6, 'big'))
+            publishers[f"{mac}/0x{key & 0xFFFF:04X}"] = {
+                'gocb_ref': state[7],
+                'st_num': state[0],
+                'forwarded': state[5],
+                'suppressed': state[6]
+            }
+        forwarded = sum(state[5] for state in self.publishers.values())
+        suppressed = sum(state[6] for state in self.publishers.values())
+        stats['suppression'] = {
+            'fast_retransmissions': self.fast_retransmissions,
+            'tal_fraction': self.tal_fraction,
+            'forwarded': forwarded,
+            'suppressed': suppressed,
+            'unparsed': self.unparsed,
+            'suppressed_ratio': suppressed / (forwarded + suppressed) if forwarded + suppressed else 0.0,
+            'publishers': publishers
+        }
+        return stats
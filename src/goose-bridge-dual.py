@@ -30,6 +30,7 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import queue
 import traceback
+import asyncio
 
 # TUN接口相关常量
 TUNSETIFF = 0x400454ca
@@ -41,6 +42,8 @@ IFF_NO_PI = 0x1000
 GOOSE_ETHERTYPE = 0x88B8
 VLAN_ETHERTYPE = 0x8100
 GOOSE_MULTICAST_MAC = bytes.fromhex('01:0C:CD:01:00:01'.replace(':', ''))
+# 统计输出中每条路径列出的重传抑制发布者数量
+SUPPRESSION_TOP_PUBLISHERS = 5
 
 class DualTAPManager:
     """双TAP接口管理器"""
@@ -59,6 +62,10 @@ class DualTAPManager:
         self.primary_fd = None
         self.backup_fd = None
         
+        # 多队列TAP：接口名 -> 队列文件描述符列表
+        self.tap_queues = config.getint('tap_queues', 1)
+        self.queue_fds = {}
+        
         # 本机IP（用于生成唯一IP）
         self.local_ip = self.get_local_ip()
         
@@ -124,9 +131,15 @@ class DualTAPManager:
         """创建单个TAP接口"""
         try:
             # 创建TAP设备
-            tun_fd = os.open('/dev/net/tun', os.O_RDWR | os.O_NONBLOCK)
-            ifr = struct.pack('16sH', interface_name.encode('utf-8'), IFF_TAP | IFF_NO_PI)
-            fcntl.ioctl(tun_fd, TUNSETIFF, ifr)
+            if self.tap_queues > 1:
+                # 多队列TAP：IP→GOOSE写入第一个队列，各队列的读取交给工作进程
+                self.queue_fds[interface_name] = open_tap_queues(interface_name, self.tap_queues)
+                tun_fd = self.queue_fds[interface_name][0]
+                self.logger.info(f"TAP接口 {interface_name} 已打开{self.tap_queues}个队列")
+            else:
+                tun_fd = os.open('/dev/net/tun', os.O_RDWR | os.O_NONBLOCK)
+                ifr = struct.pack('16sH', interface_name.encode('utf-8'), IFF_TAP | IFF_NO_PI)
+                fcntl.ioctl(tun_fd, TUNSETIFF, ifr)
             
             self.logger.info(f"TAP接口 {interface_name} 创建成功")
             
@@ -176,6 +189,11 @@ class DualTAPManager:
                 os.close(self.backup_fd)
                 self.logger.info(f"TAP接口 {self.backup_interface} 已关闭")
             
+            # 关闭多队列TAP的其余队列（第一个队列即上面的主/备描述符）
+            for fds in self.queue_fds.values():
+                for fd in fds[1:]:
+                    os.close(fd)
+            
             # 删除TAP接口
             for interface in [self.primary_interface, self.backup_interface]:
                 try:
@@ -301,6 +319,8 @@ class DualMulticastManager:
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from dual_igmp_keepalive import DualIGMPKeepaliveManager
 from dual_path_processor import DualPathProcessor
+from async_engine import AsyncioDataPlane
+from queue_workers import open_tap_queues
 
 class IndependentDualPathBridge:
     """独立双路径GOOSE桥接服务"""
@@ -328,12 +348,19 @@ class IndependentDualPathBridge:
             'uptime': 0,
             'primary_path': {},
             'backup_path': {},
-            'igmp_stats': {}
+            'igmp_stats': {},
+            'cpu_percent': 0.0
         }
+        # 进程CPU时间采样（用于计算CPU占用）
+        self.cpu_sample = (time.time(), sum(os.times()[:2]))
         
         # 监控线程
         self.monitor_thread = None
         
+        # 数据面引擎：threads（线程模型）或 asyncio（单事件循环）
+        self.engine = self.config.get('engine', 'threads')
+        self.async_plane = None
+        
         # 设置信号处理
         signal.signal(signal.SIGINT, self.signal_handler)
         signal.signal(signal.SIGTERM, self.signal_handler)
@@ -363,6 +390,48 @@ class IndependentDualPathBridge:
             'buffer_size': '2048',
             'batch_size': '10',
             'worker_threads': '4',
+            'recv_batch_size': '64',
+            'enable_recvmmsg': 'true',
+            'send_batch_size': '64',
+            'send_max_hold_us': '50',
+            'enable_sendmmsg': 'true',
+            'enable_udp_gso': 'false',
+            'enable_udp_gro': 'false',
+            'enable_zero_copy_rx': 'true',
+            'enable_writev_inject': 'true',
+            'header_cache_size': '1024',
+            'enable_aggregation': 'false',
+            'aggregate_max_bytes': '1400',
+            'aggregate_max_delay_us': '500',
+            'enable_compression': 'false',
+            'compression_level': '6',
+            'compression_dictionary': '',
+            'compression_dictionary_size': '4096',
+            'compression_learn_frames': '1000',
+            'compression_announce_interval': '0.2',
+            'enable_delta_encoding': 'false',
+            'delta_refresh_frames': '8',
+            'enable_suppression': 'false',
+            'suppression_fast_retransmissions': '3',
+            'suppression_tal_fraction': '0.5',
+            'io_mode': 'select',
+            'latency_mode': 'normal',
+            'busy_poll_budget_us': '200',
+            'so_busy_poll_us': '50',
+            'dataplane_cpus': '',
+            'housekeeping_cpus': '',
+            'dataplane_rt_priority': '0',
+            'enable_batch_classify': 'false',
+            'goose_dst_mac_range': '',
+            'goose_appid_filter': '',
+            'engine': 'threads',
+            'tap_queues': '1',
+            'queue_worker_cpus': '',
+            'multicast_shards': '1',
+            'shard_worker_cpus': '',
+            'bridge_id': '',
+            'encap_version': '3',
+            'multicast_loop': 'false',
             'max_errors': '100',
             'error_reset_interval': '300',
             'reconnect_delay': '5',
@@ -489,6 +558,8 @@ class IndependentDualPathBridge:
     def monitor_worker(self):
         """监控工作线程"""
         self.logger.info("🔍 双路径监控线程启动")
+        if self.processor:
+            self.processor.cpu_policy.apply("Dual-Path-Monitor", 'housekeeping')
         
         last_stats_time = time.time()
         stats_interval = self.config.getint('stats_export_interval', 60)
@@ -497,17 +568,7 @@ class IndependentDualPathBridge:
             try:
                 time.sleep(10)  # 每10秒检查一次
                 
-                # 更新运行时间
-                self.stats['uptime'] = time.time() - self.stats['start_time']
-                
-                # 收集统计信息
-                if self.processor:
-                    processor_stats = self.processor.get_stats()
-                    self.stats['primary_path'] = processor_stats.get('primary', {})
-                    self.stats['backup_path'] = processor_stats.get('backup', {})
-                
-                if self.igmp_keepalive:
-                    self.stats['igmp_stats'] = self.igmp_keepalive.get_stats()
+                self.collect_stats()
                 
                 # 定期导出统计信息
                 if time.time() - last_stats_time >= stats_interval:
@@ -521,6 +582,69 @@ class IndependentDualPathBridge:
         
         self.logger.info("双路径监控线程结束")
     
+    async def monitor_async(self):
+        """监控协程（asyncio模式）"""
+        self.logger.info("🔍 双路径监控协程启动")
+        
+        loop = asyncio.get_running_loop()
+        last_stats_time = time.time()
+        stats_interval = self.config.getint('stats_export_interval', 60)
+        
+        while self.running:
+            await asyncio.sleep(10)  # 每10秒检查一次
+            try:
+                self.collect_stats()
+                
+                # 定期导出统计信息（文件写入放到线程池，避免阻塞数据面）
+                if time.time() - last_stats_time >= stats_interval:
+                    await loop.run_in_executor(None, self.export_stats)
+                    self.print_stats()
+                    last_stats_time = time.time()
+                
+            except Exception as e:
+                self.logger.error(f"监控协程错误: {e}")
+        
+        self.logger.info("双路径监控协程结束")
+    
+    def collect_stats(self):
+        """汇总数据处理器和IGMP保活统计信息"""
+        # 更新运行时间
+        self.stats['uptime'] = time.time() - self.stats['start_time']
+        
+        # 收集统计信息
+        if self.processor:
+            processor_stats = self.processor.get_stats()
+            self.stats['primary_path'] = processor_stats.get('primary', {})
+            self.stats['backup_path'] = processor_stats.get('backup', {})
+            if 'reactor' in processor_stats:
+                self.stats['reactor'] = processor_stats['reactor']
+            for section in ('queue_workers', 'multicast_shards', 'busy_poll', 'cpu_policy', 'encap'):
+                if section in processor_stats:
+                    self.stats[section] = processor_stats[section]
+        
+        if self.async_plane:
+            self.stats['async_engine'] = self.async_plane.get_stats()
+        
+        if self.igmp_keepalive:
+            self.stats['igmp_stats'] = self.igmp_keepalive.get_stats()
+        
+        # 本进程CPU占用（忙轮询模式下用于评估延迟收益的代价）
+        now, cpu_time = time.time(), sum(os.times()[:2])
+        last_time, last_cpu = self.cpu_sample
+        if now > last_time:
+            self.stats['cpu_percent'] = (cpu_time - last_cpu) / (now - last_time) * 100
+        self.cpu_sample = (now, cpu_time)
+    
+    async def run_async(self):
+        """asyncio数据面：双路径四个描述符由add_reader驱动，监控和IGMP保活作为协程运行"""
+        self.async_plane = AsyncioDataPlane(self.logger)
+        self.processor.register_async_readers(self.async_plane)
+        self.async_plane.add_coroutine(self.monitor_async, "Dual-Path-Monitor")
+        if self.igmp_keepalive:
+            self.async_plane.add_coroutine(self.igmp_keepalive.run_async, "Dual-IGMP-Keepalive")
+        
+        await self.async_plane.run(lambda: self.running)
+    
     def export_stats(self):
         """导出统计信息到文件"""
         try:
@@ -554,6 +678,61 @@ class IndependentDualPathBridge:
         except Exception as e:
             self.logger.warning(f"导出统计信息失败: {e}")
     
+    def print_aggregation_stats(self, path_stats):
+        """打印一条路径的帧聚合统计（聚合包数含工作进程）"""
+        bundles = path_stats['bundles_sent']
+        max_bytes = min(self.config.getint('aggregate_max_bytes', 1400), self.config.getint('buffer_size', 2048))
+        uptime = self.stats['uptime']
+        print(f"   聚合包: {bundles} (平均 {bundles / uptime if uptime else 0:.2f}/秒, "
+              f"每包 {path_stats['bundled_frames'] / bundles:.2f}帧, "
+              f"填充率 {path_stats['bundle_bytes'] / (bundles * max_bytes) * 100:.1f}%)")
+    
+    def print_compression_stats(self, path_stats):
+        """打印一条路径的载荷压缩统计：节省的字节数与花费的CPU时间（含工作进程）"""
+        bytes_in = path_stats['compression_bytes_in']
+        saved = bytes_in - path_stats['compression_bytes_out']
+        cpu_us = path_stats['compression_ns'] / 1000
+        compressed = path_stats['compressed_datagrams']
+        print(f"   压缩: {compressed}个数据报, 节省 {saved}字节 ({saved / bytes_in * 100 if bytes_in else 0:.1f}%), "
+              f"{cpu_us / compressed if compressed else 0:.2f}µs/数据报, "
+              f"每CPU毫秒节省 {saved / cpu_us * 1000 if cpu_us else 0:.0f}字节")
+    
+    def print_delta_stats(self, path_stats):
+        """打印一条路径的增量编码统计：增量和参考帧数量及编码比例（含工作进程）"""
+        bytes_in = path_stats['delta_bytes_in']
+        print(f"   增量编码: {path_stats['delta_frames']}个增量, {path_stats['delta_references_sent']}个参考帧, "
+              f"比例 {path_stats['delta_bytes_out'] / bytes_in * 100 if bytes_in else 100:.1f}%")
+    
+    def print_delta_receive_stats(self, path_name, path_stats):
+        """打印一条路径收到的增量数据报和参考帧缓存占用"""
+        encap_stats = self.stats.get('encap', {}).get('paths', {}).get(path_name, {})
+        print(f"   收到增量数据报: {path_stats.get('delta_received', 0)} "
+              f"(缺少参考帧 {path_stats.get('delta_reference_missing', 0)}, "
+              f"参考帧缓存 {encap_stats.get('delta_references', 0)}个/{encap_stats.get('delta_reference_bytes', 0)}字节)")
+    
+    def print_suppression_stats(self, path_stats):
+        """打印一条路径的重传抑制统计（抑制帧数含工作进程）和抑制最多的发布者"""
+        suppressed = path_stats['suppressed_frames']
+        total = suppressed + path_stats.get('goose_to_ip', 0)
+        print(f"   重传抑制: {suppressed}帧 ({suppressed / total * 100 if total else 0:.1f}%), "
+              f"节省 {path_stats['suppressed_bytes']}字节")
+        suppression = (path_stats.get('send_batch') or {}).get('suppression')
+        if suppression:
+            ranked = sorted(suppression['publishers'].items(), key=lambda item: item[1]['suppressed'], reverse=True)
+            for name, publisher in ranked[:SUPPRESSION_TOP_PUBLISHERS]:
+                print(f"     {name} {publisher['gocb_ref'] or ''}: 转发 {publisher['forwarded']}, "
+                      f"抑制 {publisher['suppressed']}")
+    
+    def print_udp_offload_stats(self, path_stats):
+        """打印一条路径的UDP GSO发送和GRO接收统计（开启时）"""
+        send_stats = path_stats.get('send_batch') or {}
+        recv_stats = path_stats.get('recv_batch') or {}
+        if 'gso_sends' in send_stats:
+            print(f"   GSO发送: {send_stats['gso_sends']} (共 {send_stats['gso_segments']}个分段, "
+                  f"回退 {send_stats['gso_fallbacks']}次)")
+        if 'gro_datagrams' in recv_stats:
+            print(f"   GRO合并数据报: {recv_stats['gro_datagrams']} (拆分出 {recv_stats['gro_segments']}个)")
+    
     def print_stats(self):
         """打印统计信息"""
         uptime_str = str(timedelta(seconds=int(self.stats['uptime'])))
@@ -561,6 +740,7 @@ class IndependentDualPathBridge:
         print(f"\n📊 独立双路径GOOSE桥接服务统计:")
         print(f"   服务运行时间: {uptime_str}")
         print(f"   双路径模式: {self.config.get('dual_path_mode')}")
+        print(f"   延迟模式: {self.config.get('latency_mode', 'normal')} (CPU占用 {self.stats['cpu_percent']:.1f}%)")
         
         # 主路径统计
         primary_stats = self.stats.get('primary_path', {})
@@ -569,6 +749,24 @@ class IndependentDualPathBridge:
         print(f"   VLAN GOOSE接收: {primary_stats.get('vlan_goose_received', 0)}")
         print(f"   GOOSE→IP转换: {primary_stats.get('goose_to_ip', 0)}")
         print(f"   IP→GOOSE转换: {primary_stats.get('ip_to_goose', 0)}")
+        print(f"   回环丢弃: {primary_stats.get('loopback_dropped', 0)}")
+        print(f"   序号丢失/乱序: {primary_stats.get('sequence_lost', 0)}/{primary_stats.get('sequence_reordered', 0)}")
+        if primary_stats.get('bundles_sent'):
+            self.print_aggregation_stats(primary_stats)
+        if primary_stats.get('compression_bytes_in'):
+            self.print_compression_stats(primary_stats)
+        if primary_stats.get('compressed_received') or primary_stats.get('compression_dict_missing'):
+            print(f"   收到压缩数据报: {primary_stats.get('compressed_received', 0)} "
+                  f"(字典缺失 {primary_stats.get('compression_dict_missing', 0)})")
+        if primary_stats.get('delta_bytes_in'):
+            self.print_delta_stats(primary_stats)
+        if primary_stats.get('suppressed_frames'):
+            self.print_suppression_stats(primary_stats)
+        if primary_stats.get('delta_received') or primary_stats.get('delta_reference_missing'):
+            self.print_delta_receive_stats('primary', primary_stats)
+        self.print_udp_offload_stats(primary_stats)
+        if primary_stats.get('header_cache'):
+            print(f"   头模板缓存命中率: {primary_stats['header_cache']['hit_rate'] * 100:.1f}%")
         print(f"   错误次数: {primary_stats.get('errors', 0)}")
         
         # 备路径统计
@@ -578,6 +776,24 @@ class IndependentDualPathBridge:
         print(f"   VLAN GOOSE接收: {backup_stats.get('vlan_goose_received', 0)}")
         print(f"   GOOSE→IP转换: {backup_stats.get('goose_to_ip', 0)}")
         print(f"   IP→GOOSE转换: {backup_stats.get('ip_to_goose', 0)}")
+        print(f"   回环丢弃: {backup_stats.get('loopback_dropped', 0)}")
+        print(f"   序号丢失/乱序: {backup_stats.get('sequence_lost', 0)}/{backup_stats.get('sequence_reordered', 0)}")
+        if backup_stats.get('bundles_sent'):
+            self.print_aggregation_stats(backup_stats)
+        if backup_stats.get('compression_bytes_in'):
+            self.print_compression_stats(backup_stats)
+        if backup_stats.get('compressed_received') or backup_stats.get('compression_dict_missing'):
+            print(f"   收到压缩数据报: {backup_stats.get('compressed_received', 0)} "
+                  f"(字典缺失 {backup_stats.get('compression_dict_missing', 0)})")
+        if backup_stats.get('delta_bytes_in'):
+            self.print_delta_stats(backup_stats)
+        if backup_stats.get('suppressed_frames'):
+            self.print_suppression_stats(backup_stats)
+        if backup_stats.get('delta_received') or backup_stats.get('delta_reference_missing'):
+            self.print_delta_receive_stats('backup', backup_stats)
+        self.print_udp_offload_stats(backup_stats)
+        if backup_stats.get('header_cache'):
+            print(f"   头模板缓存命中率: {backup_stats['header_cache']['hit_rate'] * 100:.1f}%")
         print(f"   错误次数: {backup_stats.get('errors', 0)}")
         
         # IGMP保活统计
@@ -590,6 +806,37 @@ class IndependentDualPathBridge:
             print(f"   备路径保活: {backup_igmp.get('keepalive_count', 0)}次")
             print(f"   主路径重注册: {primary_igmp.get('reregister_count', 0)}次")
             print(f"   备路径重注册: {backup_igmp.get('reregister_count', 0)}次")
+        
+        # 忙轮询统计
+        busy_poll = self.stats.get('busy_poll', {})
+        for name, poll_stats in busy_poll.get('pollers', {}).items():
+            print(f"\n⚡ 忙轮询统计 ({name}, 预算{poll_stats['budget_us']}µs):")
+            print(f"   自旋命中: {poll_stats['spin_hits']}")
+            print(f"   阻塞唤醒: {poll_stats['blocking_hits']}")
+            print(f"   自旋次数: {poll_stats['spins']}")
+        
+        # CPU策略（实时读取的生效值）
+        policy_stats = self.stats.get('cpu_policy')
+        if policy_stats and (policy_stats['dataplane_cpus'] or policy_stats['housekeeping_cpus']
+                             or policy_stats['rt_priority'] > 0):
+            print(f"\n🎯 CPU策略 (数据面CPU {policy_stats['dataplane_cpus'] or '未绑定'}, "
+                  f"后台CPU {policy_stats['housekeeping_cpus'] or '未绑定'}):")
+            for name, task in policy_stats['tasks'].items():
+                if task['alive']:
+                    print(f"   {name} ({task['role']}): CPU {task['cpus']}, {task['policy']} 优先级 {task['priority']}")
+        
+        # 工作进程统计（多队列TAP / 多播分片）
+        for section, title, counter, label in (
+                ('queue_workers', "TAP队列工作进程", 'goose_to_ip', "GOOSE→IP"),
+                ('multicast_shards', "多播分片工作进程", 'ip_to_goose', "IP→GOOSE")):
+            pool_stats = self.stats.get(section)
+            if not pool_stats:
+                continue
+            print(f"\n🧵 {title} ({len(pool_stats['workers'])}个):")
+            for worker in pool_stats['workers']:
+                status = "运行" if worker['alive'] else "已退出"
+                print(f"   {worker['name']} (PID {worker['pid']}, CPU {worker['cpu']}, {status}): "
+                      f"{label} {worker['counters'][counter]}, 错误 {worker['counters']['errors']}")
     
     def start(self):
         """启动独立双路径桥接服务"""
@@ -622,23 +869,27 @@ class IndependentDualPathBridge:
                 self.logger
             )
             
-            if not self.processor.start():
+            threaded = self.engine != 'asyncio'
+            if not threaded and self.config.get('latency_mode', 'normal') == 'busy_poll':
+                self.logger.warning("asyncio引擎不支持自旋等待，忙轮询模式仅启用SO_BUSY_POLL")
+            if not self.processor.start(threaded):
                 self.logger.error("启动双路径数据处理器失败")
                 return False
             
             # 4. 启动双IGMP保活管理器
             if self.config.getboolean('enable_igmp_keepalive', True):
                 self.igmp_keepalive = DualIGMPKeepaliveManager(self.config, self.logger)
-                if self.igmp_keepalive.start():
+                if self.igmp_keepalive.start(threaded):
                     self.logger.info("🔄 双IGMP保活管理器已启动")
                 else:
                     self.logger.warning("⚠️  双IGMP保活管理器启动失败")
             
-            # 5. 启动监控线程
-            self.start_monitoring_thread()
-            
             self.running = True
             
+            # 5. 启动监控线程（asyncio引擎下由监控协程代替）
+            if threaded:
+                self.start_monitoring_thread()
+            
             self.logger.info("✅ 独立双路径GOOSE桥接服务启动成功")
             self.logger.info(f"   主路径: {self.config.get('primary_interface')} ↔ {self.config.get('primary_multicast_ip')}:{self.config.get('multicast_port')}")
             self.logger.info(f"   备路径: {self.config.get('backup_interface')} ↔ {self.config.get('backup_multicast_ip')}:{self.config.get('multicast_port')}")
@@ -646,10 +897,31 @@ class IndependentDualPathBridge:
             self.logger.info(f"     发送端: sudo ./goose_publisher_example {self.config.get('primary_interface')} & sudo ./goose_publisher_example {self.config.get('backup_interface')} &")
             self.logger.info(f"     接收端: sudo ./goose_subscriber_example {self.config.get('primary_interface')} & sudo ./goose_subscriber_example {self.config.get('backup_interface')} &")
             
+            self.logger.info(f"   数据面引擎: {self.engine}")
+            self.logger.info(f"   延迟模式: {self.config.get('latency_mode', 'normal')}")
+            self.logger.info(f"   TAP队列数: {self.tap_manager.tap_queues}")
+            self.logger.info(f"   多播接收分片: {self.config.getint('multicast_shards', 1)}")
+            self.logger.info(f"   桥接实例ID: 0x{self.processor.bridge_id:08X} (封装版本 v{self.processor.encap_version})")
+            if self.processor.enable_compression:
+                self.logger.info(f"   载荷压缩: zlib级别{self.processor.compression_level}, 预置字典来自"
+                                 f"{'配置文件' if self.processor.compression_dictionary else '流量学习'}")
+            if self.processor.enable_delta_encoding:
+                self.logger.info(f"   增量编码: stNum变化时发送参考帧, 每{self.processor.delta_refresh_frames}个增量刷新")
+            if self.processor.enable_suppression:
+                self.logger.info(f"   重传抑制: 状态变化后转发{self.processor.suppression_fast_retransmissions}个快速重传, "
+                                 f"稳态每 TAL×{self.processor.suppression_tal_fraction} 转发一帧")
+            if self.processor.enable_udp_gso or self.processor.enable_udp_gro:
+                # 内核不支持时模式中不含gso/gro
+                self.logger.info(f"   UDP GSO/GRO: 发送 {self.processor.senders['primary'].get_stats()['mode']}, "
+                                 f"接收 {self.processor.receivers['primary'].get_stats()['mode']}")
+            
             # 主循环
             try:
-                while self.running:
-                    time.sleep(1)
+                if threaded:
+                    while self.running:
+                        time.sleep(1)
+                else:
+                    asyncio.run(self.run_async())
             
             except KeyboardInterrupt:
                 self.logger.info("收到中断信号")
@@ -32,6 +32,25 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import queue
 import traceback
+import asyncio
+
+# 导入数据面组件（与主程序安装在同一目录）
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from batch_io import (BatchReceiver, BatchSender, attach_drop_filter, enable_busy_poll,
+                      create_connected_multicast_socket, create_sharded_multicast_socket)
+from event_reactor import EpollReactor, BusyPoller
+from async_engine import AsyncioDataPlane
+from queue_workers import WorkerProcessPool, open_tap_queues, parse_cpu_list
+from frame_buffers import ENCAP_EXPAND, EncapCodec, FrameBufferPool, FrameInjector, HeaderCache, generate_bridge_id
+from frame_aggregator import FrameAggregator
+from frame_compressor import FrameCompressor, load_dictionary
+from frame_delta import FrameDeltaEncoder
+from frame_suppressor import RetransmissionSuppressor
+from frame_pipeline import FramePipeline
+from cpu_policy import CPUPolicy
+from batch_classifier import BatchClassifier, HAS_NUMPY, parse_appid_ranges, parse_mac_range
+from packet_ring import PacketRxRing, PacketTxRing
+from kernel_offload import KernelOffload
 
 # TUN接口相关常量
 TUNSETIFF = 0x400454ca
@@ -43,6 +62,21 @@ IFF_NO_PI = 0x1000
 GOOSE_ETHERTYPE = 0x88B8
 VLAN_ETHERTYPE = 0x8100
 GOOSE_MULTICAST_MAC = bytes.fromhex('01:0C:CD:01:00:01'.replace(':', ''))
+
+# 多队列TAP工作进程汇总到父进程的计数器
+QUEUE_WORKER_COUNTERS = ('raw_frames', 'goose_received', 'vlan_goose_received', 'goose_to_ip',
+                         'bundles_sent', 'bundled_frames', 'bundle_bytes', 'compressed_datagrams',
+                         'compression_skipped', 'compression_bytes_in', 'compression_bytes_out',
+                         'compression_ns', 'delta_frames', 'delta_references_sent', 'delta_bytes_in',
+                         'delta_bytes_out', 'suppressed_frames', 'suppressed_bytes', 'errors')
+# 多播分片工作进程汇总到父进程的计数器
+SHARD_WORKER_COUNTERS = ('ip_to_goose', 'loopback_dropped', 'sequence_lost', 'sequence_reordered',
+                         'encap_invalid', 'bundles_received', 'compressed_received',
+                         'compression_dict_missing', 'dictionaries_received', 'delta_received',
+                         'delta_reference_missing', 'errors')
+# 统计输出中列出的重传抑制发布者数量
+SUPPRESSION_TOP_PUBLISHERS = 10
+
 class IGMPKeepaliveManager:
     """优化IGMP保活管理器 - 单端口设计，纯IGMP操作"""
     
@@ -80,8 +114,8 @@ class IGMPKeepaliveManager:
         self.consecutive_missing = 0
         self.last_tgw_check_success = True
         
-    def start(self):
-        """启动IGMP保活管理"""
+    def start(self, threaded=True):
+        """启动IGMP保活管理（threaded=False时由run_async协程驱动）"""
         if self.running:
             return True
         
@@ -99,12 +133,13 @@ class IGMPKeepaliveManager:
             self.running = True
             
             # 启动保活线程
-            self.keepalive_thread = threading.Thread(target=self._keepalive_worker, 
-                                                   name="IGMP-Keepalive", daemon=True)
-            self.keepalive_thread.start()
+            if threaded:
+                self.keepalive_thread = threading.Thread(target=self._keepalive_worker, 
+                                                       name="IGMP-Keepalive", daemon=True)
+                self.keepalive_thread.start()
             
             # 启动监控线程
-            if self.enable_tgw_monitoring:
+            if threaded and self.enable_tgw_monitoring:
                 self.monitor_thread = threading.Thread(target=self._monitor_worker, 
                                                      name="IGMP-Monitor", daemon=True)
                 self.monitor_thread.start()
@@ -186,6 +221,49 @@ class IGMPKeepaliveManager:
         
         self.logger.info("IGMP监控线程结束")
     
+    async def run_async(self):
+        """asyncio模式下的保活与监控协程（替代保活/监控线程）"""
+        self.logger.info("🔄 IGMP保活协程启动")
+        loop = asyncio.get_running_loop()
+        next_keepalive = loop.time()
+        next_monitor = loop.time() + self.monitor_interval
+        
+        while self.running:
+            now = loop.time()
+            try:
+                if now >= next_keepalive:
+                    await self._perform_keepalive_async()
+                    next_keepalive = now + self.keepalive_interval
+                
+                if self.enable_tgw_monitoring and now >= next_monitor:
+                    # aws CLI查询为阻塞子进程，放到线程池执行
+                    await loop.run_in_executor(None, self._perform_monitoring)
+                    next_monitor = now + self.monitor_interval
+            except Exception as e:
+                self.logger.error(f"IGMP保活协程错误: {e}")
+            
+            await asyncio.sleep(1)
+        
+        self.logger.info("IGMP保活协程结束")
+    
+    async def _perform_keepalive_async(self):
+        """执行IGMP保活操作（不阻塞事件循环）"""
+        try:
+            mreq = struct.pack('4sl', socket.inet_aton(self.multicast_ip), socket.INADDR_ANY)
+            
+            # 先离开再加入 (刷新IGMP注册)
+            self.keepalive_sock.setsockopt(socket.IPPROTO_IP, socket.IP_DROP_MEMBERSHIP, mreq)
+            await asyncio.sleep(0.1)
+            self.keepalive_sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+            
+            self.stats['keepalive_count'] += 1
+            self.stats['last_keepalive'] = datetime.now()
+            
+            self.logger.debug(f"IGMP保活完成: {self.multicast_ip} (第{self.stats['keepalive_count']}次)")
+            
+        except Exception as e:
+            self.logger.warning(f"IGMP保活失败: {e}")
+    
     def _perform_keepalive(self):
         """执行IGMP保活操作"""
         try:
@@ -347,6 +425,7 @@ class ProductionGOOSEBridge:
         self.running = False
         self.tun_fd = None
         self.multicast_sock = None
+        self.tx_sock = None
         self.local_ip = self.get_local_ip()
         self.tun_ip = self.generate_tun_ip()
         
@@ -354,6 +433,58 @@ class ProductionGOOSEBridge:
         self.buffer_size = self.config.getint('buffer_size', 2048)
         self.batch_size = self.config.getint('batch_size', 10)
         self.worker_threads = self.config.getint('worker_threads', 2)
+        self.recv_batch_size = self.config.getint('recv_batch_size', 64)
+        self.enable_recvmmsg = self.config.getboolean('enable_recvmmsg', True)
+        self.batch_receiver = None
+        self.send_batch_size = self.config.getint('send_batch_size', 64)
+        self.send_max_hold_us = self.config.getint('send_max_hold_us', 50)
+        self.enable_sendmmsg = self.config.getboolean('enable_sendmmsg', True)
+        self.batch_sender = None
+        self.enable_udp_gso = self.config.getboolean('enable_udp_gso', False)
+        self.enable_udp_gro = self.config.getboolean('enable_udp_gro', False)
+        # 聚合包不超过发送槽位
+        self.aggregate_max_bytes = min(self.config.getint('aggregate_max_bytes', 1400), self.buffer_size)
+        self.aggregate_max_delay_us = self.config.getint('aggregate_max_delay_us', 500)
+        self.compression_level = self.config.getint('compression_level', 6)
+        self.compression_dictionary_size = self.config.getint('compression_dictionary_size', 4096)
+        self.compression_learn_frames = self.config.getint('compression_learn_frames', 1000)
+        self.compression_announce_interval = self.config.getfloat('compression_announce_interval', 0.2)
+        self.delta_refresh_frames = self.config.getint('delta_refresh_frames', 8)
+        self.suppression_fast_retransmissions = self.config.getint('suppression_fast_retransmissions', 3)
+        self.enable_pipeline = self.config.getboolean('enable_pipeline', False)
+        self.pipeline_queue_size = self.config.getint('pipeline_queue_size', 1000)
+        self.pipeline_drop_policy = self.config.get('pipeline_drop_policy', 'drop_oldest')
+        # 流水线模式下帧在队列中等待，不能引用会被复用的缓冲池，零拷贝接收不适用
+        self.enable_zero_copy_rx = self.config.getboolean('enable_zero_copy_rx', True) and not self.enable_pipeline
+        self.frame_pool = FrameBufferPool(self.batch_size, self.buffer_size) if self.enable_zero_copy_rx else None
+        self.enable_writev_inject = self.config.getboolean('enable_writev_inject', True)
+        self.frame_injector = FrameInjector() if self.enable_writev_inject else None
+        # 不使用writev时按发布者缓存以太网头模板
+        self.header_cache = None if self.enable_writev_inject else HeaderCache(self.config.getint('header_cache_size', 1024))
+        self.io_mode = self.config.get('io_mode', 'select')
+        self.reactor = None
+        self.latency_mode = self.config.get('latency_mode', 'normal')
+        self.busy_poll_budget_us = self.config.getint('busy_poll_budget_us', 200)
+        self.so_busy_poll_us = self.config.getint('so_busy_poll_us', 50)
+        self.busy_pollers = {}
+        self.engine = self.config.get('engine', 'threads')
+        self.async_plane = None
+        self.tap_queues = self.config.getint('tap_queues', 1)
+        self.queue_worker_cpus = parse_cpu_list(self.config.get('queue_worker_cpus', ''))
+        self.tap_queue_fds = []
+        self.tap_workers = None
+        self.multicast_shards = self.config.getint('multicast_shards', 1)
+        self.shard_worker_cpus = parse_cpu_list(self.config.get('shard_worker_cpus', ''))
+        self.shard_workers = None
+        self.ingress_mode = self.config.get('ingress_mode', 'tap')
+        self.packet_interface = self.config.get('packet_interface', '') or self.tun_name
+        self.packet_ring = None
+        self.egress_mode = self.config.get('egress_mode', 'tap')
+        self.egress_interface = self.config.get('egress_interface', '')
+        self.tx_ring = None
+        self.forwarding_mode = self.config.get('forwarding_mode', 'userspace')
+        self.kernel_offload = None
+        self.multicast_loop = self.config.getboolean('multicast_loop', False)
         
         # 容错配置
         self.max_errors = self.config.getint('max_errors', 100)
@@ -366,6 +497,30 @@ class ProductionGOOSEBridge:
             'start_time': time.time(),
             'goose_to_ip': 0,
             'ip_to_goose': 0,
+            'loopback_dropped': 0,
+            'sequence_lost': 0,
+            'sequence_reordered': 0,
+            'encap_invalid': 0,
+            'bundles_sent': 0,
+            'bundled_frames': 0,
+            'bundle_bytes': 0,
+            'bundles_received': 0,
+            'compressed_datagrams': 0,
+            'compression_skipped': 0,
+            'compression_bytes_in': 0,
+            'compression_bytes_out': 0,
+            'compression_ns': 0,
+            'compressed_received': 0,
+            'compression_dict_missing': 0,
+            'dictionaries_received': 0,
+            'delta_frames': 0,
+            'delta_references_sent': 0,
+            'delta_bytes_in': 0,
+            'delta_bytes_out': 0,
+            'delta_received': 0,
+            'delta_reference_missing': 0,
+            'suppressed_frames': 0,
+            'suppressed_bytes': 0,
             'goose_received': 0,
             'vlan_goose_received': 0,
             'goose_sent': 0,
@@ -374,22 +529,66 @@ class ProductionGOOSEBridge:
             'last_error_reset': time.time(),
             'uptime': 0,
             'throughput_goose_per_sec': 0,
-            'throughput_multicast_per_sec': 0
+            'throughput_multicast_per_sec': 0,
+            'throughput_bundles_per_sec': 0,
+            'cpu_percent': 0
         }
         
+        # 封装头编解码：桥接实例ID丢弃本实例发出的数据报，按发布者序号统计丢失和乱序
+        self.encap = EncapCodec(generate_bridge_id(self.config.get('bridge_id', '')),
+                                self.config.getint('encap_version', 3), self.stats)
+        
         # 错误跟踪
         self.error_count = 0
         self.last_error_time = 0
         self.consecutive_errors = 0
         
-        # 线程和队列
-        self.frame_queue = queue.Queue(maxsize=1000)
-        self.multicast_queue = queue.Queue(maxsize=1000)
-        self.worker_threads_list = []
+        # 处理流水线（读取 → 分类/封装 → 发送），enable_pipeline时在start()中创建
+        self.goose_pipeline = None
+        self.multicast_pipeline = None
+        # 流水线多个分类/封装线程共同更新的接收计数
+        self.classify_lock = threading.Lock()
         
         # 设置日志
         self.setup_logging()
         
+        # 帧聚合：多个GOOSE帧打包进一个多播数据报（需要v3封装头）
+        self.enable_aggregation = self.config.getboolean('enable_aggregation', False)
+        if self.enable_aggregation and self.encap.version == 1:
+            self.logger.warning("帧聚合需要encap_version=3，已禁用")
+            self.enable_aggregation = False
+        # 载荷压缩：zlib预置字典，配置了字典文件时接收端同样需要加载（即使本端不压缩）
+        self.enable_compression = self.config.getboolean('enable_compression', False)
+        if self.enable_compression and self.encap.version == 1:
+            self.logger.warning("载荷压缩需要encap_version=3，已禁用")
+            self.enable_compression = False
+        self.compression_dictionary = None
+        dictionary_path = self.config.get('compression_dictionary', '')
+        if dictionary_path:
+            try:
+                self.compression_dictionary = load_dictionary(dictionary_path)
+                self.encap.add_dictionary(self.compression_dictionary)
+            except (OSError, ValueError) as e:
+                self.logger.error(f"加载压缩字典失败，已禁用压缩: {e}")
+                self.enable_compression = False
+        # 重传增量编码：stNum变化时发送完整参考帧，重传只发送t和sqNum（需要v3封装头）
+        self.enable_delta_encoding = self.config.getboolean('enable_delta_encoding', False)
+        if self.enable_delta_encoding and self.encap.version == 1:
+            self.logger.warning("增量编码需要encap_version=3，已禁用")
+            self.enable_delta_encoding = False
+        # 重传抑制：稳态重传按timeAllowedtoLive的一部分稀疏转发
+        self.enable_suppression = self.config.getboolean('enable_suppression', False)
+        self.suppression_tal_fraction = self.config.getfloat('suppression_tal_fraction', 0.5)
+        if not 0 < self.suppression_tal_fraction < 1:
+            self.logger.warning(f"suppression_tal_fraction必须在0和1之间 ({self.suppression_tal_fraction})，使用0.5")
+            self.suppression_tal_fraction = 0.5
+        
+        # 数据面/后台线程CPU亲和性与实时调度策略
+        self.cpu_policy = CPUPolicy(self.config, self.logger)
+        
+        # NumPy向量化批量分类（可选依赖）
+        self.batch_classifier = self.create_batch_classifier()
+        
         # IGMP保活管理器
         if self.config.getboolean('enable_igmp_keepalive', True):
             self.igmp_keepalive = IGMPKeepaliveManager(
@@ -427,6 +626,66 @@ class ProductionGOOSEBridge:
             'buffer_size': '2048',
             'batch_size': '10',
             'worker_threads': '2',
+            'enable_pipeline': 'false',
+            'pipeline_queue_size': '1000',
+            'pipeline_drop_policy': 'drop_oldest',
+            'dataplane_cpus': '',
+            'housekeeping_cpus': '',
+            'dataplane_rt_priority': '0',
+            'enable_batch_classify': 'false',
+            'goose_dst_mac_range': '',
+            'goose_appid_filter': '',
+            'recv_batch_size': '64',
+            'enable_recvmmsg': 'true',
+            'send_batch_size': '64',
+            'send_max_hold_us': '50',
+            'enable_sendmmsg': 'true',
+            'enable_udp_gso': 'false',
+            'enable_udp_gro': 'false',
+            'enable_zero_copy_rx': 'true',
+            'enable_writev_inject': 'true',
+            'header_cache_size': '1024',
+            'enable_aggregation': 'false',
+            'aggregate_max_bytes': '1400',
+            'aggregate_max_delay_us': '500',
+            'enable_compression': 'false',
+            'compression_level': '6',
+            'compression_dictionary': '',
+            'compression_dictionary_size': '4096',
+            'compression_learn_frames': '1000',
+            'compression_announce_interval': '0.2',
+            'enable_delta_encoding': 'false',
+            'delta_refresh_frames': '8',
+            'enable_suppression': 'false',
+            'suppression_fast_retransmissions': '3',
+            'suppression_tal_fraction': '0.5',
+            'io_mode': 'select',
+            'latency_mode': 'normal',
+            'busy_poll_budget_us': '200',
+            'so_busy_poll_us': '50',
+            'engine': 'threads',
+            'tap_queues': '1',
+            'queue_worker_cpus': '',
+            'multicast_shards': '1',
+            'shard_worker_cpus': '',
+            'ingress_mode': 'tap',
+            'packet_interface': '',
+            'packet_ring_block_size': '262144',
+            'packet_ring_blocks': '16',
+            'packet_ring_retire_ms': '1',
+            'egress_mode': 'tap',
+            'egress_interface': '',
+            'tx_ring_frames': '256',
+            'forwarding_mode': 'userspace',
+            'offload_tunnel': 'vxlan',
+            'offload_vni': '61850',
+            'offload_dstport': '4789',
+            'offload_ttl': '10',
+            'offload_underlay': '',
+            'offload_port': '',
+            'bridge_id': '',
+            'encap_version': '3',
+            'multicast_loop': 'false',
             'max_errors': '100',
             'error_reset_interval': '300',
             'reconnect_delay': '5',
@@ -541,9 +800,15 @@ class ProductionGOOSEBridge:
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                self.tun_fd = os.open('/dev/net/tun', os.O_RDWR | os.O_NONBLOCK)
-                ifr = struct.pack('16sH', self.tun_name.encode('utf-8'), IFF_TAP | IFF_NO_PI)
-                fcntl.ioctl(self.tun_fd, TUNSETIFF, ifr)
+                if self.tap_queues > 1:
+                    # 多队列TAP：每个队列一个文件描述符，IP→GOOSE写入第一个队列
+                    self.tap_queue_fds = open_tap_queues(self.tun_name, self.tap_queues)
+                    self.tun_fd = self.tap_queue_fds[0]
+                    self.logger.info(f"多队列TAP接口 {self.tun_name} 创建成功 ({self.tap_queues}个队列)")
+                else:
+                    self.tun_fd = os.open('/dev/net/tun', os.O_RDWR | os.O_NONBLOCK)
+                    ifr = struct.pack('16sH', self.tun_name.encode('utf-8'), IFF_TAP | IFF_NO_PI)
+                    fcntl.ioctl(self.tun_fd, TUNSETIFF, ifr)
                 
                 self.logger.info(f"TAP接口 {self.tun_name} 创建成功")
                 self.configure_tun_interface()
@@ -590,6 +855,34 @@ class ProductionGOOSEBridge:
             self.logger.error(f"配置TAP接口失败: {e}")
             raise
     
+    def create_batch_sender(self):
+        """在tx_sock上创建批量发送器，按需依次外加压缩、帧聚合、增量编码和重传抑制（接口相同）"""
+        sender = BatchSender(
+            self.tx_sock,
+            batch_size=self.send_batch_size,
+            buffer_size=self.buffer_size,
+            max_hold_us=self.send_max_hold_us,
+            use_sendmmsg=self.enable_sendmmsg,
+            use_gso=self.enable_udp_gso
+        )
+        if self.enable_compression:
+            # 先聚合后压缩：聚合按未压缩的载荷判断状态变化，整个聚合包一次压缩
+            sender = FrameCompressor(sender, self.encap, self.compression_level, self.compression_dictionary,
+                                     self.compression_dictionary_size, self.compression_learn_frames,
+                                     self.compression_announce_interval, self.stats)
+        if self.enable_aggregation:
+            sender = FrameAggregator(sender, self.encap, self.aggregate_max_bytes, self.aggregate_max_delay_us,
+                                     self.stats)
+        if self.enable_delta_encoding:
+            # 增量编码逐帧进行，聚合包中的记录可以是增量
+            sender = FrameDeltaEncoder(sender, self.encap, self.delta_refresh_frames, self.stats,
+                                       gap_references=not self.enable_suppression)
+        if self.enable_suppression:
+            # 最先丢弃不转发的重传，之后的编码只处理转发的帧
+            sender = RetransmissionSuppressor(sender, self.encap, self.suppression_fast_retransmissions,
+                                              self.suppression_tal_fraction, self.stats)
+        return sender
+    
     def create_multicast_socket(self):
         """创建多播套接字（优化版）"""
         max_retries = 3
@@ -612,17 +905,57 @@ class ProductionGOOSEBridge:
                 # 设置非阻塞
                 self.multicast_sock.setblocking(False)
                 
+                # 分片模式：由分片工作进程接收，本套接字只保留多播组成员关系
+                if self.multicast_shards > 1:
+                    attach_drop_filter(self.multicast_sock)
+                else:
+                    self.apply_so_busy_poll(self.multicast_sock)
+                
+                # 批量接收器（预分配缓冲区；分片模式下本套接字不接收数据，不开启GRO）
+                self.batch_receiver = BatchReceiver(
+                    self.multicast_sock,
+                    batch_size=self.recv_batch_size,
+                    buffer_size=self.buffer_size,
+                    use_recvmmsg=self.enable_recvmmsg,
+                    use_gro=self.enable_udp_gro and self.multicast_shards <= 1
+                )
+                
+                # 批量发送器（已连接的独立发送套接字）
+                self.tx_sock = create_connected_multicast_socket(self.multicast_ip, self.multicast_port,
+                                                                 loop=self.multicast_loop)
+                self.batch_sender = self.create_batch_sender()
+                
                 self.logger.info(f"多播套接字创建成功: {self.multicast_ip}:{self.multicast_port}")
+                self.logger.info(f"   批量接收: {self.batch_receiver.get_stats()['mode']} (每批最多{self.recv_batch_size}个)")
+                self.logger.info(f"   批量发送: {self.batch_sender.get_stats()['mode']} (最大保持{self.send_max_hold_us}µs)")
+                if self.enable_udp_gso and 'gso' not in self.batch_sender.get_stats()['mode']:
+                    self.logger.warning("⚠️ 内核不支持UDP GSO（或未启用sendmmsg），逐个数据报发送")
+                if self.enable_udp_gro and self.multicast_shards <= 1 and not self.batch_receiver.use_gro:
+                    self.logger.warning("⚠️ 内核不支持UDP GRO（或未启用recvmmsg），逐个数据报接收")
+                if self.enable_aggregation:
+                    max_bytes = self.batch_sender.get_stats()['aggregation']['max_bytes']
+                    self.logger.info(f"   帧聚合: 每包最多{max_bytes}字节, "
+                                     f"最长等待{self.aggregate_max_delay_us}µs, 状态变化立即发送")
+                if self.enable_compression:
+                    source = "配置文件" if self.compression_dictionary else f"学习前{self.compression_learn_frames}帧"
+                    self.logger.info(f"   载荷压缩: zlib级别{self.compression_level}, 预置字典来自{source}")
+                if self.enable_delta_encoding:
+                    self.logger.info(f"   增量编码: stNum变化时发送参考帧, 每{self.delta_refresh_frames}个增量刷新")
+                if self.enable_suppression:
+                    self.logger.info(f"   重传抑制: 状态变化后转发{self.suppression_fast_retransmissions}个快速重传, "
+                                     f"稳态每 TAL×{self.suppression_tal_fraction} 转发一帧")
                 return True
                 
             except Exception as e:
                 self.logger.error(f"创建多播套接字失败 (尝试 {attempt+1}/{max_retries}): {e}")
-                if self.multicast_sock:
-                    try:
-                        self.multicast_sock.close()
-                    except:
-                        pass
-                    self.multicast_sock = None
+                for sock in (self.multicast_sock, self.tx_sock):
+                    if sock:
+                        try:
+                            sock.close()
+                        except:
+                            pass
+                self.multicast_sock = None
+                self.tx_sock = None
                 
                 if attempt < max_retries - 1:
                     time.sleep(self.reconnect_delay)
@@ -661,6 +994,7 @@ class ProductionGOOSEBridge:
                     'has_vlan': True,
                     'vlan_id': vlan_id,
                     'vlan_priority': vlan_priority,
+                    'vlan_tci': vlan_tci,
                     'ethertype': ethertype,
                     'payload': payload,
                     'raw': frame_data,
@@ -677,6 +1011,7 @@ class ProductionGOOSEBridge:
                     'has_vlan': False,
                     'vlan_id': None,
                     'vlan_priority': None,
+                    'vlan_tci': None,
                     'ethertype': ethertype,
                     'payload': payload,
                     'raw': frame_data,
@@ -723,25 +1058,19 @@ class ProductionGOOSEBridge:
         if self.consecutive_errors > 0:
             self.consecutive_errors = 0
             self.logger.debug("连续错误计数已重置")
+    def encapsulate_goose_frame(self, goose_frame):
+        """封装数据：封装头（目的MAC、源MAC、时间戳、TCI、序号） + GOOSE载荷"""
+        return self.encap.encode(goose_frame['dst_mac'], goose_frame['src_mac'],
+                                 int(time.time() * 1000000), goose_frame['vlan_tci'],
+                                 goose_frame['payload'])
+    
     def goose_to_multicast(self, goose_frame):
         """将GOOSE帧转换为IP多播（优化版）"""
         try:
-            timestamp = struct.pack('!Q', int(time.time() * 1000000))
-            
-            # 封装数据：源MAC + 时间戳 + VLAN信息 + GOOSE载荷
-            vlan_info = struct.pack('!HH', 
-                                   1 if goose_frame['has_vlan'] else 0,
-                                   goose_frame['vlan_id'] or 0)
-            
-            packet_data = (
-                goose_frame['src_mac'] +
-                timestamp +
-                vlan_info +
-                goose_frame['payload']
-            )
+            packet_data = self.encapsulate_goose_frame(goose_frame)
             
-            self.multicast_sock.sendto(packet_data, (self.multicast_ip, self.multicast_port))
-            self.stats['goose_to_ip'] += 1
+            # 加入批量发送队列（队列满或超过最大保持时间时立即发送）
+            self.stats['goose_to_ip'] += self.batch_sender.add(packet_data)
             self.reset_error_count()  # 成功操作重置错误计数
             
             if self.debug:
@@ -755,49 +1084,87 @@ class ProductionGOOSEBridge:
             self.record_error("GOOSE转多播失败", e)
             return False
     
-    def multicast_to_goose(self, packet_data, sender_addr):
-        """将IP多播转换为GOOSE帧（优化版）"""
+    def apply_so_busy_poll(self, sock):
+        """忙轮询模式下为多播接收套接字设置SO_BUSY_POLL"""
+        if self.latency_mode != 'busy_poll' or not self.so_busy_poll_us:
+            return
         try:
-            if len(packet_data) < 18:
-                return False
+            enable_busy_poll(sock, self.so_busy_poll_us)
+            self.logger.info(f"多播套接字已启用SO_BUSY_POLL ({self.so_busy_poll_us}µs)")
+        except OSError as e:
+            self.logger.warning(f"设置SO_BUSY_POLL失败（需要CAP_NET_ADMIN或内核不支持）: {e}")
+    
+    def create_busy_poller(self, fd, name):
+        """忙轮询模式下为读取循环创建BusyPoller，普通模式返回None"""
+        if self.latency_mode != 'busy_poll':
+            return None
+        poller = BusyPoller(fd, self.busy_poll_budget_us)
+        self.busy_pollers[name] = poller
+        return poller
+    
+    def wait_readable(self, fd, busy_poller=None):
+        """等待fd可读（最多1秒）；忙轮询模式下先在预算时间内自旋"""
+        if busy_poller:
+            return busy_poller.wait()
+        ready, _, _ = select.select([fd], [], [], 1.0)
+        return bool(ready)
+    
+    def goose_frame_to_multicast(self, frame):
+        """零拷贝路径：把FrameView直接封装进批量发送器的槽位"""
+        try:
+            length = frame.encapsulate_into(self.batch_sender.reserve(), time.time_ns() // 1000, self.encap)
+            self.stats['goose_to_ip'] += self.batch_sender.commit(length)
+            self.reset_error_count()
             
-            # 解析封装的数据包
-            src_mac = packet_data[0:6]
-            timestamp = struct.unpack('!Q', packet_data[6:14])[0]
-            vlan_flag, vlan_id = struct.unpack('!HH', packet_data[14:18])
-            goose_payload = packet_data[18:]
-            
-            # 重构以太网帧
-            if vlan_flag:
-                # 带VLAN标签的帧
-                vlan_tci = (4 << 13) | (vlan_id & 0x0FFF)
-                ethernet_frame = (
-                    GOOSE_MULTICAST_MAC +
-                    src_mac +
-                    struct.pack('!H', VLAN_ETHERTYPE) +
-                    struct.pack('!H', vlan_tci) +
-                    struct.pack('!H', GOOSE_ETHERTYPE) +
-                    goose_payload
-                )
-            else:
-                # 无VLAN标签的帧
-                ethernet_frame = (
-                    GOOSE_MULTICAST_MAC +
-                    src_mac +
-                    struct.pack('!H', GOOSE_ETHERTYPE) +
-                    goose_payload
-                )
+            if self.debug:
+                src_mac_str = ':'.join(f'{b:02x}' for b in frame.src_mac)
+                vlan_str = f"VLAN {frame.vlan_id}" if frame.has_vlan else "无VLAN"
+                self.logger.debug(f"GOOSE→IP: {src_mac_str} → {self.multicast_ip}:{self.multicast_port} ({vlan_str})")
+            
+            return True
+            
+        except Exception as e:
+            self.record_error("GOOSE转多播失败", e)
+            return False
+    
+    def flush_multicast_batch(self):
+        """TAP批量读取结束，单次sendmmsg发送全部待发数据报"""
+        try:
+            self.stats['goose_to_ip'] += self.batch_sender.flush_batch_end()
+        except Exception as e:
+            self.record_error("批量发送多播失败", e)
+    
+    def multicast_to_goose(self, packet_data, sender_addr, header):
+        """将IP多播转换为GOOSE帧（header为EncapCodec.decode的结果）"""
+        try:
+            if self.tx_ring:
+                # 发送环：帧直接写入共享帧槽，本批结束时统一通知内核发送
+                if not self.tx_ring.queue(packet_data, header):
+                    return False
+                self.stats['ip_to_goose'] += 1
+                self.reset_error_count()
+                
+                if self.debug:
+                    self.log_injected_frame(header, sender_addr)
+                return True
             
-            # 写入TUN接口
-            os.write(self.tun_fd, ethernet_frame)
+            if self.frame_injector:
+                # 分散写入：缓存的头模板 + 载荷memoryview，不拼接中间缓冲区
+                self.frame_injector.inject(self.tun_fd, packet_data, header)
+                self.stats['ip_to_goose'] += 1
+                self.reset_error_count()
+                
+                if self.debug:
+                    self.log_injected_frame(header, sender_addr)
+                return True
+            
+            # 按发布者缓存的以太网头 + 载荷，一次拼接
+            os.write(self.tun_fd, self.header_cache.lookup(header) + packet_data[header[4]:])
             self.stats['ip_to_goose'] += 1
             self.reset_error_count()
             
             if self.debug:
-                src_mac_str = ':'.join(f'{b:02x}' for b in src_mac)
-                age_ms = (int(time.time() * 1000000) - timestamp) // 1000
-                vlan_str = f"VLAN {vlan_id}" if vlan_flag else "无VLAN"
-                self.logger.debug(f"IP→GOOSE: {sender_addr[0]} → {src_mac_str} (延迟: {age_ms}ms, {vlan_str})")
+                self.log_injected_frame(header, sender_addr)
             
             return True
             
@@ -805,51 +1172,71 @@ class ProductionGOOSEBridge:
             self.record_error("多播转GOOSE失败", e)
             return False
     
+    def start_kernel_offload(self):
+        """forwarding_mode=kernel时创建VXLAN/gretap隧道、网桥和GOOSE过滤器"""
+        try:
+            self.kernel_offload = KernelOffload(self.config, self.logger, self.tun_name, self.tun_ip,
+                                                self.multicast_ip, self.local_ip)
+            self.kernel_offload.setup()
+            return True
+        except Exception as e:
+            self.logger.error(f"启用内核转发失败: {e}")
+            if self.kernel_offload:
+                self.kernel_offload.teardown()
+                self.kernel_offload = None
+            return False
+    
+    def create_tx_ring(self):
+        """egress_mode=packet_ring时在egress_interface上创建TPACKET_V2发送环（每个发送进程各一个）"""
+        if not self.egress_interface or self.egress_interface == self.tun_name:
+            # 在TAP上发送的帧会回到本进程的TAP文件描述符，而不是进入网络
+            self.logger.error("发送环需要配置egress_interface为TAP以外的接口（如连接IED的物理网卡）")
+            return False
+        try:
+            self.tx_ring = PacketTxRing(
+                self.egress_interface,
+                frame_size=self.buffer_size,
+                frame_count=self.config.getint('tx_ring_frames', 256))
+        except Exception as e:
+            self.logger.error(f"创建发送环失败 ({self.egress_interface}): {e}")
+            return False
+        
+        self.logger.info(f"🛰️  TPACKET_V2发送环已创建: {self.egress_interface}, {self.tx_ring.frame_count}个帧槽")
+        return True
+    
+    def flush_goose_batch(self):
+        """多播接收批次结束，单次send()通知内核发送发送环中的全部待发帧"""
+        if not self.tx_ring:
+            return
+        try:
+            self.tx_ring.flush()
+        except Exception as e:
+            self.record_error("发送环发送失败", e)
+    
+    def log_injected_frame(self, header, sender_addr):
+        """调试日志：按解码后的封装头输出源MAC、延迟和VLAN"""
+        _, src_mac, tci, timestamp, _ = header
+        src_mac_str = ':'.join(f'{b:02x}' for b in src_mac)
+        age_ms = (int(time.time() * 1000000) - timestamp) // 1000
+        vlan_str = f"VLAN {tci & 0x0FFF} PCP {tci >> 13}" if tci is not None else "无VLAN"
+        self.logger.debug(f"IP→GOOSE: {sender_addr[0]} → {src_mac_str} (延迟: {age_ms}ms, {vlan_str})")
+    
     def tun_reader_thread(self):
         """TAP接口读取线程（高性能版）"""
         self.logger.info("TAP接口读取线程启动")
+        self.cpu_policy.apply("TUN-Reader")
         
         consecutive_timeouts = 0
         max_consecutive_timeouts = 100
+        ingress_fd, _ = self.ingress_source()
+        busy_poller = self.create_busy_poller(ingress_fd, 'tap')
         
         while self.running:
             try:
-                # 使用select进行非阻塞I/O
-                ready, _, _ = select.select([self.tun_fd], [], [], 1.0)
-                
-                if ready:
+                # 使用select进行非阻塞I/O（忙轮询模式下先自旋）
+                if self.wait_readable(ingress_fd, busy_poller):
                     consecutive_timeouts = 0
-                    
-                    # 批量读取帧以提高性能
-                    frames_processed = 0
-                    while frames_processed < self.batch_size and self.running:
-                        try:
-                            frame_data = os.read(self.tun_fd, self.buffer_size)
-                            if not frame_data:
-                                break
-                            
-                            self.stats['raw_frames'] += 1
-                            
-                            # 解析帧
-                            frame = self.parse_ethernet_frame_with_vlan(frame_data)
-                            
-                            if frame and self.is_goose_frame(frame):
-                                if frame['has_vlan']:
-                                    self.stats['vlan_goose_received'] += 1
-                                else:
-                                    self.stats['goose_received'] += 1
-                                
-                                # 转换为IP多播
-                                self.goose_to_multicast(frame)
-                            
-                            frames_processed += 1
-                            
-                        except BlockingIOError:
-                            # 没有更多数据可读
-                            break
-                        except Exception as e:
-                            self.record_error("TAP读取帧处理失败", e)
-                            break
+                    self.drain_tun_interface(self.batch_size)
                 else:
                     consecutive_timeouts += 1
                     if consecutive_timeouts > max_consecutive_timeouts:
@@ -868,38 +1255,370 @@ class ProductionGOOSEBridge:
         
         self.logger.info("TAP接口读取线程结束")
     
+    def drain_tun_interface(self, max_frames):
+        """批量读取TAP帧直到EAGAIN或达到max_frames，返回True表示可能仍有数据"""
+        if self.packet_ring:
+            return self.drain_packet_ring(max_frames)
+        if self.goose_pipeline:
+            return self.drain_tun_to_pipeline(max_frames)
+        if self.batch_classifier:
+            return self.drain_tun_classified(max_frames)
+        if self.frame_pool:
+            return self.drain_tun_zero_copy(max_frames)
+        
+        frames_processed = 0
+        more = False
+        
+        while self.running:
+            if frames_processed >= max_frames:
+                more = True
+                break
+            
+            try:
+                frame_data = os.read(self.tun_fd, self.buffer_size)
+                if not frame_data:
+                    break
+                
+                self.stats['raw_frames'] += 1
+                
+                # 解析帧
+                frame = self.parse_ethernet_frame_with_vlan(frame_data)
+                
+                if frame and self.is_goose_frame(frame):
+                    if frame['has_vlan']:
+                        self.stats['vlan_goose_received'] += 1
+                    else:
+                        self.stats['goose_received'] += 1
+                    
+                    # 转换为IP多播
+                    self.goose_to_multicast(frame)
+                
+                frames_processed += 1
+                
+            except BlockingIOError:
+                # 没有更多数据可读
+                break
+            except Exception as e:
+                self.record_error("TAP读取帧处理失败", e)
+                break
+        
+        # 本批帧统一发送
+        self.flush_multicast_batch()
+        return more
+    
+    def create_batch_classifier(self):
+        """enable_batch_classify时创建向量化分类器；未安装NumPy时回退为逐帧解析"""
+        if not self.config.getboolean('enable_batch_classify', False):
+            return None
+        if not HAS_NUMPY:
+            self.logger.warning("未安装NumPy，批量分类不可用，回退为逐帧解析 (pip install numpy)")
+            return None
+        dst_mac_range = parse_mac_range(self.config.get('goose_dst_mac_range', ''))
+        dst_mac_min, dst_mac_max = dst_mac_range or (GOOSE_MULTICAST_MAC, GOOSE_MULTICAST_MAC)
+        return BatchClassifier(
+            max_frames=self.batch_size,
+            buffer_size=self.buffer_size,
+            dst_mac_min=dst_mac_min,
+            dst_mac_max=dst_mac_max,
+            appid_ranges=parse_appid_ranges(self.config.get('goose_appid_filter', ''))
+        )
+    
+    def drain_tun_classified(self, max_frames):
+        """批量分类：整批帧读入连续缓冲区后向量化分类，只有需要转发的帧进入逐帧封装"""
+        classifier = self.batch_classifier
+        stats = self.stats
+        
+        try:
+            count = classifier.read_burst(self.tun_fd, max_frames)
+        except Exception as e:
+            self.record_error("TAP读取帧失败", e)
+            return False
+        if not count:
+            return False
+        
+        stats['raw_frames'] += count
+        classifier.classify()
+        for frame in classifier.forwarded_frames():
+            if frame.has_vlan:
+                stats['vlan_goose_received'] += 1
+            else:
+                stats['goose_received'] += 1
+            self.goose_frame_to_multicast(frame)
+        
+        # 本批帧统一发送
+        self.flush_multicast_batch()
+        return count >= max_frames
+    
+    def drain_tun_zero_copy(self, max_frames):
+        """零拷贝批量读取：帧读入预分配缓冲池，解析和封装都不复制帧数据"""
+        frames_processed = 0
+        more = False
+        frame_pool = self.frame_pool
+        stats = self.stats
+        
+        while self.running:
+            if frames_processed >= max_frames:
+                more = True
+                break
+            
+            try:
+                frame = frame_pool.read(self.tun_fd)
+                if frame is None:
+                    break
+                
+                stats['raw_frames'] += 1
+                
+                if frame.parse():
+                    if frame.has_vlan:
+                        stats['vlan_goose_received'] += 1
+                    else:
+                        stats['goose_received'] += 1
+                    
+                    # 转换为IP多播
+                    self.goose_frame_to_multicast(frame)
+                
+                frames_processed += 1
+                
+            except Exception as e:
+                self.record_error("TAP读取帧处理失败", e)
+                break
+        
+        # 本批帧统一发送
+        self.flush_multicast_batch()
+        return more
+    
+    def create_packet_ring(self):
+        """ingress_mode=packet_ring时创建TPACKET_V3抓包环
+
+        在本桥接的TAP上抓取本机发往TAP的帧（outgoing），其他接口（如物理网卡）抓取接收的帧（incoming）
+        """
+        direction = 'outgoing' if self.packet_interface == self.tun_name else 'incoming'
+        try:
+            self.packet_ring = PacketRxRing(
+                self.packet_interface,
+                direction=direction,
+                block_size=self.config.getint('packet_ring_block_size', 262144),
+                block_count=self.config.getint('packet_ring_blocks', 16),
+                frame_size=self.buffer_size,
+                retire_ms=self.config.getint('packet_ring_retire_ms', 1))
+        except Exception as e:
+            self.logger.error(f"创建抓包环失败 ({self.packet_interface}): {e}")
+            return False
+        
+        if direction == 'incoming':
+            try:
+                self.packet_ring.join_all_multicast()
+            except OSError as e:
+                self.logger.warning(f"接口 {self.packet_interface} 启用全多播接收失败: {e}")
+        if self.tap_queues > 1:
+            # 抓包环只有一个接收队列，多队列TAP工作进程不再读取
+            self.logger.warning("抓包环入口模式下不使用多队列TAP工作进程")
+            self.tap_queues = 1
+        if self.batch_classifier:
+            self.logger.info("抓包环已由内核BPF过滤GOOSE帧，批量分类不再使用")
+            self.batch_classifier = None
+        
+        self.logger.info(f"🛰️  TPACKET_V3抓包环已创建: {self.packet_interface} ({direction}), "
+                         f"{self.packet_ring.block_count}块 x {self.packet_ring.block_size // 1024}KB, "
+                         f"块超时 {self.packet_ring.retire_ms}ms")
+        return True
+    
+    def ingress_source(self):
+        """GOOSE→IP方向的读取来源：抓包环或TAP文件描述符，返回 (fd, 名称)"""
+        if self.packet_ring:
+            return self.packet_ring.fileno(), "抓包环"
+        return self.tun_fd, "TAP接口"
+    
+    def drain_packet_ring(self, max_frames):
+        """抓包环：直接在mmap块中解析和封装，每帧无系统调用"""
+        handler = self.submit_ring_frame if self.goose_pipeline else self.handle_ring_frame
+        try:
+            more = self.packet_ring.drain(handler, max_frames)
+        except Exception as e:
+            self.record_error("抓包环读取失败", e)
+            return False
+        
+        if not self.goose_pipeline:
+            # 本批帧统一发送
+            self.flush_multicast_batch()
+        return more
+    
+    def handle_ring_frame(self, frame):
+        """抓包环中的一帧：解析后直接封装进批量发送器"""
+        self.stats['raw_frames'] += 1
+        if frame.parse():
+            if frame.has_vlan:
+                self.stats['vlan_goose_received'] += 1
+            else:
+                self.stats['goose_received'] += 1
+            self.goose_frame_to_multicast(frame)
+    
+    def submit_ring_frame(self, frame):
+        """流水线模式：块归还内核后帧数据不再有效，复制后入队"""
+        self.stats['raw_frames'] += 1
+        self.goose_pipeline.submit(frame.tobytes())
+    
+    def drain_tun_to_pipeline(self, max_frames):
+        """流水线读取级：只读取原始帧并入队，分类和封装由工作线程完成"""
+        frames_processed = 0
+        submit = self.goose_pipeline.submit
+        
+        while self.running:
+            if frames_processed >= max_frames:
+                return True
+            
+            try:
+                frame_data = os.read(self.tun_fd, self.buffer_size)
+                if not frame_data:
+                    break
+            except BlockingIOError:
+                break
+            except Exception as e:
+                self.record_error("TAP读取帧失败", e)
+                break
+            
+            self.stats['raw_frames'] += 1
+            submit(frame_data)
+            frames_processed += 1
+        
+        return False
+    
+    def classify_tun_frame(self, frame_data):
+        """流水线分类/封装级：GOOSE帧返回封装后的数据报，其他帧返回None"""
+        frame = self.parse_ethernet_frame_with_vlan(frame_data)
+        if not frame or not self.is_goose_frame(frame):
+            return None
+        
+        with self.classify_lock:
+            if frame['has_vlan']:
+                self.stats['vlan_goose_received'] += 1
+            else:
+                self.stats['goose_received'] += 1
+        
+        if self.debug:
+            src_mac_str = ':'.join(f'{b:02x}' for b in frame['src_mac'])
+            vlan_str = f"VLAN {frame['vlan_id']}" if frame['has_vlan'] else "无VLAN"
+            self.logger.debug(f"GOOSE→IP: {src_mac_str} → {self.multicast_ip}:{self.multicast_port} ({vlan_str})")
+        
+        return self.encapsulate_goose_frame(frame)
+    
+    def transmit_multicast_packet(self, packet_data):
+        """流水线发送级：数据报加入批量发送器（每批结束由flush_multicast_batch发送）"""
+        try:
+            self.stats['goose_to_ip'] += self.batch_sender.add(packet_data)
+            self.reset_error_count()
+        except Exception as e:
+            self.record_error("GOOSE转多播失败", e)
+    
+    def submit_multicast_packet(self, packet_data, sender_addr):
+        """流水线读取级：解码封装头（序号检查须按接收顺序），复制数据报并入队；聚合包拆分、压缩数据报解压后逐帧入队"""
+        header = self.encap.decode(packet_data)
+        if header is ENCAP_EXPAND:
+            for record, header in self.encap.expand(packet_data):
+                self.multicast_pipeline.submit((bytes(record), sender_addr, header))
+        elif header is not None:
+            self.multicast_pipeline.submit((bytes(packet_data), sender_addr, header))
+    
+    def transmit_goose_frame(self, item):
+        """流水线发送级：还原以太网帧写入TAP接口"""
+        self.multicast_to_goose(*item)
+    
+    def start_pipelines(self):
+        """创建并启动两个方向的处理流水线（由工作进程处理的方向除外）
+
+        IP→GOOSE方向的解码和序号检查必须按接收顺序在读取级完成，没有可并行的分类工作，
+        因此为读取 → 发送两级，不启动分类线程
+        """
+        # 按源MAC末两字节分派分类/封装线程，与多播分片的哈希键一致
+        if not self.tap_workers:
+            self.goose_pipeline = FramePipeline(
+                "GOOSE-IP", self.logger,
+                encode=self.classify_tun_frame,
+                transmit=self.transmit_multicast_packet,
+                flush=self.flush_multicast_batch,
+                key=lambda frame_data: int.from_bytes(frame_data[10:12], 'big'),
+                workers=self.worker_threads,
+                queue_size=self.pipeline_queue_size,
+                policy=self.pipeline_drop_policy,
+                batch_size=self.send_batch_size,
+                thread_init=self.cpu_policy.apply)
+            self.goose_pipeline.start()
+        if not self.shard_workers:
+            self.multicast_pipeline = FramePipeline(
+                "IP-GOOSE", self.logger,
+                encode=None,
+                transmit=self.transmit_goose_frame,
+                flush=self.flush_goose_batch,
+                queue_size=self.pipeline_queue_size,
+                policy=self.pipeline_drop_policy,
+                batch_size=self.send_batch_size,
+                thread_init=self.cpu_policy.apply)
+            self.multicast_pipeline.start()
+    
+    def apply_main_cpu_policy(self):
+        """工作进程fork之后调用：登记工作进程，并为主线程设置策略
+        
+        threads引擎下主线程（及其后创建的IGMP保活等线程、aws子进程）继承后台CPU；
+        asyncio引擎下主线程即数据面事件循环
+        """
+        for pool in (self.tap_workers, self.shard_workers):
+            if pool:
+                for process in pool.processes:
+                    self.cpu_policy.track(process.name, process.pid, 'worker')
+        if self.engine == 'asyncio':
+            self.cpu_policy.apply("Asyncio-Engine")
+        else:
+            self.cpu_policy.apply("Main", 'housekeeping')
+    
+    def get_pipeline_stats(self):
+        """两个方向的流水线统计（未启用时为None）"""
+        if not (self.goose_pipeline or self.multicast_pipeline):
+            return None
+        return {
+            'policy': self.pipeline_drop_policy,
+            'goose_to_ip': self.goose_pipeline.get_stats() if self.goose_pipeline else None,
+            'ip_to_goose': self.multicast_pipeline.get_stats() if self.multicast_pipeline else None
+        }
+    
+    def drain_multicast_socket(self):
+        """批量接收多播数据直到EAGAIN"""
+        handler = self.submit_multicast_packet if self.multicast_pipeline else self.handle_multicast_packet
+        try:
+            self.batch_receiver.drain(handler, self.is_running)
+        except Exception as e:
+            self.record_error("多播数据处理失败", e)
+        if not self.multicast_pipeline:
+            # 本批帧统一发送
+            self.flush_goose_batch()
+        return False
+    
+    def is_running(self):
+        """数据面运行状态（供批量接收循环检查）"""
+        return self.running
+    
+    def handle_multicast_packet(self, packet_data, sender_addr):
+        """处理单个多播数据报（本实例发出的和无效的数据报由解码计数后丢弃，聚合包拆分、压缩数据报解压为单帧）"""
+        header = self.encap.decode(packet_data)
+        if header is ENCAP_EXPAND:
+            for record, header in self.encap.expand(packet_data):
+                self.multicast_to_goose(record, sender_addr, header)
+        elif header is not None:
+            self.multicast_to_goose(packet_data, sender_addr, header)
+    
     def multicast_reader_thread(self):
         """多播接收线程（高性能版）"""
         self.logger.info("多播接收线程启动")
+        self.cpu_policy.apply("Multicast-Reader")
         
         consecutive_timeouts = 0
         max_consecutive_timeouts = 100
+        busy_poller = self.create_busy_poller(self.multicast_sock, 'multicast')
         
         while self.running:
             try:
-                ready, _, _ = select.select([self.multicast_sock], [], [], 1.0)
-                
-                if ready:
+                if self.wait_readable(self.multicast_sock, busy_poller):
                     consecutive_timeouts = 0
-                    
-                    # 批量处理多播数据
-                    packets_processed = 0
-                    while packets_processed < self.batch_size and self.running:
-                        try:
-                            packet_data, sender_addr = self.multicast_sock.recvfrom(self.buffer_size)
-                            
-                            # 过滤本机发送的数据
-                            if sender_addr[0] != self.local_ip:
-                                self.multicast_to_goose(packet_data, sender_addr)
-                            
-                            packets_processed += 1
-                            
-                        except BlockingIOError:
-                            # 没有更多数据可读
-                            break
-                        except Exception as e:
-                            self.record_error("多播数据处理失败", e)
-                            break
+                    self.drain_multicast_socket()
                 else:
                     consecutive_timeouts += 1
                     if consecutive_timeouts > max_consecutive_timeouts:
@@ -918,6 +1637,147 @@ class ProductionGOOSEBridge:
         
         self.logger.info("多播接收线程结束")
     
+    def run_worker_loop(self, ctx, fd, drain, counters):
+        """工作进程主循环：fd可读时批量处理，每秒向父进程发布一次计数器"""
+        # CPU绑定由进程池完成，这里只设置实时优先级
+        self.cpu_policy.apply(ctx.name, pin=False)
+        for key in counters:
+            self.stats[key] = 0
+        last_publish = time.time()
+        busy_poller = self.create_busy_poller(fd, ctx.name)
+        
+        while self.running and ctx.running():
+            try:
+                if self.wait_readable(fd, busy_poller):
+                    drain()
+            except Exception as e:
+                self.record_error(f"工作进程 {ctx.name} 错误", e)
+                time.sleep(self.reconnect_delay)
+            
+            if time.time() - last_publish >= 1.0:
+                ctx.publish(self.stats)
+                last_publish = time.time()
+        
+        ctx.publish(self.stats)
+    
+    def tap_queue_worker(self, ctx):
+        """多队列TAP工作进程：独立处理一个队列的GOOSE→IP转发"""
+        self.tun_fd = self.tap_queue_fds[ctx.index]
+        self.logger.info(f"TAP队列工作进程 {ctx.name} 启动 (PID {os.getpid()})")
+        
+        # 每个进程使用独立的多播发送套接字
+        self.tx_sock = create_connected_multicast_socket(self.multicast_ip, self.multicast_port,
+                                                         loop=self.multicast_loop)
+        self.batch_sender = self.create_batch_sender()
+        
+        self.run_worker_loop(ctx, self.tun_fd, lambda: self.drain_tun_interface(self.batch_size),
+                             QUEUE_WORKER_COUNTERS)
+        if hasattr(self.batch_sender, 'close'):
+            # 发送聚合包中剩余的帧后再发布一次计数器
+            self.stats['goose_to_ip'] += self.batch_sender.close()
+            ctx.publish(self.stats)
+        self.logger.info(f"TAP队列工作进程 {ctx.name} 结束")
+    
+    def multicast_shard_worker(self, ctx):
+        """多播分片工作进程：接收源MAC哈希属于本分片的数据报并写入TAP"""
+        self.multicast_sock = create_sharded_multicast_socket(
+            self.multicast_ip, self.multicast_port, ctx.index, self.multicast_shards)
+        self.apply_so_busy_poll(self.multicast_sock)
+        # 分片套接字不开启GRO：分片过滤器只检查合并数据报的第一个分段
+        self.batch_receiver = BatchReceiver(
+            self.multicast_sock,
+            batch_size=self.recv_batch_size,
+            buffer_size=self.buffer_size,
+            use_recvmmsg=self.enable_recvmmsg
+        )
+        
+        # 多队列TAP时写入各自的队列
+        if self.tap_queue_fds:
+            self.tun_fd = self.tap_queue_fds[ctx.index % len(self.tap_queue_fds)]
+        # 发送环不能跨进程共用，每个分片进程创建自己的发送环
+        if self.tx_ring and not self.create_tx_ring():
+            return
+        
+        self.logger.info(f"多播分片工作进程 {ctx.name} 启动 (PID {os.getpid()}, 分片 {ctx.index}/{self.multicast_shards})")
+        self.run_worker_loop(ctx, self.multicast_sock, self.drain_multicast_socket, SHARD_WORKER_COUNTERS)
+        self.multicast_sock.close()
+        self.logger.info(f"多播分片工作进程 {ctx.name} 结束")
+    
+    def start_tap_workers(self):
+        """为每个TAP队列启动一个工作进程（须在启动其他线程之前调用）"""
+        self.tap_workers = WorkerProcessPool("TAP-Queue", self.logger, QUEUE_WORKER_COUNTERS,
+                                             cpus=self.queue_worker_cpus)
+        self.tap_workers.start([
+            (f"q{index}", 'tap', self.tap_queue_worker)
+            for index in range(len(self.tap_queue_fds))
+        ])
+    
+    def start_shard_workers(self):
+        """启动多播分片工作进程（须在启动其他线程之前调用）"""
+        self.shard_workers = WorkerProcessPool("Multicast-Shard", self.logger, SHARD_WORKER_COUNTERS,
+                                               cpus=self.shard_worker_cpus)
+        self.shard_workers.start([
+            (f"shard{index}", 'multicast', self.multicast_shard_worker)
+            for index in range(self.multicast_shards)
+        ])
+    
+    def refresh_worker_stats(self):
+        """把工作进程的计数器汇总到本进程统计中，返回各进程池的汇总明细"""
+        pools = {}
+        for section, pool, group, counters in (
+                ('queue_workers', self.tap_workers, 'tap', QUEUE_WORKER_COUNTERS),
+                ('multicast_shards', self.shard_workers, 'multicast', SHARD_WORKER_COUNTERS)):
+            if not pool:
+                continue
+            aggregated = pool.aggregate()
+            totals = aggregated['totals'].get(group, {})
+            for key in counters:
+                if key != 'errors':
+                    self.stats[key] = totals.get(key, 0)
+            pools[section] = aggregated
+        return pools
+    
+    def reactor_thread(self):
+        """epoll数据面线程（TAP接口与多播套接字共用一个边沿触发事件循环）"""
+        self.logger.info("epoll数据面线程启动")
+        self.cpu_policy.apply("Data-Plane-Reactor")
+        
+        busy_poll_us = self.busy_poll_budget_us if self.latency_mode == 'busy_poll' else 0
+        self.reactor = EpollReactor(self.logger, timeout=1.0, busy_poll_us=busy_poll_us)
+        if not self.tap_workers:
+            ingress_fd, ingress_name = self.ingress_source()
+            self.reactor.register(ingress_fd, lambda: self.drain_tun_interface(self.batch_size), ingress_name)
+        if not self.shard_workers:
+            self.reactor.register(self.multicast_sock, self.drain_multicast_socket, "多播套接字")
+        
+        idle_state = {'timeouts': 0}
+        max_consecutive_timeouts = 100
+        
+        def on_idle():
+            idle_state['timeouts'] += 1
+            if idle_state['timeouts'] > max_consecutive_timeouts:
+                self.logger.warning("数据面长时间无数据，检查接口状态")
+                idle_state['timeouts'] = 0
+                if not self.health_check_tun_interface():
+                    self.logger.error("TAP接口健康检查失败")
+                    self.reactor.stop()
+                elif not self.health_check_multicast_socket():
+                    self.logger.error("多播套接字健康检查失败")
+                    self.reactor.stop()
+        
+        while self.running and self.reactor.active:
+            try:
+                self.reactor.run(self.is_running, on_idle)
+            except Exception as e:
+                self.record_error("epoll数据面线程错误", e)
+                if self.consecutive_errors > 10:
+                    self.logger.error("epoll数据面连续错误过多，线程退出")
+                    break
+                time.sleep(self.reconnect_delay)
+        
+        self.reactor.close()
+        self.logger.info("epoll数据面线程结束")
+    
     def health_check_tun_interface(self):
         """TAP接口健康检查"""
         try:
@@ -959,48 +1819,151 @@ class ProductionGOOSEBridge:
     def stats_monitor_thread(self):
         """统计监控线程"""
         self.logger.info("统计监控线程启动")
+        self.cpu_policy.apply("Stats-Monitor", 'housekeeping')
         
-        last_goose_count = 0
-        last_multicast_count = 0
-        last_time = time.time()
+        counters = self.new_stats_counters()
         
         while self.running:
             try:
                 time.sleep(self.health_check_interval)
-                
-                current_time = time.time()
-                time_diff = current_time - last_time
-                
-                # 计算吞吐量
-                goose_diff = self.stats['goose_to_ip'] - last_goose_count
-                multicast_diff = self.stats['ip_to_goose'] - last_multicast_count
-                
-                self.stats['throughput_goose_per_sec'] = goose_diff / time_diff
-                self.stats['throughput_multicast_per_sec'] = multicast_diff / time_diff
-                self.stats['uptime'] = current_time - self.stats['start_time']
-                
-                # 更新计数器
-                last_goose_count = self.stats['goose_to_ip']
-                last_multicast_count = self.stats['ip_to_goose']
-                last_time = current_time
+                self.update_stats(counters)
                 
                 # 导出统计信息
                 if self.config.getboolean('enable_stats_export', True):
                     self.export_stats()
                 
-                # 记录健康状态
-                if self.debug or (current_time - self.stats['start_time']) % 300 < self.health_check_interval:
-                    self.logger.info(f"服务健康状态 - "
-                                   f"运行时间: {self.stats['uptime']:.0f}s, "
-                                   f"GOOSE处理: {self.stats['goose_to_ip']}, "
-                                   f"多播处理: {self.stats['ip_to_goose']}, "
-                                   f"错误: {self.stats['errors']}")
-                
             except Exception as e:
                 self.record_error("统计监控线程错误", e)
         
         self.logger.info("统计监控线程结束")
     
+    async def stats_monitor_async(self):
+        """统计监控协程（asyncio模式）"""
+        self.logger.info("统计监控协程启动")
+        
+        loop = asyncio.get_running_loop()
+        counters = self.new_stats_counters()
+        
+        while self.running:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                self.update_stats(counters)
+                
+                # 导出统计信息（文件写入放到线程池，避免阻塞数据面）
+                if self.config.getboolean('enable_stats_export', True):
+                    await loop.run_in_executor(None, self.export_stats)
+                
+            except Exception as e:
+                self.record_error("统计监控协程错误", e)
+        
+        self.logger.info("统计监控协程结束")
+    
+    async def health_check_async(self):
+        """健康检查协程（asyncio模式）：长时间无数据时检查TAP接口和多播套接字"""
+        loop = asyncio.get_running_loop()
+        last_activity = (self.stats['raw_frames'], self.stats['ip_to_goose'])
+        idle_checks = 0
+        
+        while self.running:
+            await asyncio.sleep(self.health_check_interval)
+            
+            activity = (self.stats['raw_frames'], self.stats['ip_to_goose'])
+            if activity != last_activity:
+                last_activity = activity
+                idle_checks = 0
+                continue
+            
+            idle_checks += 1
+            if idle_checks * self.health_check_interval >= 100:
+                self.logger.warning("数据面长时间无数据，检查接口状态")
+                idle_checks = 0
+                if not await loop.run_in_executor(None, self.health_check_tun_interface):
+                    self.logger.error("TAP接口健康检查失败")
+                if not self.health_check_multicast_socket():
+                    self.logger.error("多播套接字健康检查失败")
+    
+    def new_stats_counters(self):
+        """吞吐量计算的上一次计数快照"""
+        cpu_times = os.times()
+        return {
+            'goose_to_ip': self.stats['goose_to_ip'],
+            'ip_to_goose': self.stats['ip_to_goose'],
+            'bundles_sent': self.stats['bundles_sent'],
+            'cpu_time': cpu_times.user + cpu_times.system,
+            'time': time.time()
+        }
+    
+    def update_stats(self, counters):
+        """计算吞吐量和运行时间，并定期记录健康状态"""
+        self.refresh_worker_stats()
+        if self.kernel_offload:
+            self.kernel_offload.refresh(self.stats)
+        
+        current_time = time.time()
+        time_diff = current_time - counters['time']
+        
+        # 计算吞吐量
+        goose_diff = self.stats['goose_to_ip'] - counters['goose_to_ip']
+        multicast_diff = self.stats['ip_to_goose'] - counters['ip_to_goose']
+        
+        self.stats['throughput_goose_per_sec'] = goose_diff / time_diff
+        self.stats['throughput_multicast_per_sec'] = multicast_diff / time_diff
+        self.stats['throughput_bundles_per_sec'] = (self.stats['bundles_sent'] - counters['bundles_sent']) / time_diff
+        self.stats['uptime'] = current_time - self.stats['start_time']
+        
+        # 本进程CPU占用（忙轮询模式的代价）
+        cpu_times = os.times()
+        cpu_time = cpu_times.user + cpu_times.system
+        self.stats['cpu_percent'] = (cpu_time - counters['cpu_time']) / time_diff * 100
+        
+        # 更新计数器
+        counters['goose_to_ip'] = self.stats['goose_to_ip']
+        counters['ip_to_goose'] = self.stats['ip_to_goose']
+        counters['bundles_sent'] = self.stats['bundles_sent']
+        counters['cpu_time'] = cpu_time
+        counters['time'] = current_time
+        
+        # 记录健康状态
+        if self.debug or (current_time - self.stats['start_time']) % 300 < self.health_check_interval:
+            self.logger.info(f"服务健康状态 - "
+                           f"运行时间: {self.stats['uptime']:.0f}s, "
+                           f"GOOSE处理: {self.stats['goose_to_ip']}, "
+                           f"多播处理: {self.stats['ip_to_goose']}, "
+                           f"错误: {self.stats['errors']}")
+    
+    async def run_async(self):
+        """asyncio数据面：TAP接口和多播套接字由add_reader驱动，后台任务作为协程运行
+        
+        需要先创建TAP接口和多播套接字；多个桥接实例可通过asyncio.gather在同一事件循环中运行
+        """
+        self.async_plane = AsyncioDataPlane(self.logger)
+        if not self.tap_workers:
+            ingress_fd, ingress_name = self.ingress_source()
+            self.async_plane.add_reader(ingress_fd, lambda: self.drain_tun_interface(self.batch_size), ingress_name)
+        if not self.shard_workers:
+            self.async_plane.add_reader(self.multicast_sock, self.drain_multicast_socket, "多播套接字")
+        self.async_plane.add_coroutine(self.stats_monitor_async, "Stats-Monitor")
+        self.async_plane.add_coroutine(self.health_check_async, "Health-Check")
+        
+        if self.igmp_keepalive:
+            if self.igmp_keepalive.start(threaded=False):
+                self.async_plane.add_coroutine(self.igmp_keepalive.run_async, "IGMP-Keepalive")
+                self.logger.info("🔄 IGMP保活管理器已启动 (协程模式)")
+            else:
+                self.logger.warning("⚠️  IGMP保活管理器启动失败")
+        
+        last_stats_time = time.time()
+        
+        def keep_running():
+            nonlocal last_stats_time
+            # 定期打印统计信息
+            if time.time() - last_stats_time > 300:  # 每5分钟
+                self.print_stats()
+                last_stats_time = time.time()
+            return self.running
+        
+        await self.async_plane.run(keep_running)
+    
     def export_stats(self):
         """导出统计信息到文件"""
         try:
@@ -1009,6 +1972,8 @@ class ProductionGOOSEBridge:
             # 确保目录存在
             os.makedirs(os.path.dirname(stats_file), exist_ok=True)
             
+            worker_pools = self.refresh_worker_stats()
+            
             # 准备统计数据
             export_data = {
                 'timestamp': datetime.now().isoformat(),
@@ -1016,9 +1981,34 @@ class ProductionGOOSEBridge:
                     'interface': self.tun_name,
                     'multicast_address': f"{self.multicast_ip}:{self.multicast_port}",
                     'local_ip': self.local_ip,
-                    'tun_ip': self.tun_ip
+                    'tun_ip': self.tun_ip,
+                    'bridge_id': f"0x{self.encap.bridge_id:08X}",
+                    'encap_version': self.encap.version,
+                    'multicast_loop': self.multicast_loop
                 },
                 'statistics': dict(self.stats),
+                'recv_batch': self.batch_receiver.get_stats() if self.batch_receiver else None,
+                'send_batch': self.batch_sender.get_stats() if self.batch_sender else None,
+                'frame_pool': self.frame_pool.get_stats() if self.frame_pool else None,
+                'frame_injector': self.frame_injector.get_stats() if self.frame_injector else None,
+                'encap': self.encap.get_stats(),
+                'header_cache': self.header_cache.get_stats() if self.header_cache else None,
+                'batch_classifier': self.batch_classifier.get_stats() if self.batch_classifier else None,
+                'packet_ring': self.packet_ring.get_stats() if self.packet_ring else None,
+                'tx_ring': self.tx_ring.get_stats() if self.tx_ring else None,
+                'kernel_offload': self.kernel_offload.get_stats() if self.kernel_offload else None,
+                'reactor': self.reactor.get_stats() if self.reactor else None,
+                'async_engine': self.async_plane.get_stats() if self.async_plane else None,
+                'busy_poll': {
+                    'latency_mode': self.latency_mode,
+                    'budget_us': self.busy_poll_budget_us,
+                    'so_busy_poll_us': self.so_busy_poll_us,
+                    'pollers': {name: poller.get_stats() for name, poller in self.busy_pollers.items()}
+                },
+                'queue_workers': worker_pools.get('queue_workers'),
+                'multicast_shards': worker_pools.get('multicast_shards'),
+                'pipeline': self.get_pipeline_stats(),
+                'cpu_policy': self.cpu_policy.get_stats(),
                 'health': {
                     'running': self.running,
                     'error_rate': self.stats['errors'] / max(self.stats['uptime'], 1),
@@ -1035,6 +2025,9 @@ class ProductionGOOSEBridge:
     
     def print_stats(self):
         """打印统计信息"""
+        worker_pools = self.refresh_worker_stats()
+        if self.kernel_offload:
+            self.kernel_offload.refresh(self.stats)
         uptime_str = str(timedelta(seconds=int(self.stats['uptime'])))
         
         print(f"\n📊 生产级GOOSE桥接服务统计:")
@@ -1047,10 +2040,187 @@ class ProductionGOOSEBridge:
         print(f"   VLAN GOOSE帧: {self.stats['vlan_goose_received']}")
         print(f"   GOOSE→IP转换: {self.stats['goose_to_ip']}")
         print(f"   IP→GOOSE转换: {self.stats['ip_to_goose']}")
+        print(f"   回环丢弃: {self.stats['loopback_dropped']} (桥接实例ID 0x{self.encap.bridge_id:08X})")
+        print(f"   序号丢失/乱序: {self.stats['sequence_lost']}/{self.stats['sequence_reordered']} "
+              f"(无效封装 {self.stats['encap_invalid']})")
+        print(f"   收到聚合包: {self.stats['bundles_received']}")
+        print(f"   收到压缩数据报: {self.stats['compressed_received']} (字典缺失 {self.stats['compression_dict_missing']}, "
+              f"收到字典 {self.stats['dictionaries_received']})")
+        encap_stats = self.encap.get_stats()
+        print(f"   收到增量数据报: {self.stats['delta_received']} (缺少参考帧 {self.stats['delta_reference_missing']}, "
+              f"参考帧缓存 {encap_stats['delta_references']}个/{encap_stats['delta_reference_bytes']}字节)")
         print(f"   GOOSE吞吐量: {self.stats['throughput_goose_per_sec']:.2f}/秒")
         print(f"   多播吞吐量: {self.stats['throughput_multicast_per_sec']:.2f}/秒")
         print(f"   错误次数: {self.stats['errors']}")
         print(f"   连续错误: {self.consecutive_errors}")
+        print(f"   延迟模式: {self.latency_mode} (CPU占用 {self.stats['cpu_percent']:.1f}%)")
+        
+        # 忙轮询统计
+        for name, poller in self.busy_pollers.items():
+            poll_stats = poller.get_stats()
+            print(f"\n⚡ 忙轮询统计 ({name}, 预算{poll_stats['budget_us']}µs):")
+            print(f"   自旋命中: {poll_stats['spin_hits']}")
+            print(f"   阻塞唤醒: {poll_stats['blocking_hits']}")
+            print(f"   自旋次数: {poll_stats['spins']}")
+        
+        # 内核转发统计（设备计数器）
+        if self.kernel_offload:
+            offload_stats = self.kernel_offload.get_stats()
+            print(f"\n🧩 内核转发统计 ({offload_stats['tunnel']}):")
+            for device, counters in offload_stats['devices'].items():
+                if counters:
+                    print(f"   {device}: 接收 {counters['rx_packets']}, 发送 {counters['tx_packets']}, "
+                          f"丢弃 {counters['rx_dropped'] + counters['tx_dropped']}")
+        
+        # 抓包环统计
+        if self.packet_ring:
+            ring_stats = self.packet_ring.get_stats()
+            print(f"\n🛰️  抓包环统计 ({ring_stats['interface']}, {ring_stats['direction']}):")
+            print(f"   处理块数: {ring_stats['blocks']}, 平均每块: {ring_stats['avg_block']:.2f}帧")
+            print(f"   抓取帧数: {ring_stats['frames']}, 网卡剥离VLAN: {ring_stats['vlan_offloaded']}")
+            print(f"   内核丢弃: {ring_stats['kernel']['drops']}")
+        
+        # 头模板缓存统计
+        if self.header_cache:
+            cache_stats = self.header_cache.get_stats()
+            print(f"\n🗂️  头模板缓存统计 ({cache_stats['entries']}/{cache_stats['max_entries']}个发布者):")
+            print(f"   命中: {cache_stats['hits']}, 未命中: {cache_stats['misses']}, 淘汰: {cache_stats['evictions']}")
+            print(f"   命中率: {cache_stats['hit_rate'] * 100:.1f}%")
+        
+        # 发送环统计
+        if self.tx_ring:
+            tx_ring_stats = self.tx_ring.get_stats()
+            print(f"\n🛰️  发送环统计 ({tx_ring_stats['interface']}, {tx_ring_stats['frame_count']}个帧槽):")
+            print(f"   排队帧数: {tx_ring_stats['frames_queued']}, 通知次数: {tx_ring_stats['kicks']}")
+            print(f"   平均每次通知: {tx_ring_stats['avg_batch']:.2f}帧")
+            print(f"   环满丢弃: {tx_ring_stats['ring_full']}, 格式错误: {tx_ring_stats['wrong_format']}")
+        
+        # 批量接收统计
+        if self.batch_receiver:
+            batch_stats = self.batch_receiver.get_stats()
+            print(f"\n📦 批量接收统计 ({batch_stats['mode']}):")
+            print(f"   唤醒次数: {batch_stats['wakeups']}")
+            print(f"   系统调用: {batch_stats['syscalls']}")
+            print(f"   平均每次唤醒: {batch_stats['avg_batch']:.2f}个")
+            print(f"   平均每次调用: {batch_stats['datagrams_per_syscall']:.2f}个")
+            if 'gro_datagrams' in batch_stats:
+                print(f"   GRO合并数据报: {batch_stats['gro_datagrams']} (拆分出 {batch_stats['gro_segments']}个)")
+        
+        # 批量发送统计
+        if self.batch_sender:
+            send_stats = self.batch_sender.get_stats()
+            print(f"\n📤 批量发送统计 ({send_stats['mode']}, 最大保持{send_stats['max_hold_us']}µs):")
+            print(f"   发送批次: {send_stats['flushes']}")
+            print(f"   系统调用: {send_stats['syscalls']}")
+            print(f"   平均每批: {send_stats['avg_batch']:.2f}个")
+            print(f"   保持超时发送: {send_stats['flush_on_hold']}")
+            if 'gso_sends' in send_stats:
+                print(f"   GSO发送: {send_stats['gso_sends']} (共 {send_stats['gso_segments']}个分段, "
+                      f"回退 {send_stats['gso_fallbacks']}次)")
+        
+        # 帧聚合统计（聚合包数、帧数和字节数包含工作进程）
+        if self.enable_aggregation:
+            bundles = self.stats['bundles_sent']
+            print(f"\n🧺 帧聚合统计 (每包最多{self.aggregate_max_bytes}字节, 最长等待{self.aggregate_max_delay_us}µs):")
+            print(f"   聚合包: {bundles} ({self.stats['throughput_bundles_per_sec']:.2f}/秒)")
+            if bundles:
+                print(f"   平均每包帧数: {self.stats['bundled_frames'] / bundles:.2f}")
+                print(f"   平均填充率: {self.stats['bundle_bytes'] / (bundles * self.aggregate_max_bytes) * 100:.1f}%")
+            aggregation = self.batch_sender.get_stats()['aggregation'] if self.batch_sender else None
+            if aggregation:
+                print(f"   发送原因: 满 {aggregation['flush_on_size']}, 超时 {aggregation['flush_on_deadline']}, "
+                      f"状态变化 {aggregation['flush_on_state_change']}, 批次结束 {aggregation['flush_on_batch_end']}")
+        
+        # 压缩统计（字节数和耗时包含工作进程）：节省的字节数与花费的CPU时间
+        if self.enable_compression:
+            compressed = self.stats['compressed_datagrams']
+            bytes_in = self.stats['compression_bytes_in']
+            saved = bytes_in - self.stats['compression_bytes_out']
+            cpu_us = self.stats['compression_ns'] / 1000
+            print(f"\n🗜️ 载荷压缩统计 (zlib级别{self.compression_level}):")
+            print(f"   压缩数据报: {compressed} (原样发送 {self.stats['compression_skipped']})")
+            if bytes_in:
+                print(f"   字节: {bytes_in} → {self.stats['compression_bytes_out']} "
+                      f"(节省 {saved}, {saved / bytes_in * 100:.1f}%)")
+            if compressed:
+                print(f"   压缩耗时: {cpu_us / compressed:.2f}µs/数据报")
+            if cpu_us:
+                print(f"   每CPU毫秒节省: {saved / cpu_us * 1000:.0f}字节")
+            compression = self.batch_sender.get_stats().get('compression') if self.batch_sender else None
+            if compression and not compression['learning']:
+                print(f"   预置字典: {compression['dictionary_id']} ({compression['dictionary_size']}字节, 配置文件)")
+            elif compression:
+                print(f"   预置字典: {compression['dictionary_id'] or '学习中'} ({compression['dictionary_size']}字节, "
+                      f"{compression['publishers']}个发布者样本, 通告 {compression['dictionaries_announced']}次)")
+                if compression['pending_dictionary_id']:
+                    print(f"   待切换字典: {compression['pending_dictionary_id']} "
+                          f"(已通告 {compression['pending_announces']}次)")
+        
+        # 增量编码统计（帧数和字节数包含工作进程）：编码比例和参考帧缓存占用
+        if self.enable_delta_encoding:
+            bytes_in = self.stats['delta_bytes_in']
+            print(f"\n🧬 增量编码统计 (每{self.delta_refresh_frames}个增量刷新参考帧):")
+            print(f"   增量数据报: {self.stats['delta_frames']}, 参考帧: {self.stats['delta_references_sent']}")
+            if bytes_in:
+                print(f"   字节: {bytes_in} → {self.stats['delta_bytes_out']} "
+                      f"(比例 {self.stats['delta_bytes_out'] / bytes_in * 100:.1f}%)")
+            delta = self.batch_sender.get_stats().get('delta') if self.batch_sender else None
+            if delta:
+                print(f"   参考帧原因: 新发布者 {delta['full_on_new_publisher']}, 内容变化 {delta['full_on_change']}, "
+                      f"sqNum不连续 {delta['full_on_gap']}, 定期刷新 {delta['full_on_refresh']}")
+                print(f"   参考帧缓存: {delta['references']}个发布者, {delta['reference_bytes']}字节")
+        
+        # 重传抑制统计（抑制帧数包含工作进程，按发布者统计只含本进程的发送器）
+        if self.enable_suppression:
+            suppressed = self.stats['suppressed_frames']
+            total = suppressed + self.stats['goose_to_ip']
+            print(f"\n✂️ 重传抑制统计 (快速重传{self.suppression_fast_retransmissions}个, TAL×{self.suppression_tal_fraction}):")
+            print(f"   抑制帧数: {suppressed} ({suppressed / total * 100 if total else 0:.1f}%), "
+                  f"节省 {self.stats['suppressed_bytes']}字节")
+            suppression = self.batch_sender.get_stats().get('suppression') if self.batch_sender else None
+            if suppression and suppression['publishers']:
+                print(f"   发布者 (按抑制数前{SUPPRESSION_TOP_PUBLISHERS}个):")
+                ranked = sorted(suppression['publishers'].items(), key=lambda item: item[1]['suppressed'], reverse=True)
+                for name, publisher in ranked[:SUPPRESSION_TOP_PUBLISHERS]:
+                    print(f"     {name} {publisher['gocb_ref'] or ''}: 转发 {publisher['forwarded']}, "
+                          f"抑制 {publisher['suppressed']} (stNum {publisher['st_num']})")
+        
+        # 流水线统计（各级队列深度和丢弃数）
+        for title, pipeline in (("GOOSE→IP", self.goose_pipeline), ("IP→GOOSE", self.multicast_pipeline)):
+            if not pipeline:
+                continue
+            pipeline_stats = pipeline.get_stats()
+            print(f"\n🏭 {title}流水线统计 ({self.pipeline_drop_policy}):")
+            print(f"   入队: {pipeline_stats['submitted']}, 发送: {pipeline_stats['transmitted']}, "
+                  f"过滤: {pipeline_stats['filtered']}, 丢弃: {pipeline_stats['dropped']}")
+            for index, queue_stats in enumerate(pipeline_stats['encode_queues']):
+                print(f"   分类/封装队列{index}: 深度 {queue_stats['depth']} (峰值 {queue_stats['max_depth']}), "
+                      f"丢弃 {queue_stats['dropped']}")
+            transmit_stats = pipeline_stats['transmit_queue']
+            print(f"   发送队列: 深度 {transmit_stats['depth']} (峰值 {transmit_stats['max_depth']}), "
+                  f"丢弃 {transmit_stats['dropped']}")
+        
+        # CPU策略（实时读取的生效值）
+        if self.cpu_policy.enabled():
+            policy_stats = self.cpu_policy.get_stats()
+            print(f"\n🎯 CPU策略 (数据面CPU {policy_stats['dataplane_cpus'] or '未绑定'}, "
+                  f"后台CPU {policy_stats['housekeeping_cpus'] or '未绑定'}):")
+            for name, task in policy_stats['tasks'].items():
+                if task['alive']:
+                    print(f"   {name} ({task['role']}): CPU {task['cpus']}, {task['policy']} 优先级 {task['priority']}")
+        
+        # 工作进程统计（多队列TAP / 多播分片）
+        for section, title, counter, label in (
+                ('queue_workers', "TAP队列工作进程", 'goose_to_ip', "GOOSE→IP"),
+                ('multicast_shards', "多播分片工作进程", 'ip_to_goose', "IP→GOOSE")):
+            pool_stats = worker_pools.get(section)
+            if not pool_stats:
+                continue
+            print(f"\n🧵 {title} ({len(pool_stats['workers'])}个):")
+            for worker in pool_stats['workers']:
+                status = "运行" if worker['alive'] else "已退出"
+                print(f"   {worker['name']} (PID {worker['pid']}, CPU {worker['cpu']}, {status}): "
+                      f"{label} {worker['counters'][counter]}, 错误 {worker['counters']['errors']}")
         
         # IGMP保活统计
         if hasattr(self, 'igmp_keepalive') and self.igmp_keepalive:
@@ -1103,31 +2273,100 @@ class ProductionGOOSEBridge:
         pid_file = self.create_pid_file()
         
         try:
-            # 创建TAP接口
-            if not self.create_tun_interface():
-                return False
-            
-            # 创建多播套接字
-            if not self.create_multicast_socket():
-                return False
+            if self.forwarding_mode == 'kernel':
+                # 内核转发：只创建隧道和网桥，数据面不经过本进程
+                if not self.start_kernel_offload():
+                    return False
+            else:
+                # 创建TAP接口
+                if not self.create_tun_interface():
+                    return False
+                
+                # 创建多播套接字
+                if not self.create_multicast_socket():
+                    return False
+                
+                # TPACKET_V3抓包环（替代从TAP文件描述符读取）
+                if self.ingress_mode == 'packet_ring' and not self.create_packet_ring():
+                    return False
+                
+                # TPACKET_V2发送环（替代逐帧写入TAP）
+                if self.egress_mode == 'packet_ring' and not self.create_tx_ring():
+                    return False
             
             self.logger.info(f"服务配置:")
             self.logger.info(f"  本机IP: {self.local_ip}")
             self.logger.info(f"  TAP接口: {self.tun_name} ({self.tun_ip})")
             self.logger.info(f"  多播地址: {self.multicast_ip}:{self.multicast_port}")
             self.logger.info(f"  工作线程: {self.worker_threads}")
+            self.logger.info(f"  处理流水线: {'启用 (' + self.pipeline_drop_policy + ')' if self.enable_pipeline else '禁用'}")
             self.logger.info(f"  缓冲区大小: {self.buffer_size}")
             self.logger.info(f"  批处理大小: {self.batch_size}")
+            self.logger.info(f"  批量接收大小: {self.recv_batch_size}")
+            self.logger.info(f"  I/O模式: {self.io_mode}")
+            self.logger.info(f"  延迟模式: {self.latency_mode}")
+            self.logger.info(f"  数据面引擎: {self.engine}")
+            self.logger.info(f"  TAP队列数: {self.tap_queues}")
+            self.logger.info(f"  多播接收分片: {self.multicast_shards}")
+            self.logger.info(f"  入口模式: {self.ingress_mode}")
+            self.logger.info(f"  出口模式: {self.egress_mode}")
+            self.logger.info(f"  转发模式: {self.forwarding_mode}")
+            self.logger.info(f"  桥接实例ID: 0x{self.encap.bridge_id:08X} (封装版本 v{self.encap.version}, "
+                             f"多播回环 {'开启' if self.multicast_loop else '关闭'})")
+            if self.encap.version == 1 and self.multicast_loop:
+                # v1封装不携带桥接实例ID，回送的本机数据报无法识别
+                self.logger.warning("⚠️  encap_version=1且multicast_loop=true时本实例发出的数据报会被重新注入TAP")
             
             # 启动服务
             self.running = True
             
+            # 多队列TAP：GOOSE→IP由每队列一个工作进程处理（先于其他线程fork）
+            if self.tap_queues > 1 and not self.kernel_offload:
+                self.start_tap_workers()
+            # 多播分片：IP→GOOSE由每个SO_REUSEPORT分片一个工作进程处理
+            if self.multicast_shards > 1 and not self.kernel_offload:
+                self.start_shard_workers()
+            # CPU策略：其余线程由主线程创建，先设置主线程的亲和性
+            self.apply_main_cpu_policy()
+            # 处理流水线：读取线程只入队，分类/封装和发送由流水线线程完成
+            if self.enable_pipeline and not self.kernel_offload:
+                self.start_pipelines()
+            
+            if self.engine == 'asyncio' and not self.kernel_offload:
+                # asyncio引擎：数据面与后台任务在同一事件循环中运行
+                if self.latency_mode == 'busy_poll':
+                    self.logger.warning("asyncio引擎不支持自旋等待，忙轮询模式仅启用SO_BUSY_POLL")
+                self.logger.info("✅ 生产级GOOSE桥接服务启动成功 (asyncio引擎)")
+                try:
+                    asyncio.run(self.run_async())
+                except KeyboardInterrupt:
+                    self.logger.info("收到中断信号")
+                finally:
+                    self.stop()
+                    if pid_file:
+                        self.remove_pid_file()
+                return True
+            
             # 启动处理线程
-            threads = [
-                threading.Thread(target=self.tun_reader_thread, name="TUN-Reader", daemon=True),
-                threading.Thread(target=self.multicast_reader_thread, name="Multicast-Reader", daemon=True),
-                threading.Thread(target=self.stats_monitor_thread, name="Stats-Monitor", daemon=True)
-            ]
+            if self.kernel_offload:
+                # 内核转发：只运行统计监控（和IGMP保活）
+                threads = [
+                    threading.Thread(target=self.stats_monitor_thread, name="Stats-Monitor", daemon=True)
+                ]
+            elif self.io_mode == 'epoll':
+                # 单个epoll线程同时处理TAP接口和多播套接字
+                threads = [
+                    threading.Thread(target=self.reactor_thread, name="Data-Plane-Reactor", daemon=True),
+                    threading.Thread(target=self.stats_monitor_thread, name="Stats-Monitor", daemon=True)
+                ]
+            else:
+                threads = [
+                    threading.Thread(target=self.stats_monitor_thread, name="Stats-Monitor", daemon=True)
+                ]
+                if not self.shard_workers:
+                    threads.insert(0, threading.Thread(target=self.multicast_reader_thread, name="Multicast-Reader", daemon=True))
+                if not self.tap_workers:
+                    threads.insert(0, threading.Thread(target=self.tun_reader_thread, name="TUN-Reader", daemon=True))
             
             for thread in threads:
                 thread.start()
@@ -1180,6 +2419,16 @@ class ProductionGOOSEBridge:
         if hasattr(self, 'igmp_keepalive') and self.igmp_keepalive:
             self.igmp_keepalive.stop()
         
+        # 停止工作进程（多队列TAP / 多播分片）
+        for pool in (self.tap_workers, self.shard_workers):
+            if pool:
+                pool.stop()
+        
+        # 停止处理流水线
+        for pipeline in (self.goose_pipeline, self.multicast_pipeline):
+            if pipeline:
+                pipeline.stop()
+        
         # 关闭套接字
         if self.multicast_sock:
             try:
@@ -1188,21 +2437,50 @@ class ProductionGOOSEBridge:
             except Exception as e:
                 self.logger.warning(f"关闭多播套接字失败: {e}")
         
-        # 关闭TUN接口
-        if self.tun_fd:
+        if hasattr(self.batch_sender, 'close'):
+            # 发送聚合包中剩余的帧
+            self.stats['goose_to_ip'] += self.batch_sender.close()
+        
+        if self.tx_sock:
             try:
-                os.close(self.tun_fd)
+                self.tx_sock.close()
+                self.logger.info("多播发送套接字已关闭")
+            except Exception as e:
+                self.logger.warning(f"关闭多播发送套接字失败: {e}")
+        
+        # 关闭抓包环和发送环
+        if self.packet_ring:
+            self.packet_ring.close()
+            self.logger.info("抓包环已关闭")
+        if self.tx_ring:
+            self.tx_ring.close()
+            self.logger.info("发送环已关闭")
+        
+        # 关闭TUN接口（多队列模式下关闭所有队列）
+        for fd in (self.tap_queue_fds or [self.tun_fd]):
+            if not fd:
+                continue
+            try:
+                os.close(fd)
                 self.logger.info("TAP接口已关闭")
             except Exception as e:
                 self.logger.warning(f"关闭TAP接口失败: {e}")
         
-        # 删除TUN接口
-        try:
-            subprocess.run(f"ip link delete {self.tun_name}".split(), 
-                         capture_output=True, text=True, timeout=10)
-            self.logger.info(f"TAP接口 {self.tun_name} 已删除")
-        except Exception as e:
-            self.logger.warning(f"删除TAP接口失败: {e}")
+        # 删除内核转发的隧道和网桥，或删除TUN接口
+        if self.kernel_offload:
+            try:
+                # 设备删除前保留最终计数
+                self.kernel_offload.refresh(self.stats)
+                self.kernel_offload.teardown()
+            except Exception as e:
+                self.logger.warning(f"删除内核转发设备失败: {e}")
+        else:
+            try:
+                subprocess.run(f"ip link delete {self.tun_name}".split(), 
+                             capture_output=True, text=True, timeout=10)
+                self.logger.info(f"TAP接口 {self.tun_name} 已删除")
+            except Exception as e:
+                self.logger.warning(f"删除TAP接口失败: {e}")
         
         # 导出最终统计信息
         if self.config.getboolean('enable_stats_export', True):
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+GOOSE APDU惰性解码
+GOOSE载荷：APPID(2) + 长度(2) + 保留1(2) + 保留2(2) + goosePdu（BER编码，标签0x61）；
+构造时只读取APPID和长度，goosePdu的TLV在首次访问字段时才遍历（经过的字段偏移缓存），
+字段以缓冲区上的偏移或memoryview返回，不复制载荷；
+stNum/sqNum热路径由StateNumberReader按发布者缓存布局，命中时不遍历BER
+"""
+
+import struct
+
+GOOSE_HEADER_LENGTH = 8
+GOOSE_PDU_TAG = 0x61
+
+# goosePdu字段的上下文标签（IEC 61850-8-1）
+GOCB_REF_TAG = 0x80
+TIME_ALLOWED_TO_LIVE_TAG = 0x81
+DAT_SET_TAG = 0x82
+GO_ID_TAG = 0x83
+T_TAG = 0x84
+ST_NUM_TAG = 0x85
+SQ_NUM_TAG = 0x86
+SIMULATION_TAG = 0x87
+CONF_REV_TAG = 0x88
+NDS_COM_TAG = 0x89
+NUM_DAT_SET_ENTRIES_TAG = 0x8A
+ALL_DATA_TAG = 0xAB
+
+# StateNumberReader缓存的布局数量上限，布局键为载荷开头的APPID和长度
+MAX_STATE_LAYOUTS = 4096
+STATE_LAYOUT_KEY = struct.Struct('!I')
+# 常见长度的整数值由struct直接解出，其他长度按字节串读取后转换
+INTEGER_FORMATS = {1: 'B', 2: 'H', 4: 'I'}
+
+
+def read_length(buf, offset):
+    """读取BER长度（短格式或长格式），返回 (长度, 值的偏移)"""
+    length = buf[offset]
+    if length < 0x80:
+        return length, offset + 1
+    count = length & 0x7F
+    return int.from_bytes(buf[offset + 1:offset + 1 + count], 'big'), offset + 1 + count
+
+
+class GoosePdu:
+    """GOOSE载荷的惰性解码视图（buf[offset:end]，buf可以是bytes、bytearray或memoryview）
+
+    field()返回值在buf上的 (起始偏移, 结束偏移)，遍历到目标字段即停止，下次从停止处继续；
+    buf在视图使用期间不能被改写（例如批量接收槽位在下次接收前有效）
+    """
+
+    __slots__ = ('buf', 'offset', 'end', 'appid', 'length', 'fields', 'cursor')
+
+    def __init__(self, buf, offset=0, end=None):
+        if end is None:
+            end = len(buf)
+        if end - offset < GOOSE_HEADER_LENGTH:
+            raise ValueError(f"GOOSE载荷长度 {end - offset} 小于头部长度")
+        self.buf = buf
+        self.offset = offset
+        self.appid = (buf[offset] << 8) | buf[offset + 1]
+        self.length = (buf[offset + 2] << 8) | buf[offset + 3]
+        # 长度字段包含8字节头；以太网最短帧填充的字节不属于APDU
+        if GOOSE_HEADER_LENGTH <= self.length < end - offset:
+            end = offset + self.length
+        self.end = end
+        self.fields = {}
+        self.cursor = None
+
+    def field(self, tag):
+        """返回goosePdu中标签为tag的字段值的 (起始偏移, 结束偏移)，找不到或格式错误时返回None"""
+        fields = self.fields
+        if tag in fields:
+            return fields[tag]
+        buf = self.buf
+        end = self.end
+        offset = self.cursor
+        if offset is None:
+            offset = self.offset + GOOSE_HEADER_LENGTH
+            if offset + 2 > end or buf[offset] != GOOSE_PDU_TAG:
+                self.cursor = end
+                return None
+            _, offset = read_length(buf, offset + 1)
+
+        while offset + 2 <= end:
+            field_tag = buf[offset]
+            length = buf[offset + 1]
+            if length < 0x80:
+                value = offset + 2
+            else:
+                length, value = read_length(buf, offset + 1)
+            field_end = value + length
+            if field_end > end:
+                break
+            fields[field_tag] = (value, field_end)
+            offset = field_end
+            if field_tag == tag:
+                self.cursor = offset
+                return fields[tag]
+        self.cursor = end
+        return None
+
+    def value(self, tag):
+        """返回字段值的memoryview（不复制），找不到时返回None"""
+        field = self.field(tag)
+        if field is None:
+            return None
+        return memoryview(self.buf)[field[0]:field[1]]
+
+    def integer(self, tag):
+        """按无符号大端整数读取字段值，找不到时返回None"""
+        field = self.field(tag)
+        if field is None:
+            return None
+        return int.from_bytes(self.buf[field[0]:field[1]], 'big')
+
+    def string(self, tag):
+        """按VisibleString读取字段值，找不到时返回None"""
+        field = self.field(tag)
+        if field is None:
+            return None
+        return bytes(self.buf[field[0]:field[1]]).decode('ascii', 'replace')
+
+    @property
+    def gocb_ref(self):
+        return self.string(GOCB_REF_TAG)
+
+    @property
+    def time_allowed_to_live(self):
+        """报文允许存活时间（毫秒）"""
+        return self.integer(TIME_ALLOWED_TO_LIVE_TAG)
+
+    @property
+    def dat_set(self):
+        return self.string(DAT_SET_TAG)
+
+    @property
+    def go_id(self):
+        return self.string(GO_ID_TAG)
+
+    @property
+    def t(self):
+        """事件时间戳（UtcTime，8字节memoryview）"""
+        return self.value(T_TAG)
+
+    @property
+    def st_num(self):
+        return self.integer(ST_NUM_TAG)
+
+    @property
+    def sq_num(self):
+        return self.integer(SQ_NUM_TAG)
+
+    @property
+    def simulation(self):
+        value = self.value(SIMULATION_TAG)
+        return None if value is None else any(value)
+
+    @property
+    def conf_rev(self):
+        return self.integer(CONF_REV_TAG)
+
+    @property
+    def nds_com(self):
+        value = self.value(NDS_COM_TAG)
+        return None if value is None else any(value)
+
+    @property
+    def num_dat_set_entries(self):
+        return self.integer(NUM_DAT_SET_ENTRIES_TAG)
+
+    @property
+    def all_data(self):
+        """allData在buf上的 (起始偏移, 结束偏移)"""
+        return self.field(ALL_DATA_TAG)
+
+
+class StateNumberReader:
+    """stNum/sqNum热路径读取：按APPID和APDU长度缓存两个字段的布局
+
+    同一发布者的goosePdu布局在两次状态变化之间不变；命中时一次struct.unpack_from读出两个字段的
+    标签、长度和值并核对标签和长度，不一致（布局变化或其他发布者）时用GoosePdu重新定位并更新缓存
+    """
+
+    def __init__(self, max_layouts=MAX_STATE_LAYOUTS):
+        self.max_layouts = max_layouts
+        # APPID和长度 -> (Struct, stNum标签相对载荷的偏移, 结束偏移, stNum长度, sqNum长度, 值是否需要转换为整数)
+        self.layouts = {}
+        self.hits = 0
+        self.misses = 0
+
+    def read(self, buf, offset=0, end=None):
+        """返回GOOSE载荷buf[offset:end]的 (stNum, sqNum)，字段缺失时返回None"""
+        if end is None:
+            end = len(buf)
+        if end - offset < GOOSE_HEADER_LENGTH:
+            return None
+        key = STATE_LAYOUT_KEY.unpack_from(buf, offset)[0]
+        layout = self.layouts.get(key)
+        if layout is not None and offset + layout[2] <= end:
+            st_tag, st_length, st_num, sq_tag, sq_length, sq_num = layout[0].unpack_from(buf, offset + layout[1])
+            if st_tag == ST_NUM_TAG and sq_tag == SQ_NUM_TAG and st_length == layout[3] and sq_length == layout[4]:
+                self.hits += 1
+                if layout[5]:
+                    return int.from_bytes(st_num, 'big'), int.from_bytes(sq_num, 'big')
+                return st_num, sq_num
+
+        self.misses += 1
+        pdu = GoosePdu(buf, offset, end)
+        st_field = pdu.field(ST_NUM_TAG)
+        sq_field = pdu.field(SQ_NUM_TAG)
+        if st_field is None or sq_field is None:
+            return None
+        self.learn(key, offset, st_field, sq_field)
+        return (int.from_bytes(buf[st_field[0]:st_field[1]], 'big'),
+                int.from_bytes(buf[sq_field[0]:sq_field[1]], 'big'))
+
+    def learn(self, key, offset, st_field, sq_field):
+        """按字段位置生成读取两个字段的Struct（只缓存stNum在前、短格式长度的常见布局）"""
+        st_length = st_field[1] - st_field[0]
+        sq_length = sq_field[1] - sq_field[0]
+        gap = sq_field[0] - 2 - st_field[1]
+        if gap < 0 or not 0 < st_length < 0x80 or not 0 < sq_length < 0x80:
+            return
+        convert = st_length not in INTEGER_FORMATS or sq_length not in INTEGER_FORMATS
+        if convert:
+            st_format, sq_format = f"{st_length}s", f"{sq_length}s"
+        else:
+            st_format, sq_format = INTEGER_FORMATS[st_length], INTEGER_FORMATS[sq_length]
+        unpacker = struct.Struct(f"!BB{st_format}{gap}xBB{sq_format}")
+        if len(self.layouts) >= self.max_layouts:
+            self.layouts.clear()
+        start = st_field[0] - 2 - offset
+        self.layouts[key] = (unpacker, start, start + unpacker.size, st_length, sq_length, convert)
+
+    def get_stats(self):
+        """布局缓存统计"""
+        total = self.hits + self.misses
+        return {
+            'layouts': len(self.layouts),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+内核转发卸载
+forwarding_mode=kernel时桥接进程只做控制面：创建加入multicast_ip组的VXLAN（或gretap）隧道设备，
+与本地端口（可选的物理网卡）一起加入名为TAP接口名的Linux网桥，
+并在隧道和端口上安装tc经典BPF过滤器（直接动作模式），只有GOOSE帧可以穿过隧道；
+帧转发完全在内核中完成，IGMP保活和统计导出照常运行
+"""
+
+import os
+import re
+import subprocess
+
+from packet_ring import goose_filter_program
+
+OFFLOAD_TUNNELS = ('vxlan', 'gretap')
+
+# tc直接动作模式返回值
+TC_ACT_OK = 0
+TC_ACT_SHOT = 2
+
+DEVICE_COUNTERS = ('rx_packets', 'tx_packets', 'rx_bytes', 'tx_bytes', 'rx_dropped', 'tx_dropped')
+
+
+def tc_bytecode(program):
+    """把经典BPF程序转换为tc bpf bytecode参数格式"""
+    return ','.join([str(len(program))] + [f"{code} {jt} {jf} {k}" for code, jt, jf, k in program])
+
+
+def read_device_counters(device):
+    """读取网络设备的收发计数器（设备不存在时返回None）"""
+    counters = {}
+    for name in DEVICE_COUNTERS:
+        try:
+            with open(f'/sys/class/net/{device}/statistics/{name}') as f:
+                counters[name] = int(f.read())
+        except (OSError, ValueError):
+            return None
+    return counters
+
+
+class KernelOffload:
+    """VXLAN/gretap隧道 + Linux网桥 + tc GOOSE过滤器的创建、统计和清理"""
+
+    def __init__(self, config, logger, bridge_name, bridge_ip, multicast_ip, local_ip):
+        self.logger = logger
+        self.bridge_name = bridge_name
+        self.bridge_ip = bridge_ip
+        self.multicast_ip = multicast_ip
+        self.local_ip = local_ip
+        self.tunnel = config.get('offload_tunnel', 'vxlan')
+        if self.tunnel not in OFFLOAD_TUNNELS:
+            raise ValueError(f"未知的隧道类型: {self.tunnel}（可选: {', '.join(OFFLOAD_TUNNELS)}）")
+        self.vni = config.getint('offload_vni', 61850)
+        self.dstport = config.getint('offload_dstport', 4789)
+        self.ttl = config.getint('offload_ttl', 10)
+        self.underlay = config.get('offload_underlay', '')
+        self.port = config.get('offload_port', '')
+        # 接口名最长15个字符
+        self.tunnel_name = f"{bridge_name}-{'vx' if self.tunnel == 'vxlan' else 'gre'}"[:15]
+        self.active = False
+
+    def run(self, cmd, check=True):
+        """执行ip/tc命令（字符串或参数列表），check为True时失败抛出RuntimeError"""
+        args = cmd if isinstance(cmd, list) else cmd.split()
+        cmd = ' '.join(args)
+        result = subprocess.run(args, capture_output=True, text=True, timeout=10)
+        if result.returncode != 0:
+            if check:
+                raise RuntimeError(f"{cmd}: {result.stderr.strip()}")
+            self.logger.debug(f"命令执行警告: {cmd} - {result.stderr.strip()}")
+        else:
+            self.logger.debug(f"执行成功: {cmd}")
+        return result
+
+    def detect_underlay(self):
+        """按到多播地址的路由确定承载隧道的接口"""
+        result = self.run(f"ip -o route get {self.multicast_ip}")
+        match = re.search(r'\bdev (\S+)', result.stdout)
+        if not match:
+            raise RuntimeError(f"无法确定到 {self.multicast_ip} 的出接口，请配置offload_underlay")
+        return match.group(1)
+
+    def install_goose_filter(self, device, directions):
+        """在设备的clsact入/出方向安装GOOSE过滤器：只放行GOOSE帧，其余丢弃"""
+        bytecode = tc_bytecode(goose_filter_program(None, accept=TC_ACT_OK, reject=TC_ACT_SHOT))
+        self.run(f"tc qdisc replace dev {device} clsact")
+        for direction in directions:
+            # bytecode参数含空格，作为单个参数传入
+            self.run(f"tc filter replace dev {device} {direction} pref 1 handle 1 bpf da bytecode".split() + [bytecode])
+
+    def setup(self):
+        """创建隧道和网桥、加入端口并安装过滤器（残留的同名设备先删除）"""
+        self.teardown(quiet=True)
+        underlay = self.underlay or self.detect_underlay()
+
+        if self.tunnel == 'vxlan':
+            self.run(f"ip link add {self.tunnel_name} type vxlan id {self.vni} group {self.multicast_ip} "
+                     f"dev {underlay} dstport {self.dstport} ttl {self.ttl}")
+        else:
+            self.run(f"ip link add {self.tunnel_name} type gretap local {self.local_ip} "
+                     f"remote {self.multicast_ip} dev {underlay} ttl {self.ttl}")
+        self.active = True
+
+        # 网桥沿用TAP接口名和地址，本机应用无需修改配置
+        self.run(f"ip link add {self.bridge_name} type bridge")
+        self.run(f"ip addr add {self.bridge_ip} dev {self.bridge_name}")
+        self.run(f"ip link set {self.tunnel_name} master {self.bridge_name}")
+        if self.port:
+            self.run(f"ip link set {self.port} master {self.bridge_name}")
+            self.run(f"ip link set {self.port} up")
+
+        # 隧道两个方向都过滤；物理端口过滤进入网桥的帧
+        self.install_goose_filter(self.tunnel_name, ('ingress', 'egress'))
+        if self.port:
+            self.install_goose_filter(self.port, ('ingress',))
+
+        self.run(f"ip link set {self.tunnel_name} up")
+        self.run(f"ip link set {self.bridge_name} up")
+        self.logger.info(f"🧩 内核转发已启用: {self.tunnel} {self.tunnel_name} (组 {self.multicast_ip}, 承载 {underlay}) "
+                         f"+ 网桥 {self.bridge_name}" + (f" + 端口 {self.port}" if self.port else ""))
+
+    def teardown(self, quiet=False):
+        """删除隧道和网桥，恢复物理端口"""
+        if self.port:
+            self.run(f"tc qdisc del dev {self.port} clsact", check=False)
+            self.run(f"ip link set {self.port} nomaster", check=False)
+        for device in (self.tunnel_name, self.bridge_name):
+            if os.path.exists(f'/sys/class/net/{device}'):
+                self.run(f"ip link delete {device}", check=False)
+        if self.active and not quiet:
+            self.logger.info(f"内核转发设备 {self.tunnel_name}, {self.bridge_name} 已删除")
+        self.active = False
+
+    def refresh(self, stats):
+        """用隧道设备计数器更新转发统计：发往隧道为GOOSE→IP，来自隧道为IP→GOOSE"""
+        counters = read_device_counters(self.tunnel_name)
+        if counters:
+            stats['goose_to_ip'] = counters['tx_packets']
+            stats['ip_to_goose'] = counters['rx_packets']
+
+    def get_stats(self):
+        """获取隧道、网桥和端口的设备计数器"""
+        devices = [self.tunnel_name, self.bridge_name] + ([self.port] if self.port else [])
+        return {
+            'tunnel': self.tunnel,
+            'vni': self.vni if self.tunnel == 'vxlan' else None,
+            'active': self.active,
+            'devices': {device: read_device_counters(device) for device in devices}
+        }
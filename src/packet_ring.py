@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+AF_PACKET mmap收发环
+接收：TPACKET_V3抓包环从任意接口（TAP或物理网卡）抓取GOOSE帧，内核按经典BPF过滤器
+（目的MAC前缀01:0C:CD:01 + EtherType 0x88B8，含802.1Q）筛选后直接写入与用户态共享的mmap块，
+用户态整块处理后把块归还内核，稳态下每帧没有系统调用，也不复制帧数据；
+发送：TPACKET_V2发送环，解封装的GOOSE帧直接写入共享帧槽，每批只调用一次send()通知内核发送
+"""
+
+import mmap
+import socket
+import struct
+
+from batch_io import BPF_LD_H_ABS, BPF_JMP_JEQ_K, BPF_RET_K, attach_socket_filter
+from frame_buffers import GOOSE_ETHERTYPE_BYTES, GOOSE_MULTICAST_MAC, VLAN_ETHERTYPE_BYTES
+
+# Linux AF_PACKET常量
+SOL_PACKET = 263
+PACKET_ADD_MEMBERSHIP = 1
+PACKET_RX_RING = 5
+PACKET_TX_RING = 13
+PACKET_STATISTICS = 6
+PACKET_VERSION = 10
+PACKET_MR_ALLMULTI = 2
+TPACKET_V2 = 1
+TPACKET_V3 = 2
+ETH_P_ALL = 0x0003
+
+TP_STATUS_KERNEL = 0
+TP_STATUS_USER = 1
+TP_STATUS_VLAN_VALID = 0x10
+
+# 发送帧槽状态
+TP_STATUS_AVAILABLE = 0
+TP_STATUS_SEND_REQUEST = 1
+TP_STATUS_WRONG_FORMAT = 4
+MSG_DONTWAIT = 0x40
+
+# 帧方向（BPF辅助数据SKF_AD_PKTTYPE）
+PACKET_OUTGOING = 4
+SKF_AD_PKTTYPE = -0x1000 + 4
+BPF_LD_W_ABS = 0x20
+DIRECTIONS = ('incoming', 'outgoing')
+
+# tpacket_block_desc：block_status(8) / num_pkts(12) / offset_to_first_pkt(16)
+BLOCK_HEADER = struct.Struct('=8xIII')
+BLOCK_STATUS = struct.Struct('=I')
+BLOCK_STATUS_OFFSET = 8
+
+# tpacket3_hdr：tp_next_offset / tp_snaplen / tp_len / tp_status / tp_mac / hv1.tp_vlan_tci
+FRAME_HEADER = struct.Struct('=I8xIIIH2x4xI')
+
+# tpacket_req3 与 tpacket_stats_v3
+RING_REQUEST = struct.Struct('=7I')
+RING_STATISTICS = struct.Struct('=III')
+
+# 发送环：tpacket_req 与 tpacket2_hdr的tp_status/tp_len；帧数据位于帧槽偏移32（TPACKET_ALIGN(sizeof(tpacket2_hdr))）
+TX_RING_REQUEST = struct.Struct('=4I')
+TX_FRAME_STATUS = struct.Struct('=I')
+TX_FRAME_LENGTH = struct.Struct('=II')
+TX_DATA_OFFSET = 32
+
+
+def goose_filter_program(direction='incoming', accept=0xFFFFFFFF, reject=0):
+    """GOOSE过滤器：方向 + 目的MAC前缀 + EtherType（直接或802.1Q内层）
+
+    在本桥接的TAP上抓取时方向为outgoing（本机发往TAP的帧），物理网卡上为incoming，
+    从而不会再次抓到桥接自己注入的帧；direction为None时不检查方向。
+    accept/reject为返回值：套接字过滤器为抓取长度，tc直接动作模式为TC_ACT_OK/TC_ACT_SHOT
+    """
+    program = []
+    if direction is not None:
+        if direction not in DIRECTIONS:
+            raise ValueError(f"未知的抓包方向: {direction}（可选: {', '.join(DIRECTIONS)}）")
+        # 方向不符时跳到reject（之后第8条指令）
+        direction_jump = (0, 8) if direction == 'outgoing' else (8, 0)
+        program += [
+            (BPF_LD_W_ABS, 0, 0, SKF_AD_PKTTYPE & 0xFFFFFFFF),
+            (BPF_JMP_JEQ_K, direction_jump[0], direction_jump[1], PACKET_OUTGOING)
+        ]
+    return program + [
+        (BPF_LD_W_ABS, 0, 0, 0),
+        (BPF_JMP_JEQ_K, 0, 6, int.from_bytes(GOOSE_MULTICAST_MAC[:4], 'big')),
+        (BPF_LD_H_ABS, 0, 0, 12),
+        (BPF_JMP_JEQ_K, 3, 0, 0x88B8),
+        (BPF_JMP_JEQ_K, 0, 3, 0x8100),
+        (BPF_LD_H_ABS, 0, 0, 16),
+        (BPF_JMP_JEQ_K, 0, 1, 0x88B8),
+        (BPF_RET_K, 0, 0, accept),
+        (BPF_RET_K, 0, 0, reject)
+    ]
+
+
+class RingFrame:
+    """抓包环块中的一个以太网帧，接口与FrameView一致（parse/has_vlan/vlan_id/src_mac/encapsulate_into）
+
+    网卡剥离的VLAN标签（TP_STATUS_VLAN_VALID）由帧头中的tp_vlan_tci还原；
+    对象在整个drain中复用，只在处理回调期间有效
+    """
+
+    __slots__ = ('view', 'start', 'length', 'offload_tci', 'has_vlan', 'vlan_id',
+                 'vlan_priority', 'tci', 'header_length')
+
+    def __init__(self, view):
+        self.view = view
+        self.start = 0
+        self.length = 0
+        self.offload_tci = None
+        self.has_vlan = False
+        self.vlan_id = 0
+        self.vlan_priority = 0
+        self.tci = None
+        self.header_length = 14
+
+    def parse(self):
+        """解析以太网头（支持802.1Q和网卡剥离的VLAN），返回是否为GOOSE帧"""
+        view = self.view
+        start = self.start
+        length = self.length
+        if length < 14 or view[start:start + 6] != GOOSE_MULTICAST_MAC:
+            return False
+
+        tci = self.offload_tci
+        if tci is None and view[start + 12] == VLAN_ETHERTYPE_BYTES[0] and view[start + 13] == VLAN_ETHERTYPE_BYTES[1]:
+            if length < 18:
+                return False
+            self.header_length = 18
+            tci = (view[start + 14] << 8) | view[start + 15]
+        else:
+            self.header_length = 14
+
+        self.tci = tci
+        if tci is None:
+            self.has_vlan = False
+            self.vlan_priority = 0
+            self.vlan_id = 0
+        else:
+            self.has_vlan = True
+            self.vlan_priority = tci >> 13
+            self.vlan_id = tci & 0x0FFF
+        ethertype = start + self.header_length - 2
+        return view[ethertype] == GOOSE_ETHERTYPE_BYTES[0] and view[ethertype + 1] == GOOSE_ETHERTYPE_BYTES[1]
+
+    @property
+    def dst_mac(self):
+        return self.view[self.start:self.start + 6]
+
+    @property
+    def src_mac(self):
+        return self.view[self.start + 6:self.start + 12]
+
+    @property
+    def payload(self):
+        return self.view[self.start + self.header_length:self.start + self.length]
+
+    def tobytes(self):
+        """复制为原始帧bytes（网卡剥离的VLAN标签重新插入），供需要保留帧的路径使用"""
+        start = self.start
+        end = start + self.length
+        if self.offload_tci is None:
+            return self.view[start:end].tobytes()
+        return b''.join((self.view[start:start + 12], bytes(VLAN_ETHERTYPE_BYTES),
+                         self.offload_tci.to_bytes(2, 'big'), self.view[start + 12:end]))
+
+    def encapsulate_into(self, slot, timestamp_us, codec):
+        """用codec写入封装头，载荷直接从环块复制到发送槽位，返回数据报长度"""
+        start = self.start
+        header_length = codec.header_length
+        total = header_length + self.length - self.header_length
+        if total > len(slot):
+            raise ValueError(f"数据报长度 {total} 超过发送槽位 {len(slot)}")
+
+        view = self.view
+        codec.pack_header_into(slot, view[start:start + 6], view[start + 6:start + 12], timestamp_us, self.tci)
+        slot[header_length:total] = view[start + self.header_length:start + self.length]
+        return total
+
+
+class PacketRxRing:
+    """TPACKET_V3接收环
+
+    内核在块写满或retire_ms超时后把块交给用户态（fd变为可读）；drain()逐帧回调handler(RingFrame)，
+    每处理完一块把块状态改回TP_STATUS_KERNEL归还内核。retire_ms即低流量时的最大附加延迟
+    """
+
+    def __init__(self, interface, direction='incoming', block_size=1 << 18, block_count=16,
+                 frame_size=2048, retire_ms=1):
+        if block_size % mmap.PAGESIZE or block_size % frame_size:
+            raise ValueError(f"块大小 {block_size} 必须是页大小和帧大小的整数倍")
+        self.interface = interface
+        self.direction = direction
+        self.block_size = block_size
+        self.block_count = block_count
+        self.retire_ms = retire_ms
+        self.block_offsets = [i * block_size for i in range(block_count)]
+        self.block_index = 0
+        self.sock = None
+        self.ring = None
+        self.view = None
+        self.frame = None
+        self.kernel_stats = {'packets': 0, 'drops': 0, 'freeze_count': 0}
+        self.stats = {
+            'blocks': 0,
+            'frames': 0,
+            'bytes': 0,
+            'vlan_offloaded': 0,
+            'handler_errors': 0
+        }
+
+        # 协议号0创建，附加过滤器和映射环之后再bind，不会收到未过滤的帧
+        self.sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, 0)
+        try:
+            attach_socket_filter(self.sock, goose_filter_program(direction))
+            self.sock.setsockopt(SOL_PACKET, PACKET_VERSION, TPACKET_V3)
+            self.sock.setsockopt(SOL_PACKET, PACKET_RX_RING, RING_REQUEST.pack(
+                block_size, block_count, frame_size, block_size // frame_size * block_count,
+                retire_ms, 0, 0))
+            self.ring = mmap.mmap(self.sock.fileno(), block_size * block_count,
+                                  mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+            self.view = memoryview(self.ring)
+            self.frame = RingFrame(self.view)
+            self.sock.bind((interface, ETH_P_ALL))
+            self.sock.setblocking(False)
+        except Exception:
+            self.close()
+            raise
+
+    def join_all_multicast(self):
+        """让接口接收所有多播MAC（物理网卡默认丢弃未加入的GOOSE多播地址）"""
+        self.sock.setsockopt(SOL_PACKET, PACKET_ADD_MEMBERSHIP, struct.pack(
+            'iHH8s', socket.if_nametoindex(self.interface), PACKET_MR_ALLMULTI, 0, b''))
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def drain(self, handler, max_frames=64):
+        """处理已交给用户态的块，累计达到max_frames后在块边界停止；返回True表示可能仍有数据"""
+        ring = self.ring
+        frame = self.frame
+        stats = self.stats
+        frames = 0
+        while frames < max_frames:
+            block = self.block_offsets[self.block_index]
+            status, count, offset = BLOCK_HEADER.unpack_from(ring, block)
+            if not status & TP_STATUS_USER:
+                return False
+
+            offset += block
+            try:
+                for _ in range(count):
+                    next_offset, snaplen, length, frame_status, mac, tci = FRAME_HEADER.unpack_from(ring, offset)
+                    frame.start = offset + mac
+                    frame.length = snaplen
+                    if frame_status & TP_STATUS_VLAN_VALID:
+                        frame.offload_tci = tci
+                        stats['vlan_offloaded'] += 1
+                    else:
+                        frame.offload_tci = None
+                    stats['bytes'] += snaplen
+                    try:
+                        handler(frame)
+                    except Exception:
+                        stats['handler_errors'] += 1
+                    offset += next_offset
+            finally:
+                # 整块归还内核
+                BLOCK_STATUS.pack_into(ring, block + BLOCK_STATUS_OFFSET, TP_STATUS_KERNEL)
+                self.block_index = (self.block_index + 1) % self.block_count
+                stats['blocks'] += 1
+                stats['frames'] += count
+            frames += count
+        return True
+
+    def get_stats(self):
+        """获取抓包环统计信息（内核计数读取后清零，这里累加）"""
+        if self.sock:
+            try:
+                packets, drops, freeze_count = RING_STATISTICS.unpack(
+                    self.sock.getsockopt(SOL_PACKET, PACKET_STATISTICS, RING_STATISTICS.size))
+                self.kernel_stats['packets'] += packets
+                self.kernel_stats['drops'] += drops
+                self.kernel_stats['freeze_count'] += freeze_count
+            except OSError:
+                pass
+        stats = dict(self.stats)
+        stats['kernel'] = dict(self.kernel_stats)
+        stats['interface'] = self.interface
+        stats['direction'] = self.direction
+        stats['block_size'] = self.block_size
+        stats['block_count'] = self.block_count
+        stats['retire_ms'] = self.retire_ms
+        stats['avg_block'] = self.stats['frames'] / self.stats['blocks'] if self.stats['blocks'] else 0.0
+        return stats
+
+    def close(self):
+        """解除映射并关闭套接字"""
+        if self.view is not None:
+            self.frame = None
+            self.view.release()
+            self.view = None
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+class PacketTxRing:
+    """TPACKET_V2发送环
+
+    queue()把封装数据报还原的以太网帧直接写入下一个空闲帧槽并标记为待发送，
+    flush()以一次send()通知内核发送所有待发送帧；帧槽被内核发送完后自动变回空闲。
+    每个发送线程/进程需要各自的发送环
+    """
+
+    def __init__(self, interface, frame_size=2048, frame_count=256):
+        if frame_size % 16:
+            raise ValueError(f"帧槽大小 {frame_size} 必须是16的整数倍")
+        self.interface = interface
+        self.frame_size = frame_size
+        # 每块为页大小的整数倍并容纳整数个帧槽，帧槽在映射中连续排列
+        block_size = max(mmap.PAGESIZE, frame_size)
+        block_size -= block_size % frame_size
+        while block_size % mmap.PAGESIZE:
+            block_size += frame_size
+        frames_per_block = block_size // frame_size
+        block_count = max(1, -(-frame_count // frames_per_block))
+        self.frame_count = frames_per_block * block_count
+        self.max_frame_length = frame_size - TX_DATA_OFFSET
+        self.frame_offsets = [i * frame_size for i in range(self.frame_count)]
+        self.frame_index = 0
+        self.pending = 0
+        self.sock = None
+        self.ring = None
+        self.view = None
+        self.stats = {
+            'frames_queued': 0,
+            'kicks': 0,
+            'ring_full': 0,
+            'oversize': 0,
+            'wrong_format': 0,
+            'kick_errors': 0
+        }
+
+        # 协议号0：只发送，不接收任何帧
+        self.sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, 0)
+        try:
+            self.sock.setsockopt(SOL_PACKET, PACKET_VERSION, TPACKET_V2)
+            self.sock.setsockopt(SOL_PACKET, PACKET_TX_RING, TX_RING_REQUEST.pack(
+                block_size, block_count, frame_size, self.frame_count))
+            self.ring = mmap.mmap(self.sock.fileno(), block_size * block_count,
+                                  mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+            self.view = memoryview(self.ring)
+            self.sock.bind((interface, 0))
+        except Exception:
+            self.close()
+            raise
+
+    def queue(self, packet, header):
+        """按EncapCodec.decode的解码结果把数据报还原为以太网帧写入下一个空闲帧槽，
+        返回帧长度；帧过长或环满时返回0"""
+        dst_mac, src_mac, tci, _, payload_offset = header
+        header_length = 14 if tci is None else 18
+        length = header_length + len(packet) - payload_offset
+        if length > self.max_frame_length:
+            self.stats['oversize'] += 1
+            return 0
+
+        ring = self.ring
+        offset = self.frame_offsets[self.frame_index]
+        status = TX_FRAME_STATUS.unpack_from(ring, offset)[0]
+        if status == TP_STATUS_WRONG_FORMAT:
+            # 内核拒绝的帧：计数后复用帧槽
+            self.stats['wrong_format'] += 1
+        elif status != TP_STATUS_AVAILABLE:
+            # 帧槽仍在等待内核发送：先通知内核发送已排队的帧
+            self.flush()
+            if TX_FRAME_STATUS.unpack_from(ring, offset)[0] not in (TP_STATUS_AVAILABLE, TP_STATUS_WRONG_FORMAT):
+                self.stats['ring_full'] += 1
+                return 0
+
+        data = self.view[offset + TX_DATA_OFFSET:offset + TX_DATA_OFFSET + length]
+        data[0:6] = dst_mac
+        data[6:12] = src_mac
+        if tci is not None:
+            # TCI原样还原（优先级 + DEI + VLAN ID）
+            data[12:14] = bytes(VLAN_ETHERTYPE_BYTES)
+            data[14] = tci >> 8
+            data[15] = tci & 0xFF
+        data[header_length - 2:header_length] = bytes(GOOSE_ETHERTYPE_BYTES)
+        data[header_length:] = memoryview(packet)[payload_offset:]
+        data.release()
+
+        # 先写帧数据和长度，最后把帧槽交给内核
+        TX_FRAME_LENGTH.pack_into(ring, offset + 4, length, length)
+        TX_FRAME_STATUS.pack_into(ring, offset, TP_STATUS_SEND_REQUEST)
+        self.frame_index = (self.frame_index + 1) % self.frame_count
+        self.pending += 1
+        self.stats['frames_queued'] += 1
+        return length
+
+    def flush(self):
+        """通知内核发送所有待发送帧（非阻塞），返回本次通知的帧数"""
+        pending = self.pending
+        if not pending:
+            return 0
+        self.pending = 0
+        self.stats['kicks'] += 1
+        try:
+            self.sock.send(b'', MSG_DONTWAIT)
+        except BlockingIOError:
+            # 内核暂时无法全部发送，剩余帧在下次通知时继续发送
+            pass
+        except OSError:
+            self.stats['kick_errors'] += 1
+            raise
+        return pending
+
+    def get_stats(self):
+        """获取发送环统计信息"""
+        stats = dict(self.stats)
+        stats['interface'] = self.interface
+        stats['frame_count'] = self.frame_count
+        stats['frame_size'] = self.frame_size
+        stats['avg_batch'] = self.stats['frames_queued'] / self.stats['kicks'] if self.stats['kicks'] else 0.0
+        return stats
+
+    def close(self):
+        """解除映射并关闭套接字"""
+        if self.view is not None:
+            self.view.release()
+            self.view = None
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
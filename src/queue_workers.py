@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+多队列TAP与工作进程池
+IFF_MULTI_QUEUE在同一TAP设备上打开多个队列，每个队列交给一个绑定CPU核心的
+工作进程处理（各自拥有独立的多播发送套接字），避免GOOSE→IP吞吐受限于单个GIL；
+工作进程的计数器通过共享内存汇总到父进程
+"""
+
+import os
+import struct
+import fcntl
+import signal
+import multiprocessing
+
+# TUN接口相关常量
+TUNSETIFF = 0x400454ca
+IFF_TAP = 0x0002
+IFF_NO_PI = 0x1000
+IFF_MULTI_QUEUE = 0x0100
+
+
+def open_tap_queues(interface_name, queue_count):
+    """在同一TAP设备上打开queue_count个队列，返回非阻塞文件描述符列表"""
+    fds = []
+    try:
+        for _ in range(queue_count):
+            fd = os.open('/dev/net/tun', os.O_RDWR | os.O_NONBLOCK)
+            fds.append(fd)
+            ifr = struct.pack('16sH', interface_name.encode('utf-8'),
+                              IFF_TAP | IFF_NO_PI | IFF_MULTI_QUEUE)
+            fcntl.ioctl(fd, TUNSETIFF, ifr)
+    except Exception:
+        for fd in fds:
+            os.close(fd)
+        raise
+    return fds
+
+
+def process_cpu_seconds(pid):
+    """读取/proc/<pid>/stat中的用户态+内核态CPU时间（秒），进程不存在时返回None"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def parse_cpu_list(value):
+    """解析CPU列表配置，例如 "2,3" 或 "2-5,8"；空字符串返回空列表"""
+    cpus = []
+    for part in (value or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            cpus.extend(range(int(start), int(end) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+
+class WorkerContext:
+    """工作进程内的运行上下文：停止判断与计数器发布"""
+
+    def __init__(self, index, name, counters, fields, parent_pid):
+        self.index = index
+        self.name = name
+        self._counters = counters
+        self._fields = fields
+        self._offset = index * len(fields)
+        self._parent_pid = parent_pid
+        self._stopping = False
+
+    def request_stop(self, signum=None, frame=None):
+        self._stopping = True
+
+    def running(self):
+        """收到SIGTERM/SIGINT或父进程退出后返回False"""
+        return not self._stopping and os.getppid() == self._parent_pid
+
+    def publish(self, values):
+        """把本进程的计数器写入共享内存（每个进程只写自己的槽位，无需加锁）"""
+        for position, field in enumerate(self._fields):
+            self._counters[self._offset + position] = int(values.get(field, 0))
+
+
+class WorkerProcessPool:
+    """每个TAP队列一个工作进程，可选绑定CPU核心"""
+
+    def __init__(self, name, logger, counter_fields, cpus=None):
+        self.name = name
+        self.logger = logger
+        self.fields = list(counter_fields)
+        self.cpus = list(cpus or [])
+        self.context = multiprocessing.get_context('fork')
+        self.processes = []
+        self.workers = []
+        self.counters = None
+
+    def start(self, targets):
+        """启动工作进程；targets为 [(名称, 分组, target(ctx))]，须在启动其他线程之前调用"""
+        self.counters = self.context.Array('Q', len(targets) * len(self.fields), lock=False)
+        parent_pid = os.getpid()
+
+        for index, (worker_name, group, target) in enumerate(targets):
+            cpu = self.cpus[index % len(self.cpus)] if self.cpus else None
+            process = self.context.Process(
+                target=self._bootstrap,
+                args=(index, worker_name, target, cpu, parent_pid),
+                name=f"{self.name}-{worker_name}",
+                daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+            self.workers.append({'name': worker_name, 'group': group, 'cpu': cpu})
+            self.logger.info(f"工作进程 {process.name} 已启动 (PID {process.pid}, CPU {cpu if cpu is not None else '未绑定'})")
+
+    def _bootstrap(self, index, worker_name, target, cpu, parent_pid):
+        """子进程入口：绑定CPU、安装信号处理后运行target"""
+        ctx = WorkerContext(index, worker_name, self.counters, self.fields, parent_pid)
+        signal.signal(signal.SIGTERM, ctx.request_stop)
+        signal.signal(signal.SIGINT, ctx.request_stop)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+        if cpu is not None:
+            try:
+                os.sched_setaffinity(0, {cpu})
+            except OSError as e:
+                self.logger.warning(f"工作进程 {worker_name} 绑定CPU {cpu} 失败: {e}")
+
+        try:
+            target(ctx)
+        except Exception as e:
+            self.logger.error(f"工作进程 {worker_name} 异常退出: {e}")
+            os._exit(1)
+        os._exit(0)
+
+    def aggregate(self):
+        """汇总所有工作进程的计数器：按分组求和，并附带每个进程的明细"""
+        totals = {}
+        workers = []
+        width = len(self.fields)
+        for index, (info, process) in enumerate(zip(self.workers, self.processes)):
+            values = dict(zip(self.fields, self.counters[index * width:(index + 1) * width]))
+            group_totals = totals.setdefault(info['group'], dict.fromkeys(self.fields, 0))
+            for field, value in values.items():
+                group_totals[field] += value
+            workers.append({
+                'name': info['name'],
+                'group': info['group'],
+                'pid': process.pid,
+                'cpu': info['cpu'],
+                'alive': process.is_alive(),
+                'cpu_seconds': process_cpu_seconds(process.pid),
+                'counters': values
+            })
+        return {'totals': totals, 'workers': workers}
+
+    def stop(self, timeout=5):
+        """停止所有工作进程（SIGTERM，超时后SIGKILL）"""
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                self.logger.warning(f"工作进程 {process.name} 未能正常结束，强制终止")
+                process.kill()
+                process.join(1)
+        self.logger.info(f"{self.name}工作进程池已停止")
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+单生产者/单消费者无锁环形缓冲区
+一块预分配缓冲区划分为定长槽位，每个槽位为4字节长度前缀 + 帧数据；
+写索引只由生产者更新，读索引只由消费者更新，两者位于不同缓存行，
+入队/出队不加锁、不分配对象。shared=True时缓冲区为匿名共享内存(mmap)，
+在fork之前创建即可用于父子进程之间的帧交接。
+消费者阻塞等待默认为自旋后短睡眠轮询；notify=True时改用eventfd唤醒（Linux）。
+处理流水线的各级队列不使用本环（原因见frame_pipeline.BoundedFrameQueue），目前用于阶段间交接基准测试
+"""
+
+import mmap
+import os
+import select
+import struct
+import time
+
+LENGTH_PREFIX = struct.Struct('=I')
+
+# 索引区：写索引位于偏移0，读索引位于偏移64（各占一个缓存行，避免伪共享）
+INDEX_AREA_SIZE = 128
+TAIL_INDEX = 0
+HEAD_INDEX = 8
+# 消费者等待标志，与读索引同一缓存行：置位时生产者提交后写eventfd唤醒消费者
+WAITING_INDEX = 9
+
+# 未启用eventfd时自旋窗口之后的轮询睡眠间隔
+POLL_SLEEP_S = 0.0001
+# 跨进程eventfd等待的单次上限：等待标志与写索引的读写可能被CPU重排导致唤醒丢失，
+# 最迟在此间隔后重新检查（线程间交接由GIL保证顺序，不受此限制）
+NOTIFY_RECHECK_S = 0.001
+
+
+class SPSCRing:
+    """定长槽位SPSC环形缓冲区
+
+    生产者：try_push(data) 或 reserve()/commit(length)（直接写入槽位）；
+    消费者：peek()/release() 或 drain(handler)（槽位memoryview在release前有效），wait()等待新数据。
+    跨进程使用依赖8字节对齐索引写入的原子性和写入顺序（x86-64满足；
+    ARM64等弱内存序CPU上跨进程交接请改用线程模式）；notify=True时eventfd随fork继承
+    """
+
+    def __init__(self, slot_count=1024, slot_size=2048, shared=False, notify=False):
+        if slot_count < 2 or slot_count & (slot_count - 1):
+            raise ValueError(f"槽位数必须是2的幂: {slot_count}")
+        self.slot_count = slot_count
+        self.slot_size = slot_size
+        self.mask = slot_count - 1
+        # 槽位按8字节对齐
+        self.stride = (LENGTH_PREFIX.size + slot_size + 7) & ~7
+        size = INDEX_AREA_SIZE + slot_count * self.stride
+        self.shared = shared
+        self.buffer = mmap.mmap(-1, size) if shared else bytearray(size)
+        self.view = memoryview(self.buffer)
+        self.indices = self.view[:INDEX_AREA_SIZE].cast('Q')
+        # 每个槽位：长度前缀偏移 + 数据区memoryview（预先创建，出入队不分配）
+        self.offsets = [INDEX_AREA_SIZE + i * self.stride for i in range(slot_count)]
+        self.slots = [self.view[offset + LENGTH_PREFIX.size:offset + LENGTH_PREFIX.size + slot_size]
+                      for offset in self.offsets]
+        # 消费者睡眠时由生产者写入的eventfd（只在消费者置位等待标志后写，不是每帧一次系统调用）
+        self.event_fd = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC) if notify else None
+
+        # 对端索引的本地缓存：只有缓存判断为满/空时才读取共享索引
+        self.head_cache = 0
+        self.tail_cache = 0
+
+        # 本端统计（跨进程时生产者和消费者各自计数）
+        self.stats = {
+            'pushed': 0,
+            'popped': 0,
+            'full': 0,
+            'oversize': 0,
+            'wakeups': 0
+        }
+
+    # ---- 生产者 ----
+
+    def reserve(self):
+        """返回下一个空闲槽位的memoryview，环满时返回None"""
+        tail = self.indices[TAIL_INDEX]
+        if tail - self.head_cache >= self.slot_count:
+            self.head_cache = self.indices[HEAD_INDEX]
+            if tail - self.head_cache >= self.slot_count:
+                self.stats['full'] += 1
+                return None
+        return self.slots[tail & self.mask]
+
+    def commit(self, length):
+        """写入reserve()槽位的数据长度并发布给消费者"""
+        tail = self.indices[TAIL_INDEX]
+        LENGTH_PREFIX.pack_into(self.buffer, self.offsets[tail & self.mask], length)
+        # 先写数据和长度，最后推进写索引
+        self.indices[TAIL_INDEX] = tail + 1
+        self.stats['pushed'] += 1
+        if self.event_fd is not None and self.indices[WAITING_INDEX]:
+            os.eventfd_write(self.event_fd, 1)
+            self.stats['wakeups'] += 1
+
+    def try_push(self, data):
+        """复制data到下一个槽位，环满或数据超过槽位大小时返回False"""
+        length = len(data)
+        if length > self.slot_size:
+            self.stats['oversize'] += 1
+            return False
+        slot = self.reserve()
+        if slot is None:
+            return False
+        slot[:length] = data
+        self.commit(length)
+        return True
+
+    # ---- 消费者 ----
+
+    def peek(self):
+        """返回最早一帧数据的memoryview（release()前有效），环空时返回None"""
+        head = self.indices[HEAD_INDEX]
+        if head >= self.tail_cache:
+            self.tail_cache = self.indices[TAIL_INDEX]
+            if head >= self.tail_cache:
+                return None
+        index = head & self.mask
+        length = LENGTH_PREFIX.unpack_from(self.buffer, self.offsets[index])[0]
+        return self.slots[index][:length]
+
+    def release(self, count=1):
+        """释放已处理的count个槽位给生产者"""
+        self.indices[HEAD_INDEX] += count
+        self.stats['popped'] += count
+
+    def pop(self):
+        """取出最早一帧的bytes副本，环空时返回None"""
+        data = self.peek()
+        if data is None:
+            return None
+        data = bytes(data)
+        self.release()
+        return data
+
+    def drain(self, handler, max_items=64):
+        """逐帧回调handler(memoryview)直到环空或达到max_items，批末一次性释放槽位，返回帧数
+
+        handler抛出异常时只释放已交给handler的帧（含抛出异常的这一帧），其余帧留在环中，异常继续抛出
+        """
+        indices = self.indices
+        head = indices[HEAD_INDEX]
+        available = self.tail_cache - head
+        if available <= 0:
+            self.tail_cache = indices[TAIL_INDEX]
+            available = self.tail_cache - head
+            if available <= 0:
+                return 0
+        count = min(available, max_items)
+        buffer = self.buffer
+        slots = self.slots
+        offsets = self.offsets
+        mask = self.mask
+        unpack_from = LENGTH_PREFIX.unpack_from
+        handed = 0
+        try:
+            while handed < count:
+                index = (head + handed) & mask
+                handed += 1
+                handler(slots[index][:unpack_from(buffer, offsets[index])[0]])
+        finally:
+            indices[HEAD_INDEX] = head + handed
+            self.stats['popped'] += handed
+        return count
+
+    def wait(self, timeout, spin_us=50):
+        """等待环中有数据：先自旋spin_us微秒，之后睡眠等待，超时返回False
+
+        未启用notify时以POLL_SLEEP_S短睡眠轮询：每次唤醒最多增加约100µs延迟，
+        空闲时每秒约一万次唤醒占用CPU；notify=True时阻塞在eventfd上，由生产者提交时唤醒
+        """
+        start = time.perf_counter()
+        spin_deadline = start + spin_us / 1e6
+        deadline = start + timeout
+        indices = self.indices
+        event_fd = self.event_fd
+        while True:
+            if indices[TAIL_INDEX] > indices[HEAD_INDEX]:
+                return True
+            now = time.perf_counter()
+            if now >= deadline:
+                return False
+            if now < spin_deadline:
+                continue
+            if event_fd is None:
+                time.sleep(POLL_SLEEP_S)
+                continue
+            # 先置位等待标志再检查写索引，避免生产者在两者之间提交而不唤醒
+            indices[WAITING_INDEX] = 1
+            if indices[TAIL_INDEX] <= indices[HEAD_INDEX]:
+                remaining = deadline - now
+                select.select((event_fd,), (), (), min(remaining, NOTIFY_RECHECK_S) if self.shared else remaining)
+                try:
+                    os.eventfd_read(event_fd)
+                except BlockingIOError:
+                    pass
+            indices[WAITING_INDEX] = 0
+
+    # ---- 状态 ----
+
+    def __len__(self):
+        return self.indices[TAIL_INDEX] - self.indices[HEAD_INDEX]
+
+    def get_stats(self):
+        """获取环形缓冲区统计信息"""
+        stats = dict(self.stats)
+        stats['depth'] = len(self)
+        stats['slot_count'] = self.slot_count
+        stats['slot_size'] = self.slot_size
+        stats['shared'] = self.shared
+        stats['notify'] = self.event_fd is not None
+        return stats
+
+    def close(self):
+        """释放缓冲区（所有槽位memoryview不再使用后调用）"""
+        self.slots = []
+        self.indices.release()
+        self.view.release()
+        if self.shared:
+            self.buffer.close()
+        if self.event_fd is not None:
+            os.close(self.event_fd)
+            self.event_fd = None
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+内核转发卸载测试脚本
+在同一台主机上创建两个网络命名空间（veth相连，模拟多播承载网络），
+每个命名空间以forwarding_mode=kernel运行一个goose-bridge.py，
+从A侧goose0发送GOOSE帧和非GOOSE帧，检查B侧goose0只收到GOOSE帧
+需要root权限
+"""
+
+import argparse
+import os
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+NAMESPACES = ('goose-a', 'goose-b')
+UNDERLAY_IPS = ('10.99.0.1/24', '10.99.0.2/24')
+GOOSE_MULTICAST_MAC = bytes.fromhex('010CCD010001')
+BRIDGE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'goose-bridge.py')
+
+
+def run(cmd, check=True):
+    """执行命令"""
+    return subprocess.run(cmd.split(), capture_output=True, text=True, check=check)
+
+
+def setup_namespaces():
+    """创建两个命名空间和连接它们的veth承载链路"""
+    cleanup_namespaces()
+    for ns in NAMESPACES:
+        run(f"ip netns add {ns}")
+    run(f"ip link add veth-a netns {NAMESPACES[0]} type veth peer name veth-b netns {NAMESPACES[1]}")
+    for ns, dev, ip in zip(NAMESPACES, ('veth-a', 'veth-b'), UNDERLAY_IPS):
+        run(f"ip netns exec {ns} ip addr add {ip} dev {dev}")
+        run(f"ip netns exec {ns} ip link set {dev} up")
+        run(f"ip netns exec {ns} ip link set lo up")
+        run(f"ip netns exec {ns} ip route add 224.0.0.0/4 dev {dev}")
+        # 桥接服务通过默认路由确定本机IP
+        run(f"ip netns exec {ns} ip route add default dev {dev}")
+    print(f"✅ 命名空间 {', '.join(NAMESPACES)} 已创建 (veth承载 {UNDERLAY_IPS[0]} <-> {UNDERLAY_IPS[1]})")
+
+
+def cleanup_namespaces():
+    """删除测试命名空间（其中的设备随之删除）"""
+    for ns in NAMESPACES:
+        run(f"ip netns del {ns}", check=False)
+
+
+def start_bridge(ns, workdir, tunnel):
+    """在命名空间中以内核转发模式启动桥接服务"""
+    config_file = os.path.join(workdir, f'{ns}.conf')
+    with open(config_file, 'w') as f:
+        f.write(f"""[DEFAULT]
+interface = goose0
+multicast_ip = 224.0.1.100
+forwarding_mode = kernel
+offload_tunnel = {tunnel}
+log_file = {workdir}/{ns}.log
+pid_file = {workdir}/{ns}.pid
+stats_file = {workdir}/{ns}-stats.json
+health_check_interval = 1
+enable_igmp_keepalive = false
+""")
+    return subprocess.Popen(['ip', 'netns', 'exec', ns, sys.executable, BRIDGE_SCRIPT, '-c', config_file],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_for_device(ns, device, timeout=10):
+    """等待命名空间中的设备出现并启用"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        result = run(f"ip netns exec {ns} ip link show {device}", check=False)
+        if result.returncode == 0 and 'UP' in result.stdout:
+            return True
+        time.sleep(0.2)
+    return False
+
+
+def send_frames(interface, count):
+    """在接口上发送count个GOOSE帧（一半带VLAN）和count个非GOOSE帧"""
+    sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW)
+    sock.bind((interface, 0))
+    src_mac = bytes.fromhex('020000000001')
+    for i in range(count):
+        payload = struct.pack('!HH', 0x0001, 20) + bytes([i % 256]) * 16
+        if i % 2:
+            header = GOOSE_MULTICAST_MAC + src_mac + struct.pack('!HHH', 0x8100, (4 << 13) | 10, 0x88B8)
+        else:
+            header = GOOSE_MULTICAST_MAC + src_mac + struct.pack('!H', 0x88B8)
+        sock.send(header + payload)
+        # 非GOOSE帧：同一目的MAC但EtherType为IPv4，应被过滤
+        sock.send(GOOSE_MULTICAST_MAC + src_mac + struct.pack('!H', 0x0800) + bytes(40))
+        time.sleep(0.001)
+    sock.close()
+    print(f"📤 {interface}: 已发送 {count} 个GOOSE帧和 {count} 个非GOOSE帧")
+
+
+def capture_frames(interface, duration):
+    """统计duration秒内接口收到的GOOSE帧和其他目的MAC为GOOSE地址的帧"""
+    sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(0x0003))
+    sock.bind((interface, 0))
+    sock.settimeout(0.2)
+    goose = other = 0
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        try:
+            frame, addr = sock.recvfrom(2048)
+        except socket.timeout:
+            continue
+        if frame[:6] != GOOSE_MULTICAST_MAC or addr[2] == socket.PACKET_OUTGOING:
+            continue
+        ethertype = struct.unpack('!H', frame[12:14])[0]
+        if ethertype == 0x8100:
+            ethertype = struct.unpack('!H', frame[16:18])[0]
+        if ethertype == 0x88B8:
+            goose += 1
+        else:
+            other += 1
+    sock.close()
+    print(f"RESULT {goose} {other}")
+
+
+def run_test(count, tunnel):
+    """完整测试：创建命名空间、启动两个桥接、发送并检查转发结果"""
+    if os.geteuid() != 0:
+        print("❌ 需要root权限")
+        return False
+
+    workdir = tempfile.mkdtemp(prefix='goose-offload-')
+    bridges = []
+    try:
+        setup_namespaces()
+        bridges = [start_bridge(ns, workdir, tunnel) for ns in NAMESPACES]
+        for ns in NAMESPACES:
+            if not wait_for_device(ns, 'goose0'):
+                print(f"❌ {ns} 中的goose0未创建，日志: {workdir}/{ns}.log")
+                return False
+        print(f"✅ 两个桥接服务已以内核转发模式启动 ({tunnel})")
+
+        script = os.path.abspath(__file__)
+        capture = subprocess.Popen(['ip', 'netns', 'exec', NAMESPACES[1], sys.executable, script,
+                                    'capture', '--duration', '3'],
+                                   stdout=subprocess.PIPE, text=True)
+        time.sleep(0.5)
+        subprocess.run(['ip', 'netns', 'exec', NAMESPACES[0], sys.executable, script,
+                        'send', '--count', str(count)], check=True)
+        output, _ = capture.communicate(timeout=10)
+
+        goose, other = 0, 0
+        for line in output.splitlines():
+            if line.startswith('RESULT'):
+                goose, other = map(int, line.split()[1:])
+
+        print(f"\n📊 测试结果:")
+        print(f"   B侧收到GOOSE帧: {goose}/{count}")
+        print(f"   B侧收到非GOOSE帧: {other} (应为0)")
+        success = goose == count and other == 0
+        print(f"   {'✅ 测试通过' if success else '❌ 测试失败'}")
+        return success
+
+    finally:
+        for bridge in bridges:
+            bridge.terminate()
+            try:
+                bridge.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                bridge.kill()
+        cleanup_namespaces()
+        print(f"🧹 测试环境已清理（日志和统计位于 {workdir}）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='内核转发卸载测试（两个网络命名空间）')
+    subparsers = parser.add_subparsers(dest='command')
+
+    test_parser = subparsers.add_parser('test', help='运行完整测试（默认）')
+    test_parser.add_argument('--count', type=int, default=100, help='发送的GOOSE帧数')
+    test_parser.add_argument('--tunnel', choices=['vxlan', 'gretap'], default='vxlan', help='隧道类型')
+
+    send_parser = subparsers.add_parser('send', help='在命名空间内发送测试帧（内部使用）')
+    send_parser.add_argument('--interface', default='goose0')
+    send_parser.add_argument('--count', type=int, default=100)
+
+    capture_parser = subparsers.add_parser('capture', help='在命名空间内统计收到的帧（内部使用）')
+    capture_parser.add_argument('--interface', default='goose0')
+    capture_parser.add_argument('--duration', type=float, default=3)
+
+    args = parser.parse_args()
+
+    if args.command == 'send':
+        send_frames(args.interface, args.count)
+    elif args.command == 'capture':
+        capture_frames(args.interface, args.duration)
+    else:
+        count = getattr(args, 'count', 100)
+        tunnel = getattr(args, 'tunnel', 'vxlan')
+        sys.exit(0 if run_test(count, tunnel) else 1)
+
+
+if __name__ == "__main__":
+    main()